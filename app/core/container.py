@@ -2,7 +2,7 @@ import os
 
 import hvac
 from dependency_injector import containers, providers
-from elasticsearch import Elasticsearch
+from elasticsearch import AsyncElasticsearch
 
 from app.domain.repositories.agents import AgentRepository, AgentSettingRepository
 from app.domain.repositories.attachments import AttachmentRepository
@@ -13,9 +13,11 @@ from app.domain.repositories.language_models import (
 )
 from app.domain.repositories.messages import MessageRepository
 from app.infrastructure.database.checkpoints import GraphPersistenceFactory
+from app.infrastructure.database.prices import PriceCache
 from app.infrastructure.database.sql import Database
 from app.infrastructure.database.vectors import DocumentRepository
 from app.infrastructure.metrics.tracer import Tracer
+from app.services.agent_runner import AgentRunner
 from app.services.agent_settings import AgentSettingService
 from app.services.agent_types.adaptive_rag.agent import AdaptiveRagAgent
 from app.services.agent_types.base import AgentUtils
@@ -37,9 +39,16 @@ from app.services.auth import AuthService
 from app.services.integrations import IntegrationService
 from app.services.language_model_settings import LanguageModelSettingService
 from app.services.language_models import LanguageModelService
+from app.services.markets_indicators import MarketsIndicatorsCache, MarketsIndicatorsService
+from app.services.markets_ohlcv import MarketsOhlcvService
 from app.services.markets_stats import MarketsStatsService
+from app.services.markets_stats_cache import MarketsStatsCache
+from app.services.message_jobs import MessageJobService, MessageJobWorker
 from app.services.messages import MessageService
+from app.services.model_client_cache import ModelClientCache
 from app.services.tasks import TaskNotificationService
+from app.services.vault_secrets_cache import VaultSecretsCache
+from app.services.workflow_graph_cache import WorkflowGraphCache
 
 
 class Container(containers.DeclarativeContainer):
@@ -52,6 +61,7 @@ class Container(containers.DeclarativeContainer):
             "app.interface.api.language_models.endpoints",
             "app.interface.api.markets.endpoints",
             "app.interface.api.messages.endpoints",
+            "app.interface.api.status.endpoints",
         ]
     )
 
@@ -96,9 +106,13 @@ class Container(containers.DeclarativeContainer):
     db = providers.Singleton(Database, db_url=config.db.url)
 
     es = providers.Singleton(
-        Elasticsearch,
+        AsyncElasticsearch,
         hosts=[os.getenv("ELASTICSEARCH_URL")],
         api_key=os.getenv("ELASTICSEARCH_API_KEY"),
+        connections_per_node=int(os.getenv("ELASTICSEARCH_CONNECTIONS_PER_NODE", "25")),
+        request_timeout=float(os.getenv("ELASTICSEARCH_REQUEST_TIMEOUT", "10")),
+        retry_on_timeout=True,
+        max_retries=2,
     )
 
     graph_persistence_factory = providers.Singleton(
@@ -109,6 +123,11 @@ class Container(containers.DeclarativeContainer):
         hvac.Client, url=config.vault.url, token=config.vault.token, verify=False
     )
 
+    vault_secrets_cache = providers.Singleton(
+        VaultSecretsCache,
+        vault_client=vault_client,
+    )
+
     document_repository = providers.Factory(
         DocumentRepository, db_url=config.db.vectors
     )
@@ -122,11 +141,46 @@ class Container(containers.DeclarativeContainer):
         client_secret=config.auth.client_secret,
     )
 
+    markets_stats_cache = providers.Singleton(
+        MarketsStatsCache,
+        redis_url=config.broker.url,
+    )
+
     markets_stats_service = providers.Factory(
         MarketsStatsService,
         es=es,
+        cache=markets_stats_cache,
+    )
+
+    markets_ohlcv_service = providers.Factory(
+        MarketsOhlcvService,
+        es=es,
+    )
+
+    markets_indicators_cache = providers.Singleton(MarketsIndicatorsCache)
+
+    # local Arrow copy of the EOD bars, disabled unless PRICE_CACHE_DIR is set
+    if os.getenv("PRICE_CACHE_DIR"):
+        price_cache = providers.Singleton(PriceCache, es=es, cache_dir=os.getenv("PRICE_CACHE_DIR"))
+    else:
+        price_cache = providers.Object(None)
+
+    markets_indicators_service = providers.Factory(
+        MarketsIndicatorsService,
+        ohlcv_service=markets_ohlcv_service,
+        cache=markets_indicators_cache,
+        price_cache=price_cache,
+    )
+
+    model_client_cache = providers.Singleton(
+        ModelClientCache,
+        redis_url=config.broker.url,
     )
 
+    workflow_graph_cache = providers.Singleton(WorkflowGraphCache)
+
+    agent_runner = providers.Singleton(AgentRunner)
+
     integration_repository = providers.Factory(
         IntegrationRepository,
         db=db,
@@ -136,6 +190,8 @@ class Container(containers.DeclarativeContainer):
     integration_service = providers.Factory(
         IntegrationService,
         integration_repository=integration_repository,
+        model_client_cache=model_client_cache,
+        vault_secrets_cache=vault_secrets_cache,
     )
 
     task_notification_service = providers.Factory(
@@ -151,6 +207,7 @@ class Container(containers.DeclarativeContainer):
     language_model_setting_service = providers.Factory(
         LanguageModelSettingService,
         language_model_setting_repository=language_model_setting_repository,
+        model_client_cache=model_client_cache,
     )
 
     language_model_repository = providers.Factory(LanguageModelRepository, db=db)
@@ -160,6 +217,7 @@ class Container(containers.DeclarativeContainer):
         language_model_repository=language_model_repository,
         language_model_setting_service=language_model_setting_service,
         integration_service=integration_service,
+        model_client_cache=model_client_cache,
     )
 
     attachment_repository = providers.Factory(AttachmentRepository, db=db)
@@ -172,6 +230,7 @@ class Container(containers.DeclarativeContainer):
         language_model_setting_service=language_model_setting_service,
         integration_service=integration_service,
         vault_client=vault_client,
+        vault_secrets_cache=vault_secrets_cache,
     )
 
     agent_setting_repository = providers.Factory(AgentSettingRepository, db=db)
@@ -188,6 +247,7 @@ class Container(containers.DeclarativeContainer):
         agent_repository=agent_repository,
         agent_setting_service=agent_setting_service,
         language_model_service=language_model_service,
+        model_client_cache=model_client_cache,
     )
 
     message_repository = providers.Factory(MessageRepository, db=db)
@@ -212,6 +272,9 @@ class Container(containers.DeclarativeContainer):
         graph_persistence_factory=graph_persistence_factory,
         document_repository=document_repository,
         task_notification_service=task_notification_service,
+        model_client_cache=model_client_cache,
+        vault_secrets_cache=vault_secrets_cache,
+        workflow_graph_cache=workflow_graph_cache,
     )
 
     adaptive_rag_agent = providers.Factory(AdaptiveRagAgent, agent_utils=agent_utils)
@@ -254,4 +317,18 @@ class Container(containers.DeclarativeContainer):
         fast_voice_memos_agent=fast_voice_memos_agent,
     )
 
+    message_job_service = providers.Factory(
+        MessageJobService,
+        redis_url=config.broker.url,
+    )
+
+    message_job_worker = providers.Factory(
+        MessageJobWorker,
+        message_job_service=message_job_service,
+        agent_service=agent_service,
+        agent_registry=agent_registry,
+        message_service=message_service,
+        task_notification_service=task_notification_service,
+    )
+
     tracer = providers.Singleton(Tracer)
@@ -0,0 +1,9 @@
+from app.domain.exceptions.base import NotFoundError
+
+
+class StatsCloseNotFoundError(NotFoundError):
+    entity_name: str = "Stats close"
+
+
+class BarsNotFoundError(NotFoundError):
+    entity_name: str = "Bars"
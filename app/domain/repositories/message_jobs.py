@@ -0,0 +1,5 @@
+from app.domain.exceptions.base import NotFoundError
+
+
+class MessageJobNotFoundError(NotFoundError):
+    entity_name: str = "Message job"
@@ -0,0 +1,173 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from elasticsearch import AsyncElasticsearch
+from typing_extensions import Any, Dict, Iterable, List, Optional
+
+from app.utils.backtesting_panel_utils import PANEL_FIELDS, Panel
+
+
+class PriceCache:
+    """
+    Local columnar copy of the quant-agents_stocks-eod_* documents, one Arrow IPC file per
+    index and ticker. Files are refreshed from Elasticsearch past their date_reference
+    watermark and read back through memory maps as zero-copy NumPy arrays.
+
+    Enabled in the container by PRICE_CACHE_DIR, MarketsIndicatorsService then reads the bars
+    of a ticker from here after an incremental refresh instead of its whole history from ES.
+    """
+
+    SCHEMA = pa.schema(
+        [("date_reference", pa.timestamp("ms"))] + [(field, pa.float64()) for field in PANEL_FIELDS]
+    )
+
+    def __init__(self, es: AsyncElasticsearch, cache_dir: str, page_size: int = 10000):
+        self.es = es
+        self.cache_dir = cache_dir
+        self.page_size = page_size
+        self.logger = logging.getLogger(__name__)
+
+    def get_path(self, index_name: str, key_ticker: str) -> str:
+        return os.path.join(self.cache_dir, index_name, f"{key_ticker}.arrow")
+
+    def read_table(self, index_name: str, key_ticker: str) -> Optional[pa.Table]:
+        path = self.get_path(index_name, key_ticker)
+        if not os.path.exists(path):
+            return None
+        return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+    def get_watermark(self, index_name: str, key_ticker: str) -> Optional[str]:
+        table = self.read_table(index_name, key_ticker)
+        if table is None or table.num_rows == 0:
+            return None
+        last_date = table.column("date_reference")[-1].as_py()
+        return last_date.strftime("%Y-%m-%d")
+
+    async def refresh(self, index_name: str, key_tickers: Iterable[str], full: bool = False) -> Dict[str, int]:
+        """
+        Appends the bars newer than each ticker watermark, fetching all tickers through shared
+        paginated searches. `full` drops the local copies and reloads the whole history.
+        Returns the number of new bars per ticker.
+        """
+        watermarks = {
+            key_ticker: None if full else self.get_watermark(index_name, key_ticker) for key_ticker in key_tickers
+        }
+        new_bars = {key_ticker: [] for key_ticker in watermarks}
+
+        # tickers without a local copy load their whole history, the others only what follows the oldest watermark
+        missing = [key_ticker for key_ticker, watermark in watermarks.items() if watermark is None]
+        cached = [key_ticker for key_ticker, watermark in watermarks.items() if watermark is not None]
+        searches = [(missing, None), (cached, min((watermarks[key_ticker] for key_ticker in cached), default=None))]
+
+        for search_tickers, since in searches:
+            if not search_tickers:
+                continue
+            async for hit in self._search_bars(index_name, search_tickers, since):
+                bar = hit["_source"]
+                watermark = watermarks.get(bar["key_ticker"])
+                if watermark is None or bar["date_reference"] > watermark:
+                    new_bars[bar["key_ticker"]].append(bar)
+
+        for key_ticker, bars in new_bars.items():
+            if bars or full:
+                self._write(index_name, key_ticker, bars, append=not full)
+
+        self.logger.info(f"PriceCache[{index_name}] -> refreshed {sum(map(len, new_bars.values()))} bars")
+        return {key_ticker: len(bars) for key_ticker, bars in new_bars.items()}
+
+    async def _search_bars(self, index_name: str, key_tickers: List[str], since: Optional[str]):
+        filters = [{"terms": {"key_ticker": key_tickers}}]
+        if since is not None:
+            filters.append({"range": {"date_reference": {"gt": since}}})
+
+        search_query = {
+            "size": self.page_size,
+            "query": {"bool": {"filter": filters}},
+            "sort": [{"key_ticker": "asc"}, {"date_reference": "asc"}],
+            "_source": ["key_ticker", "date_reference"] + list(PANEL_FIELDS),
+        }
+
+        # a ticker indexed under several indices repeats a sort key, those duplicates are skipped on purpose
+        while True:
+            response = await self.es.search(index=index_name, body=search_query)
+            hits = response["hits"]["hits"]
+            for hit in hits:
+                yield hit
+            if len(hits) < self.page_size:
+                break
+            search_query["search_after"] = hits[-1]["sort"]
+
+    def _write(self, index_name: str, key_ticker: str, bars: List[dict], append: bool = True) -> None:
+        df = pd.DataFrame(bars, columns=["date_reference"] + list(PANEL_FIELDS))
+        df = df.drop_duplicates(subset="date_reference", keep="last")
+        table = pa.Table.from_pandas(
+            pd.DataFrame({
+                "date_reference": pd.to_datetime(df["date_reference"]).astype("datetime64[ms]"),
+                **{field: pd.to_numeric(df[field], errors="coerce").astype(np.float64) for field in PANEL_FIELDS},
+            }),
+            schema=self.SCHEMA,
+            preserve_index=False,
+        )
+
+        previous = self.read_table(index_name, key_ticker) if append else None
+        if previous is not None:
+            table = pa.concat_tables([previous, table])
+            # concurrent refreshes may both append the same bars, the newest copy of a date wins
+            dates = table.column("date_reference").to_numpy()
+            _, last = np.unique(dates[::-1], return_index=True)
+            table = table.take(len(dates) - 1 - last)
+
+        # single chunk per column keeps reads zero-copy, write then rename so readers never see partial files
+        path = self.get_path(index_name, key_ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with pa.OSFile(f"{path}.tmp", "wb") as sink:
+            with pa.ipc.new_file(sink, self.SCHEMA) as writer:
+                writer.write_table(table.combine_chunks())
+        os.replace(f"{path}.tmp", path)
+
+    def load(self, index_name: str, key_ticker: str) -> Dict[str, np.ndarray]:
+        """Memory-mapped arrays of date_reference (datetime64[ms]) and each OHLCV field."""
+        table = self.read_table(index_name, key_ticker)
+        if table is None:
+            return {
+                "date_reference": np.empty(0, dtype="datetime64[ms]"),
+                **{field: np.empty(0) for field in PANEL_FIELDS},
+            }
+        table = table.combine_chunks()
+        return {
+            name: column.chunk(0).to_numpy(zero_copy_only=True) if column.num_chunks == 1 else column.to_numpy()
+            for name, column in zip(table.column_names, table.columns)
+        }
+
+    def load_columns(self, index_name: str, key_ticker: str, start_date: Optional[str] = None,
+                     end_date: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Bars between start_date and end_date (both inclusive) as the columns of
+        MarketsOhlcvService.get_ohlcv, date_reference strings then float64 arrays per field.
+        """
+        arrays = self.load(index_name, key_ticker)
+        dates = arrays.pop("date_reference")
+        keep = np.ones(len(dates), dtype=bool)
+        if start_date is not None:
+            keep &= dates >= np.datetime64(start_date, "ms")
+        if end_date is not None:
+            keep &= dates <= np.datetime64(end_date, "ms")
+        return {
+            "date_reference": np.datetime_as_string(dates[keep], unit="D").tolist(),
+            **{field: values[keep] for field, values in arrays.items()},
+        }
+
+    def load_frame(self, index_name: str, key_ticker: str) -> pd.DataFrame:
+        """Frame indexed by date_reference, the input expected by backtesting_utils."""
+        arrays = self.load(index_name, key_ticker)
+        dates = pd.DatetimeIndex(arrays.pop("date_reference"), name="date_reference")
+        return pd.DataFrame(arrays, index=dates)
+
+    def load_panel(self, index_name: str, key_tickers: Iterable[str]) -> Panel:
+        frames = [
+            self.load_frame(index_name, key_ticker).assign(key_ticker=key_ticker) for key_ticker in key_tickers
+        ]
+        return Panel.from_long(pd.concat(frames).reset_index())
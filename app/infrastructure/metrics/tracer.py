@@ -99,8 +99,10 @@ if collector_endpoint is not None:
 
 
 class Tracer:
-    def setup(self, app):
-        FastAPIInstrumentor.instrument_app(app)
+    def setup(self, app=None):
+        # processes without a web app, such as the message job worker, skip the FastAPI spans
+        if app is not None:
+            FastAPIInstrumentor.instrument_app(app)
         HTTPXClientInstrumentor().instrument()
         LangchainInstrumentor().instrument()
         SQLAlchemyInstrumentor().instrument()
@@ -1,14 +1,40 @@
+import orjson
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Body, Depends, Response
+from typing_extensions import Dict
 
 from app.core.container import Container
+from app.domain.repositories.markets import StatsCloseNotFoundError
 from app.interface.api.cache_control import cache_control
-from app.interface.api.markets.schema import StatsClose, StatsCloseRequest
+from app.interface.api.markets.schema import (
+    Indicators,
+    IndicatorsRequest,
+    Ohlcv,
+    OhlcvRequest,
+    StatsClose,
+    StatsCloseBatchRequest,
+    StatsCloseRequest,
+)
+from app.services.markets_indicators import MarketsIndicatorsService
+from app.services.markets_ohlcv import MarketsOhlcvService
 from app.services.markets_stats import MarketsStatsService
 
 router = APIRouter()
 
 
+def _format_stats_close(key_ticker: str, result: dict) -> StatsClose:
+    return StatsClose(
+        key_ticker=key_ticker,
+        most_recent_close=result.get('most_recent_close'),
+        most_recent_open=result.get('most_recent_open'),
+        most_recent_high=result.get('most_recent_high'),
+        most_recent_low=result.get('most_recent_low'),
+        most_recent_volume=result.get('most_recent_volume'),
+        most_recent_date=result.get('most_recent_date'),
+        percent_variance=result.get('percent_variance'),
+    )
+
+
 @router.get(
     path="/stats_close/{index_name}/{key_ticker}",
     response_model=StatsClose,
@@ -25,15 +51,105 @@ async def get_most_recent_close(
 
 ):
     result = await markets_stats_service.get_stats_close(index_name, key_ticker, request.close_date)
-    response = StatsClose(
-        key_ticker=key_ticker,
-        most_recent_close=result.get('most_recent_close'),
-        most_recent_open=result.get('most_recent_open'),
-        most_recent_high=result.get('most_recent_high'),
-        most_recent_low=result.get('most_recent_low'),
-        most_recent_volume=result.get('most_recent_volume'),
-        most_recent_date=result.get('most_recent_date'),
-        percent_variance=result.get('percent_variance'),
-    )
+    if result is None:
+        raise StatsCloseNotFoundError(f"{index_name}/{key_ticker}")
+    response = _format_stats_close(key_ticker, result)
 
     return response
+
+
+@router.post(
+    path="/stats_close/{index_name}",
+    response_model=Dict[str, StatsClose],
+    operation_id="stats_close_batch",
+    summary="Get most recent close stats for a list of tickers",
+    description="""
+    Resolves the close stats of every ticker in a single Elasticsearch multi search.
+
+    The response maps each ticker to its stats, tickers with less than two bars
+    up to `close_date` are left out.
+    """,
+)
+@inject
+async def get_most_recent_close_batch(
+        index_name: str,
+        request: StatsCloseBatchRequest = Body(...),
+        markets_stats_service: MarketsStatsService = Depends(Provide[Container.markets_stats_service]),
+):
+    results = await markets_stats_service.get_stats_close_batch(index_name, request.key_tickers, request.close_date)
+    return {
+        key_ticker: _format_stats_close(key_ticker, result)
+        for key_ticker, result in results.items()
+        if result is not None
+    }
+
+
+@router.get(
+    path="/ohlcv/{index_name}/{key_ticker}",
+    response_model=Ohlcv,
+    operation_id="ohlcv",
+    summary="Get the daily bars of a ticker as columns",
+    description="""
+    Returns the bars between `start_date` and `end_date` (both inclusive, optional) in
+    date order, limited to the comma separated `fields` (all OHLCV fields by default).
+
+    With `format=json` every field is an array aligned with `date_reference`, with
+    `format=arrow` the same columns are sent as an Apache Arrow IPC stream
+    (`application/vnd.apache.arrow.stream`).
+    """,
+)
+@inject
+async def get_ohlcv(
+        index_name: str,
+        key_ticker: str,
+        markets_ohlcv_service: MarketsOhlcvService = Depends(Provide[Container.markets_ohlcv_service]),
+        request: OhlcvRequest = Depends(),
+):
+    columns = await markets_ohlcv_service.get_ohlcv(
+        index_name, key_ticker, request.start_date, request.end_date, request.get_fields()
+    )
+
+    # the columns are serialized directly, validating them element by element would cost more than the search,
+    # headers of the cache_control dependency are not applied to a returned Response so they are set here
+    headers = {"Cache-Control": "public, max-age=3600, s-maxage=3600"}
+    if request.format == "arrow":
+        return Response(
+            content=markets_ohlcv_service.to_arrow_ipc(columns),
+            media_type="application/vnd.apache.arrow.stream",
+            headers=headers,
+        )
+    return Response(
+        content=orjson.dumps({"key_ticker": key_ticker, **columns}),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+@router.post(
+    path="/indicators/{index_name}/{key_ticker}",
+    response_model=Indicators,
+    operation_id="indicators",
+    summary="Compute technical indicators and strategy returns for a ticker",
+    description="""
+    Loads the bars of the ticker once and computes every requested indicator
+    (sma, ema, rsi, macd, adx, cci, aroon, bbands, ad, obv, stoch) over them.
+    `indicators` maps each indicator to its parameters, an empty object keeps the defaults.
+
+    Every indicator returns its series aligned with `date_reference`, the dates where
+    its position changes and the compounded buy and hold (`returns`) and strategy growth.
+    Results are cached until a newer bar is ingested.
+    """,
+)
+@inject
+async def get_indicators(
+        index_name: str,
+        key_ticker: str,
+        request: IndicatorsRequest = Body(...),
+        markets_indicators_service: MarketsIndicatorsService = Depends(Provide[Container.markets_indicators_service]),
+):
+    result = await markets_indicators_service.get_indicators(
+        index_name, key_ticker, request.indicators, request.start_date, request.end_date
+    )
+
+    # NaN warm-up values are written as null by orjson, the standard encoder would reject them
+    return Response(content=orjson.dumps(result), media_type="application/json")
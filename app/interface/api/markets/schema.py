@@ -1,9 +1,12 @@
+import inspect
 from datetime import datetime, date
-from typing_extensions import Optional
+from typing_extensions import Dict, List, Literal, Optional, Union
 
 from pydantic import BaseModel, field_validator
 
 from app.domain.exceptions.base import InvalidFieldError
+from app.services.markets_ohlcv import OHLCV_FIELDS
+from app.utils.backtesting_panel_utils import PANEL_INDICATORS
 
 
 class StatsClose(BaseModel):
@@ -17,19 +20,139 @@ class StatsClose(BaseModel):
     percent_variance: float
 
 
+def validate_date(field: str, v: Optional[str]) -> Optional[str]:
+    if v is None:
+        return v
+
+    try:
+        # Validate the date format
+        datetime.strptime(v, '%Y-%m-%d')
+        return v
+    except ValueError:
+        raise InvalidFieldError(field, 'Date must be in yyyy-mm-dd format')
+
+
+def validate_close_date(v: Optional[str]) -> Optional[str]:
+    return validate_date('close_date', v)
+
+
 class StatsCloseRequest(BaseModel):
     close_date: Optional[str] = None
 
     @field_validator('close_date')
     @classmethod
     def validate_date_format(cls, v: Optional[str]) -> Optional[str]:
+        return validate_close_date(v)
+
+
+class StatsCloseBatchRequest(BaseModel):
+    key_tickers: List[str]
+    close_date: Optional[str] = None
+
+    @field_validator('key_tickers')
+    @classmethod
+    def validate_key_tickers(cls, v: List[str]) -> List[str]:
+        if not v:
+            raise InvalidFieldError('key_tickers', 'At least one ticker is required')
+        if len(v) > 500:
+            raise InvalidFieldError('key_tickers', 'At most 500 tickers are allowed')
+        return v
+
+    @field_validator('close_date')
+    @classmethod
+    def validate_date_format(cls, v: Optional[str]) -> Optional[str]:
+        return validate_close_date(v)
+
+
+class Ohlcv(BaseModel):
+    key_ticker: str
+    date_reference: List[str]
+    val_open: Optional[List[Optional[float]]] = None
+    val_high: Optional[List[Optional[float]]] = None
+    val_low: Optional[List[Optional[float]]] = None
+    val_close: Optional[List[Optional[float]]] = None
+    val_volume: Optional[List[Optional[float]]] = None
+
+
+class OhlcvRequest(BaseModel):
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+    fields: Optional[str] = None
+    format: Literal["json", "arrow"] = "json"
+
+    @field_validator('start_date', 'end_date')
+    @classmethod
+    def validate_date_format(cls, v: Optional[str], info) -> Optional[str]:
+        return validate_date(info.field_name, v)
+
+    @field_validator('fields')
+    @classmethod
+    def validate_fields(cls, v: Optional[str]) -> Optional[str]:
         if v is None:
             return v
+        unknown = [field for field in v.split(',') if field not in OHLCV_FIELDS]
+        if unknown:
+            raise InvalidFieldError('fields', f"Unknown fields {unknown}, allowed fields are {OHLCV_FIELDS}")
+        return v
+
+    def get_fields(self) -> List[str]:
+        return self.fields.split(',') if self.fields else OHLCV_FIELDS
+
+
+# parameters counted in bars, a standard deviation needs at least two of them
+INDICATOR_WINDOW_PARAMETERS = ('window', 'period', 'lookback', 'smooth', 'span')
+INDICATOR_MIN_WINDOWS = {('bbands', 'period'): 2}
+
+
+def validate_indicator_parameter(name: str, param: str, value: Union[int, float]) -> Union[int, float]:
+    if not any(part in param for part in INDICATOR_WINDOW_PARAMETERS):
+        return value
+
+    minimum = INDICATOR_MIN_WINDOWS.get((name, param), 1)
+    if isinstance(value, float):
+        if not value.is_integer():
+            raise InvalidFieldError('indicators', f"'{name}.{param}' must be an integer, got {value}")
+        value = int(value)
+    if value < minimum:
+        raise InvalidFieldError('indicators', f"'{name}.{param}' must be at least {minimum}, got {value}")
+    return value
 
-        try:
-            # Validate the date format
-            datetime.strptime(v, '%Y-%m-%d')
-            return v
-        except ValueError:
-            raise InvalidFieldError('close_date', 'Date must be in yyyy-mm-dd format')
 
+class IndicatorsRequest(BaseModel):
+    indicators: Dict[str, Dict[str, Union[int, float]]]
+    start_date: Optional[str] = None
+    end_date: Optional[str] = None
+
+    @field_validator('indicators')
+    @classmethod
+    def validate_indicators(cls, v: Dict[str, Dict[str, Union[int, float]]]) -> Dict[str, Dict[str, Union[int, float]]]:
+        if not v:
+            raise InvalidFieldError('indicators', 'At least one indicator is required')
+        for name, params in v.items():
+            if name not in PANEL_INDICATORS:
+                raise InvalidFieldError('indicators', f"Unknown indicator '{name}', expected one of {list(PANEL_INDICATORS)}")
+            allowed = [param for param in inspect.signature(PANEL_INDICATORS[name]).parameters if param not in ('panel', 'outputs')]
+            unknown = [param for param in params if param not in allowed]
+            if unknown:
+                raise InvalidFieldError('indicators', f"Unknown parameters {unknown} for '{name}', expected {allowed}")
+            for param, value in params.items():
+                params[param] = validate_indicator_parameter(name, param, value)
+        return v
+
+    @field_validator('start_date', 'end_date')
+    @classmethod
+    def validate_date_format(cls, v: Optional[str], info) -> Optional[str]:
+        return validate_date(info.field_name, v)
+
+
+class IndicatorResult(BaseModel):
+    values: Dict[str, List[Optional[float]]]
+    crossovers: List[str]
+    returns: Optional[float] = None
+    strategy: Optional[float] = None
+
+
+class Indicators(BaseModel):
+    key_ticker: str
+    date_reference: List[str]
+    indicators: Dict[str, IndicatorResult]
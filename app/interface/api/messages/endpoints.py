@@ -1,5 +1,6 @@
 from dependency_injector.wiring import inject, Provide
-from fastapi import APIRouter, Depends, Body, Response, status
+from fastapi import APIRouter, Depends, Body, Query, Response, status
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPBearer
 from fastapi_keycloak_middleware import get_user
 from typing_extensions import List
@@ -13,11 +14,14 @@ from app.interface.api.messages.schema import (
     MessageListRequest,
     MessageExpanded,
     Message,
+    MessageJob,
     MessageRequest,
 )
+from app.services.agent_runner import AgentRunner
 from app.services.agent_types.registry import AgentRegistry
 from app.services.agents import AgentService
 from app.services.attachments import AttachmentService
+from app.services.message_jobs import MessageJobService
 from app.services.messages import MessageService
 
 router = APIRouter()
@@ -128,6 +132,11 @@ async def get_list(
     - Use structured information for details and chain-of-thought reasoning
     - When displaying messages, always present the agent message response to the user
 
+    **Async mode:**
+    With `async_mode=true` the human message is stored and queued, the endpoint answers
+    `202` with a job and an agent worker processes it. Poll `/messages/jobs/{job_id}` or
+    follow `/agents/ws/task_updates/{agent_id}` for progress.
+
 
     """,
     response_description="The assistant's response message",
@@ -148,6 +157,7 @@ async def get_list(
                 }
             },
         },
+        202: {"description": "Message queued for processing (async mode)", "model": MessageJob},
         400: {"description": "Invalid request data fields"},
         404: {"description": "Agent not found"},
         422: {"description": "Invalid request data unprocessable entity"},
@@ -168,6 +178,13 @@ async def post_message(
     agent_service: AgentService = Depends(Provide[Container.agent_service]),
     agent_registry: AgentRegistry = Depends(Provide[Container.agent_registry]),
     message_service: MessageService = Depends(Provide[Container.message_service]),
+    async_mode: bool = Query(
+        False, description="Queue the message for an agent worker and answer 202 with a job"
+    ),
+    agent_runner: AgentRunner = Depends(Provide[Container.agent_runner]),
+    message_job_service: MessageJobService = Depends(
+        Provide[Container.message_job_service]
+    ),
     user: User = Depends(get_user),
 ):
     """
@@ -178,9 +195,12 @@ async def post_message(
         agent_service: Service for agent management
         agent_registry: Registry of available agent types
         message_service: Service for message persistence
+        async_mode: Whether to queue the message instead of processing it in the request
+        agent_runner: Thread pool running the agent workflow off the event loop
+        message_job_service: Queue of the messages posted in async mode
 
     Returns:
-        Message: The assistant's response message
+        Message: The assistant's response message, or MessageJob in async mode
     """
     schema = user.id.replace("-", "_") if user is not None else "public"
     agent = agent_service.get_agent_by_id(message_data.agent_id, schema)
@@ -195,8 +215,15 @@ async def post_message(
         schema=schema,
     )
 
+    if async_mode:
+        job = message_job_service.enqueue(message_data, schema, human_message.id)
+        return JSONResponse(
+            status_code=status.HTTP_202_ACCEPTED,
+            content=MessageJob(**job).model_dump(mode="json"),
+        )
+
     # Process human message
-    processed_message = matching_agent.process_message(message_data, schema)
+    processed_message = await agent_runner.process_message(matching_agent, message_data, schema)
 
     # Store assistant message
     assistant_message = message_service.create_message(
@@ -211,6 +238,46 @@ async def post_message(
     return Message.model_validate(assistant_message)
 
 
+@router.get(
+    "/jobs/{job_id}",
+    dependencies=[Depends(bearer_scheme)],
+    response_model=MessageJob,
+    operation_id="get_message_job",
+    summary="Get the status of a queued message",
+    description="""
+    Retrieve the status of a message posted with `async_mode=true`.
+
+    Once the job is `completed`, `assistant_message_id` references the stored assistant
+    message. A `failed` job reports its error. Jobs expire one day after being queued.
+    """,
+    response_description="The message job",
+    responses={
+        200: {"description": "Message job retrieved successfully"},
+        404: {"description": "Message job not found"},
+    },
+)
+@inject
+async def get_job(
+    job_id: str,
+    message_job_service: MessageJobService = Depends(
+        Provide[Container.message_job_service]
+    ),
+    user: User = Depends(get_user),
+):
+    """
+    Get a message job by ID.
+
+    Args:
+        job_id: Identifier returned by post_message in async mode
+        message_job_service: Injected message job service
+
+    Returns:
+        MessageJob: Status of the job
+    """
+    schema = user.id.replace("-", "_") if user is not None else "public"
+    return MessageJob(**message_job_service.get_job(job_id, schema))
+
+
 @router.get(
     "/{message_id}",
     dependencies=[Depends(bearer_scheme)],
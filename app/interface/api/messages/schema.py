@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from pydantic import BaseModel, field_validator
-from typing_extensions import Optional
+from typing_extensions import Literal, Optional
 
 from app.domain.exceptions.base import InvalidFieldError
 from app.interface.api.attachments.schema import Attachment
@@ -42,3 +42,13 @@ class Message(MessageBase):
 class MessageExpanded(Message):
     replies_to: Optional[Message]
     attachment: Optional[Attachment]
+
+
+class MessageJob(BaseModel):
+    id: str
+    status: Literal["queued", "in_progress", "completed", "failed"]
+    agent_id: str
+    human_message_id: str
+    assistant_message_id: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
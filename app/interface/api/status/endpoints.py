@@ -2,7 +2,11 @@ import threading
 import time
 
 import psutil
-from fastapi import APIRouter
+from dependency_injector.wiring import inject, Provide
+from fastapi import APIRouter, Depends
+
+from app.core.container import Container
+from app.services.vault_secrets_cache import VaultSecretsCache
 
 startup_time = time.time()
 
@@ -28,7 +32,10 @@ def readiness():
 
 
 @router.get("/metrics", include_in_schema=False)
-def metrics():
+@inject
+def metrics(
+    vault_secrets_cache: VaultSecretsCache = Depends(Provide[Container.vault_secrets_cache]),
+):
     """
     Returns application metrics.
     """
@@ -53,4 +60,5 @@ def metrics():
             },
         },
         "threads": {"active_count": threading.active_count()},
+        "vault_secrets_cache": vault_secrets_cache.get_metrics(),
     }
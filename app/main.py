@@ -45,6 +45,7 @@ def create_app():
     setup_exception_handlers(application)
     setup_middleware(application)
     setup_static_files(application)
+    setup_shutdown(container, application)
 
     return application
 
@@ -163,6 +164,15 @@ def setup_middleware(application: FastAPI):
         LoggingMiddleware,
     )
 
+
+def setup_shutdown(container: Container, application: FastAPI):
+    async def close_elasticsearch():
+        # the pooled connections of the AsyncElasticsearch singleton are released with the event loop
+        await container.es().close()
+
+    application.add_event_handler("shutdown", close_elasticsearch)
+
+
 def setup_static_files(application: FastAPI):
     application.mount(
         path="/",
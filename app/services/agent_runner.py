@@ -0,0 +1,31 @@
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from typing_extensions import Optional
+
+from app.interface.api.messages.schema import Message, MessageRequest
+from app.services.agent_types.base import AgentBase
+
+
+class AgentRunner:
+    """
+    Runs the synchronous agent workflows on a bounded thread pool, so a multi-second LLM run
+    waits on I/O in a worker thread instead of blocking the event loop of the uvicorn process.
+    At most `max_workers` (AGENT_WORKERS) messages run at once per process, the others wait
+    in the pool queue.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        self.max_workers = max_workers or int(os.environ.get("AGENT_WORKERS", "8"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="agent")
+
+    async def process_message(self, agent: AgentBase, message_request: MessageRequest, schema: str) -> Message:
+        loop = asyncio.get_running_loop()
+        # the request context (tracing spans) follows the message into the worker thread
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self.executor, functools.partial(context.run, agent.process_message, message_request, schema)
+        )
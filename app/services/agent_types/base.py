@@ -48,6 +48,9 @@ from app.services.attachments import AttachmentService
 from app.services.integrations import IntegrationService
 from app.services.language_model_settings import LanguageModelSettingService
 from app.services.language_models import LanguageModelService
+from app.services.model_client_cache import ModelClientCache
+from app.services.vault_secrets_cache import VaultSecretsCache
+from app.services.workflow_graph_cache import WorkflowGraphCache
 from app.services.tasks import TaskNotificationService, TaskProgress
 
 
@@ -81,6 +84,9 @@ class AgentUtils:
         document_repository: DocumentRepository,
         task_notification_service: TaskNotificationService,
         config: Configuration,
+        model_client_cache: ModelClientCache = None,
+        vault_secrets_cache: VaultSecretsCache = None,
+        workflow_graph_cache: WorkflowGraphCache = None,
     ):
         self.config = config
         self.agent_service = agent_service
@@ -93,6 +99,9 @@ class AgentUtils:
         self.graph_persistence_factory = graph_persistence_factory
         self.document_repository = document_repository
         self.task_notification_service = task_notification_service
+        self.model_client_cache = model_client_cache
+        self.vault_secrets_cache = vault_secrets_cache or VaultSecretsCache(vault_client, ttl=0)
+        self.workflow_graph_cache = workflow_graph_cache
 
 
 class AgentBase(ABC):
@@ -107,6 +116,9 @@ class AgentBase(ABC):
         self.integration_service = agent_utils.integration_service
         self.task_notification_service = agent_utils.task_notification_service
         self.vault_client = agent_utils.vault_client
+        self.model_client_cache = agent_utils.model_client_cache
+        self.vault_secrets_cache = agent_utils.vault_secrets_cache
+        self.workflow_graph_cache = agent_utils.workflow_graph_cache
         self.logger = logging.getLogger(__name__)
 
     @abstractmethod
@@ -142,14 +154,42 @@ class AgentBase(ABC):
         return language_model, integration
 
     def get_integration_credentials(self, integration: Integration) -> (str, str):
-        secrets = self.vault_client.secrets.kv.read_secret_version(
-            path=f"integration_{integration.id}", raise_on_deleted_version=False
+        secrets = self.vault_secrets_cache.read_secret(
+            self.integration_service.get_credentials_path(integration.id)
         )
-        api_endpoint = secrets["data"]["data"]["api_endpoint"]
-        api_key = secrets["data"]["data"]["api_key"]
+        api_endpoint = secrets["api_endpoint"]
+        api_key = secrets["api_key"]
         return api_endpoint, api_key
 
+    def get_cached_client(self, schema: str, key: tuple, factory):
+        if self.model_client_cache is None:
+            return factory()
+        return self.model_client_cache.get_or_create(schema, key, factory)
+
+    def get_http_client(self, api_endpoint: str):
+        if self.model_client_cache is None:
+            return None
+        return self.model_client_cache.get_http_client(api_endpoint)
+
+    def get_cached_workflow(self, key: tuple, factory):
+        """
+        Compiled graphs are shared across instances of the agent class, their nodes stay bound to
+        the instance that compiled them. That is safe because the collaborators of an agent are
+        stateless services over the container singletons and every node reads agent_id and schema
+        from the workflow state.
+        """
+        if self.workflow_graph_cache is None:
+            return factory()
+        return self.workflow_graph_cache.get_or_compile((self.__class__, *key), factory)
+
     def get_embeddings_model(self, agent_id, schema: str) -> Embeddings:
+        return self.get_cached_client(
+            schema,
+            (agent_id, "embeddings"),
+            lambda: self.create_embeddings_model(agent_id, schema),
+        )
+
+    def create_embeddings_model(self, agent_id, schema: str) -> Embeddings:
         agent = self.agent_service.get_agent_by_id(agent_id, schema)
         language_model, integration = self.get_language_model_integration(agent, schema)
         api_endpoint, api_key = self.get_integration_credentials(integration)
@@ -167,6 +207,7 @@ class AgentBase(ABC):
                 model=lm_settings_dict["embeddings"],
                 openai_api_base=api_endpoint,
                 openai_api_key=api_key,
+                http_client=self.get_http_client(api_endpoint),
             )
         elif integration.integration_type == "ollama_api_v1":
             return OllamaEmbeddings(
@@ -180,6 +221,15 @@ class AgentBase(ABC):
 
     def get_chat_model(
         self, agent_id, schema: str, language_model_tag: str = None
+    ) -> BaseChatModel:
+        return self.get_cached_client(
+            schema,
+            (agent_id, "chat", language_model_tag),
+            lambda: self.create_chat_model(agent_id, schema, language_model_tag),
+        )
+
+    def create_chat_model(
+        self, agent_id, schema: str, language_model_tag: str = None
     ) -> BaseChatModel:
         agent = self.agent_service.get_agent_by_id(agent_id, schema)
         language_model, integration = self.get_language_model_integration(agent, schema)
@@ -193,12 +243,14 @@ class AgentBase(ABC):
                 model_name=language_model_tag,
                 openai_api_base=api_endpoint,
                 openai_api_key=api_key,
+                http_client=self.get_http_client(api_endpoint),
             )
         elif integration.integration_type == "xai_api_v1":
             return ChatXAI(
                 model=language_model_tag,
                 xai_api_base=api_endpoint,
                 xai_api_key=api_key,
+                http_client=self.get_http_client(api_endpoint),
             )
         elif integration.integration_type == "anthropic_api_v1":
             return ChatAnthropic(
@@ -213,6 +265,13 @@ class AgentBase(ABC):
             )
 
     def get_openai_client(self, agent_id: str, schema: str) -> OpenAI:
+        return self.get_cached_client(
+            schema,
+            (agent_id, "openai"),
+            lambda: self.create_openai_client(agent_id, schema),
+        )
+
+    def create_openai_client(self, agent_id: str, schema: str) -> OpenAI:
         agent = self.agent_service.get_agent_by_id(agent_id, schema)
         _, integration = self.get_language_model_integration(agent, schema)
         api_endpoint, api_key = self.get_integration_credentials(integration)
@@ -220,6 +279,7 @@ class AgentBase(ABC):
         return OpenAI(
             api_key=api_key,
             base_url=api_endpoint,
+            http_client=self.get_http_client(api_endpoint),
         )
 
     def read_file_content(self, file_path: str) -> str:
@@ -253,6 +313,14 @@ class WorkflowAgentBase(AgentBase, ABC):
     def get_workflow_builder(self, agent_id: str):
         pass
 
+    def get_workflow(self, agent_id: str):
+        return self.get_cached_workflow(
+            ("workflow",),
+            lambda: self.get_workflow_builder(agent_id).compile(
+                checkpointer=self.graph_persistence_factory.build_checkpoint_saver()
+            ),
+        )
+
     def get_config(self, agent_id: str) -> dict:
         return {
             "configurable": {
@@ -292,10 +360,7 @@ class WorkflowAgentBase(AgentBase, ABC):
     @langwatch.trace()
     def process_message(self, message_request: MessageRequest, schema: str) -> Message:
         agent_id = message_request.agent_id
-        checkpointer = self.graph_persistence_factory.build_checkpoint_saver()
-        workflow = self.get_workflow_builder(agent_id).compile(
-            checkpointer=checkpointer
-        )
+        workflow = self.get_workflow(agent_id)
 
         config = self.get_config(agent_id)
         self.logger.info(f"Agent[{agent_id}] -> Config -> {config}")
@@ -2,12 +2,20 @@ from datetime import datetime
 from pathlib import Path
 
 import langwatch
+from langchain_core.messages import SystemMessage
 from langgraph.prebuilt import create_react_agent
+from langgraph.prebuilt.chat_agent_executor import AgentState
 
 from app.interface.api.messages.schema import MessageRequest, Message
 from app.services.agent_types.base import AgentUtils, AgentBase
 
 
+class ReactRagAgentState(AgentState):
+    agent_id: str
+    schema: str
+    system_prompt: str
+
+
 class ReactRagAgent(AgentBase):
     def __init__(self, agent_utils: AgentUtils):
         super().__init__(agent_utils)
@@ -35,25 +43,20 @@ class ReactRagAgent(AgentBase):
             schema=schema,
         )
 
-    def get_workflow(self, agent_id: str, schema: str):
-        chat_model = self.get_chat_model(agent_id, schema)
-        settings = self.agent_setting_service.get_agent_settings(agent_id, schema)
-        settings_dict = {
-            setting.setting_key: setting.setting_value for setting in settings
-        }
-        checkpointer = self.graph_persistence_factory.build_checkpoint_saver()
-
-        template_vars = {
-            "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
-        }
-
-        return create_react_agent(
-            model=chat_model,
-            prompt=self.parse_prompt_template(
-                settings_dict, "execution_system_prompt", template_vars
+    def get_workflow(self):
+        """
+        The chat model and the system prompt are resolved from the state on each run, so one
+        compiled graph serves every ReactRag agent.
+        """
+        return self.get_cached_workflow(
+            ("workflow",),
+            lambda: create_react_agent(
+                model=lambda state, runtime: self.get_chat_model(state["agent_id"], state["schema"]),
+                prompt=lambda state: [SystemMessage(content=state["system_prompt"]), *state["messages"]],
+                tools=[],
+                state_schema=ReactRagAgentState,
+                checkpointer=self.graph_persistence_factory.build_checkpoint_saver(),
             ),
-            tools=[],
-            checkpointer=checkpointer,
         )
 
     def get_input_params(self, message_request: MessageRequest, schema: str) -> dict:
@@ -73,7 +76,15 @@ class ReactRagAgent(AgentBase):
             size=7,
         )
         context = "\n---\n".join(document.page_content for document in documents)
+        template_vars = {
+            "CURRENT_TIME": datetime.now().strftime("%a %b %d %Y %H:%M:%S %z"),
+        }
         return {
+            "agent_id": message_request.agent_id,
+            "schema": schema,
+            "system_prompt": self.parse_prompt_template(
+                settings_dict, "execution_system_prompt", template_vars
+            ),
             "messages": [
                 ("user", f"<query>{query}</query> <context>{context}</context>")
             ],
@@ -82,7 +93,7 @@ class ReactRagAgent(AgentBase):
     @langwatch.trace()
     def process_message(self, message_request: MessageRequest, schema: str) -> Message:
         agent_id = message_request.agent_id
-        workflow = self.get_workflow(agent_id, schema)
+        workflow = self.get_workflow()
         config = {
             "configurable": {
                 "thread_id": agent_id,
@@ -4,6 +4,7 @@ from app.domain.models import Agent
 from app.domain.repositories.agents import AgentRepository
 from app.services.agent_settings import AgentSettingService
 from app.services.language_models import LanguageModelService
+from app.services.model_client_cache import ModelClientCache
 
 
 class AgentService:
@@ -12,10 +13,16 @@ class AgentService:
         agent_repository: AgentRepository,
         agent_setting_service: AgentSettingService,
         language_model_service: LanguageModelService,
+        model_client_cache: ModelClientCache = None,
     ) -> None:
         self.agent_repository: AgentRepository = agent_repository
         self.agent_setting_service: AgentSettingService = agent_setting_service
         self.language_model_service: LanguageModelService = language_model_service
+        self.model_client_cache: ModelClientCache = model_client_cache
+
+    def invalidate_model_clients(self, schema: str) -> None:
+        if self.model_client_cache is not None:
+            self.model_client_cache.invalidate(schema)
 
     def get_agents(self, schema: str) -> Iterator[Agent]:
         return self.agent_repository.get_all(schema)
@@ -42,7 +49,8 @@ class AgentService:
         return agent
 
     def delete_agent_by_id(self, agent_id: str, schema: str) -> None:
-        return self.agent_repository.delete_by_id(agent_id, schema)
+        self.agent_repository.delete_by_id(agent_id, schema)
+        self.invalidate_model_clients(schema)
 
     def update_agent(
         self,
@@ -55,10 +63,12 @@ class AgentService:
         language_model = self.language_model_service.get_language_model_by_id(
             language_model_id, schema
         )
-        return self.agent_repository.update_agent(
+        agent = self.agent_repository.update_agent(
             agent_id=agent_id,
             agent_name=agent_name,
             language_model_id=language_model.id,
             agent_summary=agent_summary,
             schema=schema,
         )
+        self.invalidate_model_clients(schema)
+        return agent
@@ -18,6 +18,7 @@ from app.infrastructure.database.vectors import DocumentRepository
 from app.services.integrations import IntegrationService
 from app.services.language_model_settings import LanguageModelSettingService
 from app.services.language_models import LanguageModelService
+from app.services.vault_secrets_cache import VaultSecretsCache
 
 
 class AttachmentService:
@@ -29,6 +30,7 @@ class AttachmentService:
         language_model_setting_service: LanguageModelSettingService,
         integration_service: IntegrationService,
         vault_client: hvac.Client,
+        vault_secrets_cache: VaultSecretsCache = None,
     ) -> None:
         self.attachment_repository = attachment_repository
         self.document_repository = document_repository
@@ -36,6 +38,7 @@ class AttachmentService:
         self.language_model_setting_service = language_model_setting_service
         self.integration_service = integration_service
         self.vault_client = vault_client
+        self.vault_secrets_cache = vault_secrets_cache or VaultSecretsCache(vault_client, ttl=0)
 
 
     def get_attachment_by_id(self, attachment_id: str, schema: str) -> Attachment:
@@ -110,12 +113,12 @@ class AttachmentService:
         integration = self.integration_service.get_integration_by_id(
             language_model.integration_id, schema
         )
-        secrets = self.vault_client.secrets.kv.read_secret_version(
-            path=f"integration_{integration.id}", raise_on_deleted_version=False
+        secrets = self.vault_secrets_cache.read_secret(
+            self.integration_service.get_credentials_path(integration.id)
         )
 
-        api_endpoint = secrets["data"]["data"]["api_endpoint"]
-        api_key = secrets["data"]["data"]["api_key"]
+        api_endpoint = secrets["api_endpoint"]
+        api_key = secrets["api_key"]
 
         if integration.integration_type == "openai_api_v1":
             embeddings_model = OpenAIEmbeddings(
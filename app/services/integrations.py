@@ -2,11 +2,20 @@ from typing_extensions import Iterator
 
 from app.domain.models import Integration
 from app.domain.repositories.integrations import IntegrationRepository
+from app.services.model_client_cache import ModelClientCache
+from app.services.vault_secrets_cache import VaultSecretsCache
 
 
 class IntegrationService:
-    def __init__(self, integration_repository: IntegrationRepository) -> None:
+    def __init__(
+        self,
+        integration_repository: IntegrationRepository,
+        model_client_cache: ModelClientCache = None,
+        vault_secrets_cache: VaultSecretsCache = None,
+    ) -> None:
         self.repository: IntegrationRepository = integration_repository
+        self.model_client_cache: ModelClientCache = model_client_cache
+        self.vault_secrets_cache: VaultSecretsCache = vault_secrets_cache
 
     def get_integrations(self, schema: str) -> Iterator[Integration]:
         return self.repository.get_all(schema)
@@ -17,12 +26,26 @@ class IntegrationService:
     def create_integration(
         self, integration_type: str, api_endpoint: str, api_key: str, schema: str
     ) -> Integration:
-        return self.repository.add(
+        integration = self.repository.add(
             integration_type=integration_type,
             api_endpoint=api_endpoint,
             api_key=api_key,
             schema=schema,
         )
+        self.invalidate_credentials(integration.id)
+        return integration
 
     def delete_integration_by_id(self, integration_id: str, schema: str) -> None:
-        return self.repository.delete_by_id(integration_id, schema)
+        self.repository.delete_by_id(integration_id, schema)
+        self.invalidate_credentials(integration_id)
+        if self.model_client_cache is not None:
+            self.model_client_cache.invalidate(schema)
+
+    @staticmethod
+    def get_credentials_path(integration_id: str) -> str:
+        """Vault path of the api_endpoint and api_key written by IntegrationRepository.add."""
+        return f"integration_{integration_id}"
+
+    def invalidate_credentials(self, integration_id: str) -> None:
+        if self.vault_secrets_cache is not None:
+            self.vault_secrets_cache.invalidate(self.get_credentials_path(integration_id))
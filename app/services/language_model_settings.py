@@ -2,15 +2,19 @@ from typing_extensions import Iterator
 
 from app.domain.models import LanguageModelSetting
 from app.domain.repositories.language_models import LanguageModelSettingRepository
+from app.services.model_client_cache import ModelClientCache
 
 
 class LanguageModelSettingService:
     def __init__(
-        self, language_model_setting_repository: LanguageModelSettingRepository
+        self,
+        language_model_setting_repository: LanguageModelSettingRepository,
+        model_client_cache: ModelClientCache = None,
     ) -> None:
         self.repository: LanguageModelSettingRepository = (
             language_model_setting_repository
         )
+        self.model_client_cache: ModelClientCache = model_client_cache
 
     def get_language_model_settings(
         self, language_model_id: str, schema: str
@@ -30,9 +34,13 @@ class LanguageModelSettingService:
     def update_by_key(
         self, language_model_id: str, setting_key: str, setting_value: str, schema: str
     ) -> LanguageModelSetting:
-        return self.repository.update_by_key(
+        setting = self.repository.update_by_key(
             language_model_id=language_model_id,
             setting_key=setting_key,
             setting_value=setting_value,
             schema=schema,
         )
+        # the embeddings setting is read when embeddings clients are built
+        if self.model_client_cache is not None:
+            self.model_client_cache.invalidate(schema)
+        return setting
@@ -4,6 +4,7 @@ from app.domain.models import LanguageModel
 from app.domain.repositories.language_models import LanguageModelRepository
 from app.services.integrations import IntegrationService
 from app.services.language_model_settings import LanguageModelSettingService
+from app.services.model_client_cache import ModelClientCache
 
 
 class LanguageModelService:
@@ -12,10 +13,16 @@ class LanguageModelService:
         language_model_repository: LanguageModelRepository,
         language_model_setting_service: LanguageModelSettingService,
         integration_service: IntegrationService,
+        model_client_cache: ModelClientCache = None,
     ) -> None:
         self.repository: LanguageModelRepository = language_model_repository
         self.setting_service = language_model_setting_service
         self.integration_service = integration_service
+        self.model_client_cache: ModelClientCache = model_client_cache
+
+    def invalidate_model_clients(self, schema: str) -> None:
+        if self.model_client_cache is not None:
+            self.model_client_cache.invalidate(schema)
 
     def get_language_models(self, schema: str) -> Iterator[LanguageModel]:
         return self.repository.get_all(schema)
@@ -59,7 +66,8 @@ class LanguageModelService:
         return language_model
 
     def delete_language_model_by_id(self, language_model_id: str, schema: str) -> None:
-        return self.repository.delete_by_id(language_model_id, schema)
+        self.repository.delete_by_id(language_model_id, schema)
+        self.invalidate_model_clients(schema)
 
     def update_language_model(
         self,
@@ -71,9 +79,11 @@ class LanguageModelService:
         integration = self.integration_service.get_integration_by_id(
             integration_id, schema
         )
-        return self.repository.update_language_model(
+        language_model = self.repository.update_language_model(
             language_model_id=language_model_id,
             language_model_tag=language_model_tag,
             integration_id=integration.id,
             schema=schema,
         )
+        self.invalidate_model_clients(schema)
+        return language_model
@@ -0,0 +1,126 @@
+import asyncio
+import json
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from typing_extensions import Dict, Optional
+
+from app.domain.repositories.markets import BarsNotFoundError
+from app.infrastructure.database.prices import PriceCache
+from app.services.markets_ohlcv import OHLCV_FIELDS, MarketsOhlcvService
+from app.utils.backtesting_panel_utils import Panel, get_panel_indicators
+
+
+class MarketsIndicatorsCache:
+    """
+    In-process LRU of indicator results. Keys include the date of the last bar, so a result
+    is reused until the ingestion writes a newer bar and never needs to be invalidated.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.lock:
+            value = self.entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: dict) -> None:
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class MarketsIndicatorsService:
+
+    def __init__(self, ohlcv_service: MarketsOhlcvService, cache: Optional[MarketsIndicatorsCache] = None,
+                 price_cache: Optional[PriceCache] = None) -> None:
+        self.ohlcv_service = ohlcv_service
+        self.cache = cache
+        self.price_cache = price_cache
+
+    @staticmethod
+    def get_cache_key(index_name: str, key_ticker: str, last_date: str, start_date: Optional[str],
+                      end_date: Optional[str], indicators: Dict[str, dict]) -> str:
+        params = json.dumps(indicators, sort_keys=True, separators=(",", ":"))
+        return f"{index_name}:{key_ticker}:{last_date}:{start_date}:{end_date}:{params}"
+
+    @staticmethod
+    def compute_indicators(key_ticker: str, columns: Dict[str, list], indicators: Dict[str, dict]) -> dict:
+        """
+        Runs every requested indicator over one single-ticker Panel, the log returns are shared.
+        Each indicator reports its series, the dates where the position changes and the
+        compounded buy and hold (returns) and strategy growth, as summarize_backtest does.
+        """
+        panel = Panel(
+            dates=pd.DatetimeIndex(columns["date_reference"], name="date_reference"),
+            tickers=pd.Index([key_ticker]),
+            fields={field: np.array(columns[field], dtype=np.float64).reshape(-1, 1) for field in OHLCV_FIELDS},
+        )
+        results = get_panel_indicators(panel, indicators)
+
+        response = {}
+        for name, frames in results.items():
+            crossover = frames.pop("crossover", None)
+            values = {output: frame.iloc[:, 0].to_numpy() for output, frame in frames.items()}
+            summary = {output: None for output in ("returns", "strategy")}
+            for output in summary:
+                if output in values and not np.isnan(values[output]).all():
+                    summary[output] = float(np.exp(np.nansum(values[output])))
+
+            response[name] = {
+                "values": {output: series.tolist() for output, series in values.items()},
+                "crossovers": (
+                    [] if crossover is None else
+                    np.datetime_as_string(panel.dates.to_numpy()[crossover.iloc[:, 0].to_numpy()], unit="D").tolist()
+                ),
+                **summary,
+            }
+        return response
+
+    async def get_indicators(self, index_name: str, key_ticker: str, indicators: Dict[str, dict],
+                             start_date: Optional[str] = None, end_date: Optional[str] = None) -> dict:
+        """Indicators of a ticker over its bars between start_date and end_date."""
+        columns = None
+        if self.price_cache is not None:
+            # only the bars past the local watermark are searched, the history is memory mapped
+            await self.price_cache.refresh(index_name, [key_ticker])
+            columns = self.price_cache.load_columns(index_name, key_ticker, start_date, end_date)
+            last_date = columns["date_reference"][-1] if columns["date_reference"] else None
+        else:
+            last_date = await self.ohlcv_service.get_last_date(index_name, key_ticker, start_date, end_date)
+        if last_date is None:
+            raise BarsNotFoundError(f"{index_name}/{key_ticker}")
+
+        key = self.get_cache_key(index_name, key_ticker, last_date, start_date, end_date, indicators)
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        if columns is None:
+            columns = await self.ohlcv_service.get_ohlcv(index_name, key_ticker, start_date, end_date, OHLCV_FIELDS)
+        # the ewm recursions loop over the bars in Python, computed in a worker thread to keep the event loop free
+        computed = await asyncio.to_thread(self.compute_indicators, key_ticker, columns, indicators)
+        result = {
+            "key_ticker": key_ticker,
+            "date_reference": columns["date_reference"],
+            "indicators": computed,
+        }
+
+        if self.cache is not None:
+            self.cache.set(key, result)
+        return result
@@ -0,0 +1,87 @@
+import pyarrow as pa
+from elasticsearch import AsyncElasticsearch
+from typing_extensions import Dict, List, Optional
+
+OHLCV_FIELDS = ["val_open", "val_high", "val_low", "val_close", "val_volume"]
+
+
+class MarketsOhlcvService:
+
+    def __init__(self, es: AsyncElasticsearch, page_size: int = 10000) -> None:
+        self.es = es
+        self.page_size = page_size
+
+    def get_ohlcv_query(self, key_ticker: str, start_date: Optional[str], end_date: Optional[str],
+                        fields: List[str]) -> dict:
+        filters = [{"term": {"key_ticker": {"value": key_ticker}}}]
+
+        date_range = {}
+        if start_date is not None:
+            date_range["gte"] = start_date
+        if end_date is not None:
+            date_range["lte"] = end_date
+        if date_range:
+            filters.append({"range": {"date_reference": date_range}})
+
+        # doc values are already columnar, reading them skips loading and parsing every _source
+        return {
+            "size": self.page_size,
+            "query": {"bool": {"filter": filters}},
+            "sort": [{"date_reference": {"order": "asc"}}],
+            "_source": False,
+            "docvalue_fields": [{"field": "date_reference", "format": "yyyy-MM-dd"}] + fields,
+        }
+
+    async def get_last_date(self, index_name: str, key_ticker: str, start_date: Optional[str] = None,
+                            end_date: Optional[str] = None) -> Optional[str]:
+        """date_reference of the most recent bar in the range, None without bars."""
+        search_query = {
+            **self.get_ohlcv_query(key_ticker, start_date, end_date, []),
+            "size": 1,
+            "sort": [{"date_reference": {"order": "desc"}}],
+        }
+        response = await self.es.search(index=index_name, body=search_query, filter_path=["hits.hits.fields"])
+        hits = response.get("hits", {}).get("hits", [])
+        return hits[0]["fields"]["date_reference"][0] if hits else None
+
+    async def get_ohlcv(self, index_name: str, key_ticker: str, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict[str, list]:
+        """Bars of a ticker as columns, date_reference first then each requested field, ordered by date."""
+        fields = fields or OHLCV_FIELDS
+        columns = {"date_reference": [], **{field: [] for field in fields}}
+        search_query = self.get_ohlcv_query(key_ticker, start_date, end_date, fields)
+
+        while True:
+            response = await self.es.search(
+                index=index_name, body=search_query, filter_path=["hits.hits.fields", "hits.hits.sort"]
+            )
+            hits = response.get("hits", {}).get("hits", [])
+            for hit in hits:
+                values = hit["fields"]
+                date_reference = values["date_reference"][0]
+                # a ticker indexed under several indices repeats its bars, the duplicates are skipped
+                if columns["date_reference"] and columns["date_reference"][-1] == date_reference:
+                    continue
+                columns["date_reference"].append(date_reference)
+                for field in fields:
+                    columns[field].append(values[field][0] if field in values else None)
+
+            if len(hits) < self.page_size:
+                break
+            search_query["search_after"] = hits[-1]["sort"]
+
+        return columns
+
+    @staticmethod
+    def to_arrow_ipc(columns: Dict[str, list]) -> bytes:
+        """Serializes get_ohlcv columns as an Arrow IPC stream, date_reference as date32 and the fields as float64."""
+        dates = pa.array(columns["date_reference"], type=pa.string()).cast(pa.date32())
+        table = pa.table({
+            "date_reference": dates,
+            **{name: pa.array(values, type=pa.float64()) for name, values in columns.items() if name != "date_reference"},
+        })
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+        return sink.getvalue().to_pybytes()
@@ -1,103 +1,81 @@
-from typing_extensions import Optional
-from elasticsearch import Elasticsearch
+from typing_extensions import Dict, List, Optional
+from elasticsearch import AsyncElasticsearch, NotFoundError
+
+from app.services.markets_stats_cache import MarketsStatsCache
+from app.utils.markets_stats_utils import (
+    compute_stats_close,
+    compute_stats_close_latest,
+    get_latest_index_name,
+    get_stats_close_query,
+)
 
 class MarketsStatsService:
 
-    def __init__(self, es: Elasticsearch) -> None:
+    def __init__(self, es: AsyncElasticsearch, cache: Optional[MarketsStatsCache] = None) -> None:
         self.es = es
+        self.cache = cache
 
-    async def get_stats_close(self, index_name: str, key_ticker: str, close_date:Optional[str]) -> dict:
+    async def get_stats_close_latest(self, index_name: str, key_ticker: str) -> Optional[dict]:
+        """Latest stats read by _id from the pre-aggregated index, None when it has no document for the ticker."""
+        latest_index_name = get_latest_index_name(index_name)
+        if latest_index_name is None:
+            return None
+        try:
+            response = await self.es.get(index=latest_index_name, id=key_ticker)
+        except NotFoundError:
+            return None
+        return compute_stats_close_latest(response["_source"])
 
-        if close_date is not None:
-            filter_query = {
-                "bool": {
-                    "must": [
-                        {
-                            "term": {
-                                "key_ticker": {
-                                    "value": key_ticker
-                                }
-                            }
-                        },
-                        {
-                            "range": {
-                                "date_reference": {
-                                    "lte": close_date
-                                }
-                            }
-                        }
-                    ]
-                }
-            }
-        else:
-            filter_query = {
-                "term": {
-                    "key_ticker": {
-                        "value": key_ticker
-                    }
-                }
-            }
+    async def get_stats_close(self, index_name: str, key_ticker: str, close_date:Optional[str]) -> dict:
+        if self.cache is not None:
+            cached = await self.cache.get(index_name, key_ticker, close_date)
+            if cached is not None:
+                return cached
 
-        search_query = {
-            "size": 0,
-            "query": filter_query,
-            "aggs": {
-                "recent_stats": {
-                    "scripted_metric": {
-                        "init_script": "state.entries = new ArrayList();",
-                        "map_script": """
-                                if (doc.containsKey('val_close') && doc['val_close'].size() > 0 && doc['val_close'].value != null &&
-                                    doc.containsKey('date_reference') && doc['date_reference'].size() > 0) {
-                                    def entry = [
-                                        'date': doc['date_reference'].value.millis,
-                                        'close': doc['val_close'].value
-                                    ];
-                                    if (doc.containsKey('val_open') && doc['val_open'].size() > 0) {
-                                        entry['open'] = doc['val_open'].value;
-                                    }
-                                    if (doc.containsKey('val_high') && doc['val_high'].size() > 0) {
-                                        entry['high'] = doc['val_high'].value;
-                                    }
-                                    if (doc.containsKey('val_low') && doc['val_low'].size() > 0) {
-                                        entry['low'] = doc['val_low'].value;
-                                    }
-                                    if (doc.containsKey('val_volume') && doc['val_volume'].size() > 0) {
-                                        entry['volume'] = doc['val_volume'].value;
-                                    }
-                                    state.entries.add(entry);
-                                }
-                            """,
-                        "combine_script": "return state.entries;",
-                        "reduce_script": """
-                                def all = [];
-                                for (s in states) { if (s != null) all.addAll(s); }
-                                if (all.isEmpty()) return null;
+        result = await self.get_stats_close_latest(index_name, key_ticker) if close_date is None else None
+        if result is None:
+            search_query = get_stats_close_query(key_ticker, close_date)
+            response = await self.es.search(index=index_name, body=search_query)
+            result = compute_stats_close(response['hits']['hits'])
 
-                                all.sort((a,b) -> Long.compare(b.date, a.date));  // descending by date
+        if self.cache is not None and result is not None:
+            await self.cache.set(index_name, key_ticker, close_date, result)
+        return result
 
-                                if (all.size() < 2) return null;
+    async def get_stats_close_batch(self, index_name: str, key_tickers: List[str], close_date: Optional[str]) -> Dict[str, Optional[dict]]:
+        results = {key_ticker: None for key_ticker in key_tickers}
+        if self.cache is not None:
+            for key_ticker in results:
+                results[key_ticker] = await self.cache.get(index_name, key_ticker, close_date)
 
-                                def latest = all[0];
-                                def prev   = all[1].close;
-                                def variance = prev == 0 ? 0 : ((latest.close - prev) / prev) * 100;
+        missing = [key_ticker for key_ticker, result in results.items() if result is None]
+        latest_index_name = get_latest_index_name(index_name) if close_date is None else None
+        if missing and latest_index_name is not None:
+            try:
+                response = await self.es.mget(index=latest_index_name, ids=missing)
+            except NotFoundError:
+                response = {'docs': []}
+            for doc in response['docs']:
+                if doc.get('found'):
+                    result = compute_stats_close_latest(doc['_source'])
+                    results[doc['_id']] = result
+                    if self.cache is not None:
+                        await self.cache.set(index_name, doc['_id'], close_date, result)
+            missing = [key_ticker for key_ticker in missing if results[key_ticker] is None]
 
-                                def formatter = DateTimeFormatter.ofPattern('yyyy-MM-dd').withZone(ZoneId.of('UTC'));
-                                def date_str = formatter.format(Instant.ofEpochMilli(latest.date));
+        if not missing:
+            return results
 
-                                return [
-                                    'most_recent_open': latest.containsKey('open') ? latest.open : null,
-                                    'most_recent_high': latest.containsKey('high') ? latest.high : null,
-                                    'most_recent_low': latest.containsKey('low') ? latest.low : null,
-                                    'most_recent_close': latest.close,
-                                    'most_recent_volume': latest.containsKey('volume') ? latest.volume : null,
-                                    'most_recent_date' : date_str,
-                                    'percent_variance' : Math.round(variance * 100.0) / 100.0   // round to 2 decimals
-                                ];
-                            """
-                    }
-                }
-            }
-        }
+        # one msearch round-trip, the responses come back in the order of the searches
+        searches = []
+        for key_ticker in missing:
+            searches.append({})
+            searches.append(get_stats_close_query(key_ticker, close_date))
+        response = await self.es.msearch(index=index_name, body=searches)
 
-        response = self.es.search(index=index_name, body=search_query)
-        return response['aggregations']['recent_stats']['value']
+        for key_ticker, item in zip(missing, response['responses']):
+            result = compute_stats_close(item['hits']['hits']) if 'error' not in item else None
+            results[key_ticker] = result
+            if self.cache is not None and result is not None:
+                await self.cache.set(index_name, key_ticker, close_date, result)
+        return results
@@ -0,0 +1,123 @@
+import json
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import redis
+import redis.asyncio
+from typing_extensions import Optional
+
+from app.utils.markets_stats_utils import CACHE_PREFIX, get_volatile_key
+
+
+class MarketsStatsCache:
+    """
+    Two level cache for get_stats_close results keyed by (index, ticker, close_date).
+
+    Entries whose close_date is older than `settle_days` describe closed history and never
+    expire. Latest entries (no close_date or a recent one) expire after `latest_ttl` seconds
+    in Redis, where the ingestion also deletes them through invalidate_stats_close_cache.
+    The in-process LRU cannot be reached by the ingestion, so it keeps latest entries for
+    `local_latest_ttl` seconds only.
+    """
+
+    def __init__(
+            self,
+            redis_url: Optional[str] = None,
+            max_entries: int = 4096,
+            latest_ttl: int = 86400,
+            local_latest_ttl: int = 60,
+            settle_days: int = 5,
+            prefix: str = CACHE_PREFIX,
+    ):
+        self.redis_client = redis.asyncio.StrictRedis.from_url(redis_url) if redis_url else None
+        self.max_entries = max_entries
+        self.latest_ttl = latest_ttl
+        self.local_latest_ttl = local_latest_ttl
+        self.settle_days = settle_days
+        self.prefix = prefix
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+    def get_key(self, index_name: str, key_ticker: str, close_date: Optional[str]) -> str:
+        return f"{self.prefix}:{index_name}:{key_ticker}:{close_date or 'latest'}"
+
+    def is_historical(self, close_date: Optional[str]) -> bool:
+        if close_date is None:
+            return False
+        settled = datetime.now(timezone.utc).date() - timedelta(days=self.settle_days)
+        return close_date < settled.strftime("%Y-%m-%d")
+
+    async def get(self, index_name: str, key_ticker: str, close_date: Optional[str]) -> Optional[dict]:
+        key = self.get_key(index_name, key_ticker, close_date)
+
+        entry = self.entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self.entries[key]
+
+        value = None
+        if self.redis_client is not None:
+            try:
+                payload = await self.redis_client.get(key)
+                value = json.loads(payload) if payload is not None else None
+            except redis.RedisError as e:
+                self.logger.warning(f"MarketsStatsCache -> redis get failed: {e}")
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self._set_local(key, value, self.is_historical(close_date))
+        return value
+
+    async def set(self, index_name: str, key_ticker: str, close_date: Optional[str], value: dict) -> None:
+        key = self.get_key(index_name, key_ticker, close_date)
+        historical = self.is_historical(close_date)
+        self._set_local(key, value, historical)
+
+        if self.redis_client is None:
+            return
+        try:
+            if historical:
+                await self.redis_client.set(key, json.dumps(value))
+            else:
+                # the per ticker set lets the ingestion find every latest entry without a keyspace scan
+                volatile_key = get_volatile_key(key_ticker, self.prefix)
+                async with self.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.set(key, json.dumps(value), ex=self.latest_ttl)
+                    pipe.sadd(volatile_key, key)
+                    pipe.expire(volatile_key, self.latest_ttl)
+                    await pipe.execute()
+        except redis.RedisError as e:
+            self.logger.warning(f"MarketsStatsCache -> redis set failed: {e}")
+
+    async def invalidate(self, key_ticker: str) -> None:
+        """Drops the latest entries of a ticker from both levels."""
+        for key in [key for key in self.entries if key.rsplit(":", 2)[1] == key_ticker]:
+            if self.entries[key][0] is not None:
+                del self.entries[key]
+
+        if self.redis_client is None:
+            return
+        try:
+            volatile_key = get_volatile_key(key_ticker, self.prefix)
+            keys = await self.redis_client.smembers(volatile_key)
+            await self.redis_client.delete(*keys, volatile_key)
+        except redis.RedisError as e:
+            self.logger.warning(f"MarketsStatsCache -> redis invalidate failed: {e}")
+
+    def _set_local(self, key: str, value: dict, historical: bool) -> None:
+        expires_at = None if historical else time.monotonic() + self.local_latest_ttl
+        self.entries[key] = (expires_at, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
@@ -0,0 +1,206 @@
+import json
+import logging
+import threading
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import redis
+from typing_extensions import Optional
+
+from app.domain.repositories.message_jobs import MessageJobNotFoundError
+from app.interface.api.messages.schema import MessageRequest
+from app.services.agent_types.registry import AgentRegistry
+from app.services.agents import AgentService
+from app.services.messages import MessageService
+from app.services.tasks import TaskNotificationService, TaskProgress
+
+JOBS_PREFIX = "message_jobs"
+
+
+class MessageJobService:
+    """
+    Redis queue of messages posted in async mode. A job is a JSON document under
+    `{prefix}:job:{id}`, expiring after `job_ttl` seconds, and its id is pushed to the
+    `{prefix}:queue` list consumed by the MessageJobWorker processes. A dequeued id is moved
+    atomically to the `{prefix}:processing:{worker_id}` list of its worker and only removed
+    once the job is done, so the jobs of a worker killed mid-run are requeued when it restarts.
+    Every dequeue counts an attempt, a job still unfinished after `max_attempts` is marked failed
+    instead of being handed out again.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = JOBS_PREFIX, job_ttl: int = 86400, max_attempts: int = 3):
+        self.redis_client = redis.StrictRedis.from_url(redis_url)
+        self.prefix = prefix
+        self.job_ttl = job_ttl
+        self.max_attempts = max_attempts
+
+    def get_job_key(self, job_id: str) -> str:
+        return f"{self.prefix}:job:{job_id}"
+
+    def get_queue_key(self) -> str:
+        return f"{self.prefix}:queue"
+
+    def get_processing_key(self, worker_id: str) -> str:
+        return f"{self.prefix}:processing:{worker_id}"
+
+    def enqueue(self, message_request: MessageRequest, schema: str, human_message_id: str) -> dict:
+        job = {
+            "id": str(uuid4()),
+            "status": "queued",
+            "agent_id": message_request.agent_id,
+            "schema": schema,
+            "human_message_id": human_message_id,
+            "assistant_message_id": None,
+            "error": None,
+            "attempts": 0,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "message_request": message_request.model_dump(),
+        }
+        pipeline = self.redis_client.pipeline()
+        pipeline.set(self.get_job_key(job["id"]), json.dumps(job), ex=self.job_ttl)
+        pipeline.lpush(self.get_queue_key(), job["id"])
+        pipeline.execute()
+        return job
+
+    def get_job(self, job_id: str, schema: str) -> dict:
+        value = self.redis_client.get(self.get_job_key(job_id))
+        job = json.loads(value) if value is not None else None
+        # jobs of other users are reported as missing
+        if job is None or job["schema"] != schema:
+            raise MessageJobNotFoundError(job_id)
+        return job
+
+    def update_job(self, job: dict, **fields) -> dict:
+        job.update(fields)
+        self.redis_client.set(self.get_job_key(job["id"]), json.dumps(job), ex=self.job_ttl)
+        return job
+
+    def dequeue(self, worker_id: str, timeout: int = 5) -> Optional[dict]:
+        """
+        Next queued job, moved to the processing list of `worker_id` until acknowledged. None when
+        the queue stays empty for `timeout` seconds, or when the job expired, already finished or
+        ran out of attempts.
+        """
+        processing_key = self.get_processing_key(worker_id)
+        job_id = self.redis_client.blmove(self.get_queue_key(), processing_key, timeout, "RIGHT", "LEFT")
+        if job_id is None:
+            return None
+        value = self.redis_client.get(self.get_job_key(job_id.decode()))
+        job = json.loads(value) if value is not None else None
+
+        # a job requeued after its outcome was recorded only missed its acknowledgement
+        if job is None or job["status"] in ("completed", "failed"):
+            self.redis_client.lrem(processing_key, 0, job_id)
+            return None
+        if job.get("attempts", 0) >= self.max_attempts:
+            self.update_job(job, status="failed", error=f"Gave up after {job['attempts']} attempts")
+            self.redis_client.lrem(processing_key, 0, job_id)
+            return None
+        return self.update_job(job, attempts=job.get("attempts", 0) + 1)
+
+    def acknowledge(self, job_id: str, worker_id: str) -> None:
+        """Removes a finished job from the processing list of `worker_id`."""
+        self.redis_client.lrem(self.get_processing_key(worker_id), 0, job_id)
+
+    def requeue_stale(self, worker_id: str) -> int:
+        """
+        Moves the jobs left in the processing list of `worker_id` by a previous run back to the
+        consuming end of the queue, returns how many were requeued.
+        """
+        processing_key = self.get_processing_key(worker_id)
+        requeued = 0
+        while self.redis_client.lmove(processing_key, self.get_queue_key(), "RIGHT", "RIGHT") is not None:
+            requeued += 1
+        return requeued
+
+
+class MessageJobWorker:
+    """
+    Consumes the message jobs queue: runs the agent workflow, persists the assistant message as
+    a reply to the human message and records the outcome on the job. Workflows report their
+    progress through the TaskNotificationService as in the synchronous mode, a failed run is
+    published as a `failed` update. Each run thread has its own worker_id, stable across
+    restarts, and first requeues the jobs it was processing when its previous run was killed.
+    """
+
+    def __init__(
+        self,
+        message_job_service: MessageJobService,
+        agent_service: AgentService,
+        agent_registry: AgentRegistry,
+        message_service: MessageService,
+        task_notification_service: TaskNotificationService,
+    ):
+        self.message_job_service = message_job_service
+        self.agent_service = agent_service
+        self.agent_registry = agent_registry
+        self.message_service = message_service
+        self.task_notification_service = task_notification_service
+        self.stop_event = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def process_job(self, job: dict) -> dict:
+        schema = job["schema"]
+
+        try:
+            message_request = MessageRequest(**job["message_request"])
+            job = self.message_job_service.update_job(job, status="in_progress")
+
+            agent = self.agent_service.get_agent_by_id(message_request.agent_id, schema)
+            matching_agent = self.agent_registry.get_agent(agent.agent_type)
+            processed_message = matching_agent.process_message(message_request, schema)
+
+            human_message = self.message_service.get_message_by_id(job["human_message_id"], schema)
+            assistant_message = self.message_service.create_message(
+                message_role="assistant",
+                message_content=processed_message.message_content,
+                response_data=processed_message.response_data,
+                agent_id=processed_message.agent_id,
+                replies_to=human_message,
+                schema=schema,
+            )
+        except Exception as e:
+            self.logger.exception(f"MessageJobWorker -> job {job['id']} failed")
+            try:
+                self.task_notification_service.publish_update(
+                    task_progress=TaskProgress(
+                        agent_id=job["agent_id"],
+                        status="failed",
+                        message_content=str(e),
+                    )
+                )
+            except redis.RedisError as publish_error:
+                self.logger.warning(f"MessageJobWorker -> publish of job {job['id']} failed: {publish_error}")
+            return self.message_job_service.update_job(job, status="failed", error=str(e))
+
+        return self.message_job_service.update_job(
+            job, status="completed", assistant_message_id=assistant_message.id
+        )
+
+    def run(self, worker_id: str, poll_timeout: int = 5) -> None:
+        """Processes jobs until stop is called, the queue is polled every `poll_timeout` seconds."""
+        requeued = self.message_job_service.requeue_stale(worker_id)
+        if requeued:
+            self.logger.warning(f"MessageJobWorker -> {worker_id} requeued {requeued} stale jobs")
+
+        while not self.stop_event.is_set():
+            try:
+                job = self.message_job_service.dequeue(worker_id, timeout=poll_timeout)
+            except redis.RedisError as e:
+                self.logger.warning(f"MessageJobWorker -> dequeue failed: {e}")
+                self.stop_event.wait(poll_timeout)
+                continue
+            if job is None:
+                continue
+
+            # an outcome that could not be recorded or acknowledged leaves the job in the processing
+            # list, it is retried on the next start until it runs out of attempts
+            try:
+                self.process_job(job)
+                self.message_job_service.acknowledge(job["id"], worker_id)
+            except Exception as e:
+                self.logger.warning(f"MessageJobWorker -> job {job['id']} not acknowledged: {e}")
+                self.stop_event.wait(poll_timeout)
+
+    def stop(self) -> None:
+        self.stop_event.set()
@@ -0,0 +1,118 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import httpx
+import redis
+from typing_extensions import Any, Callable, Dict, Hashable, Optional, Tuple
+
+CACHE_PREFIX = "model_clients"
+
+
+class ModelClientCache:
+    """
+    Chat, embeddings and OpenAI clients built by AgentBase, keyed by (schema, agent_id, kind,
+    language_model_tag), so the agent, language model and integration lookups, the Vault read
+    and the client construction happen once instead of on every workflow node.
+
+    OpenAI compatible clients share one pooled httpx.Client per provider endpoint. Entries of
+    a schema are dropped by invalidate when one of its agents, language models or integrations
+    changes. Other processes see the change through a per schema generation counter in Redis,
+    read at most every `generation_ttl` seconds.
+    """
+
+    def __init__(
+            self,
+            redis_url: Optional[str] = None,
+            max_entries: int = 256,
+            generation_ttl: float = 5.0,
+            max_connections_per_endpoint: int = 32,
+            prefix: str = CACHE_PREFIX,
+    ):
+        self.redis_client = redis.StrictRedis.from_url(redis_url) if redis_url else None
+        self.max_entries = max_entries
+        self.generation_ttl = generation_ttl
+        self.max_connections_per_endpoint = max_connections_per_endpoint
+        self.prefix = prefix
+        self.entries = OrderedDict()
+        self.generations: Dict[str, Tuple[float, int]] = {}
+        self.http_clients: Dict[str, httpx.Client] = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.logger = logging.getLogger(__name__)
+
+    def get_generation_key(self, schema: str) -> str:
+        return f"{self.prefix}:generation:{schema}"
+
+    def get_or_create(self, schema: str, key: Hashable, factory: Callable[[], Any]) -> Any:
+        generation = self._get_generation(schema)
+        cache_key = (schema, key)
+
+        with self.lock:
+            entry = self.entries.get(cache_key)
+            if entry is not None and entry[0] == generation:
+                self.entries.move_to_end(cache_key)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # built outside the lock, a concurrent miss on the same key only builds a spare client
+        client = factory()
+        with self.lock:
+            self.entries[cache_key] = (generation, client)
+            self.entries.move_to_end(cache_key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return client
+
+    def invalidate(self, schema: str) -> None:
+        """Drops the clients of a schema here and, through the generation counter, in every other process."""
+        with self.lock:
+            for cache_key in [cache_key for cache_key in self.entries if cache_key[0] == schema]:
+                del self.entries[cache_key]
+            self.generations.pop(schema, None)
+
+        if self.redis_client is None:
+            return
+        try:
+            generation = self.redis_client.incr(self.get_generation_key(schema))
+            with self.lock:
+                self.generations[schema] = (time.monotonic() + self.generation_ttl, generation)
+        except redis.RedisError as e:
+            self.logger.warning(f"ModelClientCache -> redis invalidate failed: {e}")
+
+    def get_http_client(self, api_endpoint: str) -> httpx.Client:
+        """Keep-alive connection pool shared by every client of a provider endpoint."""
+        with self.lock:
+            http_client = self.http_clients.get(api_endpoint)
+            if http_client is None:
+                http_client = httpx.Client(
+                    limits=httpx.Limits(
+                        max_connections=self.max_connections_per_endpoint,
+                        max_keepalive_connections=self.max_connections_per_endpoint,
+                    ),
+                    timeout=httpx.Timeout(600.0, connect=10.0),
+                )
+                self.http_clients[api_endpoint] = http_client
+            return http_client
+
+    def _get_generation(self, schema: str) -> int:
+        if self.redis_client is None:
+            return 0
+
+        now = time.monotonic()
+        cached = self.generations.get(schema)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
+        try:
+            generation = int(self.redis_client.get(self.get_generation_key(schema)) or 0)
+        except redis.RedisError as e:
+            self.logger.warning(f"ModelClientCache -> redis get failed: {e}")
+            generation = cached[1] if cached is not None else 0
+
+        with self.lock:
+            self.generations[schema] = (now + self.generation_ttl, generation)
+        return generation
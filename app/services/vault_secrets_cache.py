@@ -0,0 +1,91 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import hvac
+from typing_extensions import Dict, Optional
+
+
+class VaultSecretsCache:
+    """
+    TTL and size bounded cache of the Vault KV secrets read through the vault_client singleton,
+    so resolving the credentials of an integration does not cost a Vault round trip per message.
+
+    Integration secrets are written once under a fresh id and never updated, the TTL only bounds
+    how long another process keeps serving the secret of a deleted integration. The process that
+    deletes it drops the entry right away through invalidate.
+    """
+
+    def __init__(self, vault_client: hvac.Client, ttl: float = 300.0, max_entries: int = 1024):
+        self.vault_client = vault_client
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.vault_reads = 0
+        self.vault_errors = 0
+        self.vault_seconds = 0.0
+        self.vault_max_seconds = 0.0
+        self.logger = logging.getLogger(__name__)
+
+    def read_secret(self, path: str) -> Dict[str, str]:
+        """Key/value data of the latest version of the secret at `path`."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry[0] > now:
+                self.entries.move_to_end(path)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        started = time.perf_counter()
+        try:
+            secrets = self.vault_client.secrets.kv.read_secret_version(
+                path=path, raise_on_deleted_version=False
+            )
+        except Exception as e:
+            with self.lock:
+                self.vault_errors += 1
+            self.logger.warning(f"VaultSecretsCache -> read of {path} failed: {e}")
+            raise
+        finally:
+            elapsed = time.perf_counter() - started
+            with self.lock:
+                self.vault_reads += 1
+                self.vault_seconds += elapsed
+                self.vault_max_seconds = max(self.vault_max_seconds, elapsed)
+
+        data = secrets["data"]["data"]
+        if self.ttl > 0:
+            with self.lock:
+                self.entries[path] = (time.monotonic() + self.ttl, data)
+                self.entries.move_to_end(path)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        return data
+
+    def invalidate(self, path: Optional[str] = None) -> None:
+        """Drops the secret at `path`, or every cached secret without a path."""
+        with self.lock:
+            if path is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(path, None)
+
+    def get_metrics(self) -> dict:
+        with self.lock:
+            requests = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / requests if requests else None,
+                "vault_reads": self.vault_reads,
+                "vault_errors": self.vault_errors,
+                "vault_latency_avg_ms": self.vault_seconds / self.vault_reads * 1000 if self.vault_reads else None,
+                "vault_latency_max_ms": self.vault_max_seconds * 1000,
+            }
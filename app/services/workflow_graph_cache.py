@@ -0,0 +1,30 @@
+import threading
+
+from typing_extensions import Any, Callable, Dict, Hashable
+
+
+class WorkflowGraphCache:
+    """
+    Compiled LangGraph workflows shared by every message of an agent class. The topology of a
+    workflow only depends on the agent type, agent_id, schema and the rendered prompts travel in
+    the workflow state and the thread_id in the config, so a graph is built and validated once
+    per process instead of on every message.
+    """
+
+    def __init__(self):
+        self.graphs: Dict[Hashable, Any] = {}
+        self.lock = threading.Lock()
+
+    def get_or_compile(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        graph = self.graphs.get(key)
+        if graph is not None:
+            return graph
+
+        # compiled outside the lock, a concurrent first message only compiles a spare graph
+        graph = factory()
+        with self.lock:
+            return self.graphs.setdefault(key, graph)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.graphs.clear()
@@ -0,0 +1,466 @@
+import numpy as np
+import pandas as pd
+from typing_extensions import Dict, Iterable, Optional
+
+from app.utils.backtesting_utils import (
+    get_periods_since_max,
+    get_periods_since_min,
+    get_rolling_max,
+    get_rolling_min,
+)
+
+PANEL_FIELDS = ("val_open", "val_high", "val_low", "val_close", "val_volume")
+
+
+class Panel:
+    """Dates x tickers matrices of EOD bars, one 2-D array per OHLCV field."""
+
+    def __init__(self, dates: pd.Index, tickers: pd.Index, fields: Dict[str, np.ndarray]):
+        self.dates = dates
+        self.tickers = tickers
+        self.fields = fields
+        self._returns = None
+
+    @classmethod
+    def from_long(
+            cls,
+            df: pd.DataFrame,
+            fields: Iterable[str] = PANEL_FIELDS,
+            index: str = "date_reference",
+            columns: str = "key_ticker"
+    ) -> "Panel":
+        if index not in df.columns:
+            df = df.reset_index()
+        fields = [field for field in fields if field in df.columns]
+        wide = df.pivot(index=index, columns=columns, values=fields).sort_index()
+        tickers = wide.columns.get_level_values(1).unique()
+        return cls(
+            dates=wide.index,
+            tickers=tickers,
+            fields={field: wide[field].reindex(columns=tickers).to_numpy(dtype=np.float64) for field in fields},
+        )
+
+    @classmethod
+    def from_wide(cls, df: pd.DataFrame, field: str = "val_close") -> "Panel":
+        df = df.sort_index()
+        return cls(dates=df.index, tickers=df.columns, fields={field: df.to_numpy(dtype=np.float64)})
+
+    def __getitem__(self, field: str) -> np.ndarray:
+        return self.fields[field]
+
+    @property
+    def returns(self) -> np.ndarray:
+        # log returns are shared by every strategy, compute them once per panel
+        if self._returns is None:
+            self._returns = np.log(self["val_close"] / shift(self["val_close"]))
+        return self._returns
+
+    def to_frame(self, values: np.ndarray) -> pd.DataFrame:
+        return pd.DataFrame(values, index=self.dates, columns=self.tickers, copy=False)
+
+
+def shift(values: np.ndarray, periods: int = 1) -> np.ndarray:
+    shifted = np.full_like(values, np.nan, dtype=np.float64)
+    if periods < len(values):
+        shifted[periods:] = values[:-periods]
+    return shifted
+
+
+def rolling_count(values: np.ndarray, window: int) -> np.ndarray:
+    valid = np.cumsum(~np.isnan(values), axis=0, dtype=np.int64)
+    count = valid.copy()
+    count[window:] -= valid[:-window]
+    return count
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    # running sums over the time axis, rows with NaN inside the window stay NaN like pandas min_periods=window
+    totals = np.cumsum(np.nan_to_num(values), axis=0)
+    sums = totals.copy()
+    sums[window:] -= totals[:-window]
+    return np.where(rolling_count(values, window) == window, sums / window, np.nan)
+
+
+def rolling_std(values: np.ndarray, window: int) -> np.ndarray:
+    # center each column before summing squares to avoid cancellation on price levels
+    centered = values - np.nanmean(values, axis=0)
+    mean = rolling_mean(centered, window)
+    mean_sq = rolling_mean(centered * centered, window)
+    variance = np.maximum(mean_sq - mean * mean, 0) * window / (window - 1)
+    return np.sqrt(variance)
+
+
+def ewm_mean(values: np.ndarray, alpha) -> np.ndarray:
+    # Same recursion as pandas ewm(adjust=False, ignore_na=False), vectorized across tickers,
+    # alpha may also be an array broadcast over the last axis to run several spans in one pass
+    result = np.empty(values.shape)
+    weighted = values[0].copy()
+    old_wt = np.ones(values.shape[1:])
+    result[0] = weighted
+    for i in range(1, len(values)):
+        current = values[i]
+        observed = ~np.isnan(current)
+        started = ~np.isnan(weighted)
+        old_wt = np.where(started, old_wt * (1 - alpha), old_wt)
+        update = started & observed
+        blended = (old_wt * weighted + alpha * current) / (old_wt + alpha)
+        weighted = np.where(update, blended, np.where(~started & observed, current, weighted))
+        old_wt = np.where(update, 1.0, old_wt)
+        result[i] = weighted
+    return result
+
+
+def ewm_span(values: np.ndarray, span: int) -> np.ndarray:
+    return ewm_mean(values, 2 / (span + 1))
+
+
+def ewm_com(values: np.ndarray, com: float) -> np.ndarray:
+    return ewm_mean(values, 1 / (1 + com))
+
+
+def _signal(condition: np.ndarray, true_value: float, false_value) -> np.ndarray:
+    return np.where(condition, true_value, false_value).astype(np.float64)
+
+
+def _not_nan(*arrays: np.ndarray) -> np.ndarray:
+    mask = np.ones(arrays[0].shape, dtype=bool)
+    for values in arrays:
+        mask &= ~np.isnan(values)
+    return mask
+
+
+def _finalize(
+        panel: Panel,
+        columns: Dict[str, np.ndarray],
+        valid: np.ndarray,
+        outputs: Optional[Iterable[str]],
+        with_returns: bool = True
+) -> Dict[str, pd.DataFrame]:
+    # strategy uses the raw previous position, then rows the single-ticker functions drop are masked out
+    if with_returns:
+        columns["returns"] = panel.returns
+        columns["strategy"] = shift(columns["position"]) * panel.returns
+        valid = valid & _not_nan(columns["returns"], columns["strategy"])
+
+    if "position" in columns:
+        position = np.where(valid, columns["position"], np.nan)
+        prev_position = shift(position)
+        columns["crossover"] = _not_nan(position, prev_position) & (position != prev_position)
+
+    if outputs is None:
+        outputs = columns.keys()
+
+    result = {}
+    for output in outputs:
+        if output not in columns:
+            raise ValueError(f"Unknown output '{output}', expected one of {list(columns)}")
+        values = columns[output]
+        if output != "crossover":
+            values = np.where(valid, values, np.nan)
+        result[output] = panel.to_frame(values)
+    return result
+
+
+def get_panel_sma(
+        panel: Panel,
+        short_window: int = 10,
+        long_window: int = 20,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    close = panel["val_close"]
+    sma_short = rolling_mean(close, short_window)
+    sma_long = rolling_mean(close, long_window)
+    columns = {
+        "sma_short": sma_short,
+        "sma_long": sma_long,
+        "position": _signal(sma_short > sma_long, 1, -1),
+    }
+    return _finalize(panel, columns, _not_nan(close, sma_short, sma_long), outputs)
+
+
+def get_panel_ema(
+        panel: Panel,
+        short_window: int = 10,
+        long_window: int = 20,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    close = panel["val_close"]
+    ema_short = ewm_span(close, short_window)
+    ema_long = ewm_span(close, long_window)
+    columns = {
+        "ema_short": ema_short,
+        "ema_long": ema_long,
+        "position": _signal(ema_short > ema_long, 1, -1),
+    }
+    return _finalize(panel, columns, _not_nan(close, ema_short, ema_long), outputs)
+
+
+def get_panel_stoch(
+        panel: Panel,
+        lookback: int = 10,
+        smooth_k: int = 10,
+        smooth_d: int = 10,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference https://www.fmlabs.com/reference/default.htm?url=StochasticOscillator.htm
+    close = panel["val_close"]
+    lowest_low = get_rolling_min(panel["val_low"], lookback)
+    highest_high = get_rolling_max(panel["val_high"], lookback)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        raw_k = 100 * (close - lowest_low) / (highest_high - lowest_low)
+    slow_k = rolling_mean(raw_k, smooth_k)
+    slow_d = rolling_mean(slow_k, smooth_d)
+    columns = {
+        "slow_k": slow_k,
+        "slow_d": slow_d,
+        "position": _signal(slow_k > slow_d, 1, -1),
+    }
+    return _finalize(panel, columns, _not_nan(close, slow_k, slow_d), outputs)
+
+
+def get_panel_rsi(
+        panel: Panel,
+        period: int = 7,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=RSI.htm
+    close = panel["val_close"]
+    delta = close - shift(close)
+    upavg = ewm_com(np.where(np.isnan(delta), np.nan, np.maximum(delta, 0)), period - 1)
+    dnavg = ewm_com(np.where(np.isnan(delta), np.nan, -np.minimum(delta, 0)), period - 1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = 100 - 100 / (1 + upavg / dnavg)
+    columns = {
+        "rsi": rsi,
+        "position": _signal(rsi < 30, 1, _signal(rsi > 70, -1, 1)),
+    }
+    return _finalize(panel, columns, _not_nan(close, rsi), outputs)
+
+
+def get_panel_adx(
+        panel: Panel,
+        period: int = 14,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=ADX.htm
+    high, low, close = panel["val_high"], panel["val_low"], panel["val_close"]
+    prev_high, prev_low, prev_close = shift(high), shift(low), shift(close)
+    has_prev = _not_nan(high, low, close, prev_high, prev_low, prev_close)
+
+    up_move = high - prev_high
+    down_move = prev_low - low
+    plus_dm = np.where(has_prev, np.where((up_move > down_move) & (up_move > 0), up_move, 0), np.nan)
+    minus_dm = np.where(has_prev, np.where((down_move > up_move) & (down_move > 0), down_move, 0), np.nan)
+    tr = np.where(has_prev, np.maximum(high - low, np.maximum(abs(high - prev_close), abs(low - prev_close))), np.nan)
+
+    # Smooth using Wilder's method (ewm equivalent)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tr_smooth = ewm_com(tr, period - 1)
+        plus_di = 100 * (ewm_com(plus_dm, period - 1) / tr_smooth)
+        minus_di = 100 * (ewm_com(minus_dm, period - 1) / tr_smooth)
+        dx = 100 * abs(plus_di - minus_di) / (plus_di + minus_di)
+    adx = ewm_com(dx, period - 1)
+
+    columns = {
+        "plus_dm": plus_dm,
+        "minus_dm": minus_dm,
+        "tr": tr,
+        "plus_di": plus_di,
+        "minus_di": minus_di,
+        "adx": adx,
+        "position": _signal(
+            (adx > 25) & (plus_di > minus_di), 1,
+            _signal((adx > 25) & (minus_di > plus_di), -1, 1)
+        ),
+    }
+    # get_adx computes returns after dropping the first bar, so its first kept bar has no return
+    returns = np.where(shift(has_prev.astype(np.float64)) == 1, panel.returns, np.nan)
+    columns["returns"] = returns
+    columns["strategy"] = shift(columns["position"]) * returns
+    return _finalize(panel, columns, has_prev, outputs, with_returns=False)
+
+
+def get_panel_cci(
+        panel: Panel,
+        period: int = 14,
+        constant: float = 0.015,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=CCI.htm
+    tp = (panel["val_high"] + panel["val_low"] + panel["val_close"]) / 3
+    atp = rolling_mean(tp, period)
+    md = rolling_mean(abs(tp - atp), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cci = (tp - atp) / (constant * md)
+    columns = {
+        "tp": tp,
+        "atp": atp,
+        "md": md,
+        "cci": cci,
+        "position": _signal(cci < -100, 1, _signal(cci > 100, -1, 1)),
+    }
+    return _finalize(panel, columns, _not_nan(tp, atp, md, cci), outputs)
+
+
+def get_panel_aroon(
+        panel: Panel,
+        period: int = 14,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference https://www.fmlabs.com/reference/default.htm?url=Aroon.htm
+    periods_since_hh = get_periods_since_max(panel["val_high"], period)
+    periods_since_ll = get_periods_since_min(panel["val_low"], period)
+    aroon_up = 100 * (period - periods_since_hh) / period
+    aroon_down = 100 * (period - periods_since_ll) / period
+    columns = {
+        "periods_since_hh": periods_since_hh,
+        "periods_since_ll": periods_since_ll,
+        "aroon_up": aroon_up,
+        "aroon_down": aroon_down,
+        "position": _signal(
+            (aroon_up > 70) & (aroon_down < 30), 1,
+            _signal((aroon_down > 70) & (aroon_up < 30), -1, 1)
+        ),
+    }
+    return _finalize(panel, columns, _not_nan(panel["val_close"], aroon_up, aroon_down), outputs)
+
+
+def get_panel_bbands(
+        panel: Panel,
+        period: int = 14,
+        std_dev: int = 2,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=Bollinger.htm
+    close = panel["val_close"]
+    tp = (panel["val_high"] + panel["val_low"] + close) / 3
+    middle_band = rolling_mean(tp, period)
+    sd = rolling_std(tp, period)
+    upper_band = middle_band + std_dev * sd
+    lower_band = middle_band - std_dev * sd
+    prev_close = shift(close)
+    prev_middle = shift(middle_band)
+
+    # Bullish: Price was below lower, now crosses above middle
+    # Bearish: Price was above upper, now crosses below middle
+    position = _signal(
+        (prev_close < lower_band) & (prev_close < prev_middle) & (close > middle_band), 1, 0
+    )
+    position = _signal(
+        (prev_close > upper_band) & (prev_close > prev_middle) & (close < middle_band), -1, position
+    )
+    columns = {
+        "tp": tp,
+        "middle_band": middle_band,
+        "sd": sd,
+        "upper_band": upper_band,
+        "lower_band": lower_band,
+        "band_width": ((upper_band - lower_band) / middle_band) * 100,
+        "position": position,
+    }
+    return _finalize(panel, columns, _not_nan(prev_close, prev_middle, sd), outputs, with_returns=False)
+
+
+def get_panel_ad(
+        panel: Panel,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=AccumDist.htm
+    high, low, close = panel["val_high"], panel["val_low"], panel["val_close"]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        clv = ((close - low) - (high - close)) / (high - low)
+    listed = _not_nan(close)
+    clv = np.where(listed & np.isnan(clv), 0, clv)
+    ad_line = np.nancumsum(clv * panel["val_volume"], axis=0)
+    ad_change = np.where(listed & (shift(listed.astype(np.float64)) == 1), ad_line - shift(ad_line), np.nan)
+    columns = {
+        "clv": clv,
+        "ad_line": ad_line,
+        "ad_change": ad_change,
+        "position": _signal(ad_change > 0, 1, _signal(ad_change < 0, -1, 0)),
+    }
+    return _finalize(panel, columns, _not_nan(clv, ad_change), outputs)
+
+
+def get_panel_obv(
+        panel: Panel,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference https://www.fmlabs.com/reference/default.htm?url=OBV.htm
+    close, volume = panel["val_close"], panel["val_volume"]
+    close_change = close - shift(close)
+    signed_volume = _signal(close_change > 0, volume, _signal(close_change < 0, -volume, 0))
+    obv = np.nancumsum(np.where(_not_nan(close), signed_volume, np.nan), axis=0)
+    obv_change = np.where(_not_nan(close_change), obv - shift(obv), np.nan)
+    columns = {
+        "obv": obv,
+        "obv_change": obv_change,
+        "position": _signal(obv_change > 0, 1, _signal(obv_change < 0, -1, 0)),
+    }
+    return _finalize(panel, columns, _not_nan(close_change, obv_change), outputs)
+
+
+def get_panel_macd(
+        panel: Panel,
+        short_period: int = 7,
+        long_period: int = 20,
+        signal_period: int = 6,
+        outputs: Optional[Iterable[str]] = None
+) -> Dict[str, pd.DataFrame]:
+    # Reference: https://www.fmlabs.com/reference/default.htm?url=MACD.htm
+    close = panel["val_close"]
+    macd = ewm_span(close, short_period) - ewm_span(close, long_period)
+    signal = ewm_span(macd, signal_period)
+    prev_macd, prev_signal = shift(macd), shift(signal)
+    columns = {
+        "macd": macd,
+        "signal": signal,
+        "histogram": macd - signal,
+        "position": _signal(
+            (prev_macd < prev_signal) & (macd > signal), 1,
+            _signal((prev_macd > prev_signal) & (macd < signal), -1, 1)
+        ),
+    }
+    return _finalize(panel, columns, _not_nan(macd, signal, prev_macd, prev_signal), outputs)
+
+
+PANEL_INDICATORS = {
+    "sma": get_panel_sma,
+    "ema": get_panel_ema,
+    "stoch": get_panel_stoch,
+    "rsi": get_panel_rsi,
+    "adx": get_panel_adx,
+    "cci": get_panel_cci,
+    "aroon": get_panel_aroon,
+    "bbands": get_panel_bbands,
+    "ad": get_panel_ad,
+    "obv": get_panel_obv,
+    "macd": get_panel_macd,
+}
+
+
+def get_panel_indicators(
+        data,
+        indicators: Dict[str, dict],
+        outputs: Optional[Dict[str, Iterable[str]]] = None
+) -> Dict[str, Dict[str, pd.DataFrame]]:
+    """Computes several indicators for every ticker of a long frame, wide close matrix or Panel."""
+    if isinstance(data, Panel):
+        panel = data
+    elif "key_ticker" in data.columns:
+        panel = Panel.from_long(data)
+    else:
+        panel = Panel.from_wide(data)
+
+    outputs = outputs or {}
+    return {
+        name: PANEL_INDICATORS[name](panel, **(params or {}), outputs=outputs.get(name))
+        for name, params in indicators.items()
+    }
+
+
+def stack_panel(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """Turns wide panel outputs back into a long frame keyed by date_reference and key_ticker."""
+    df = pd.concat({name: frame.stack() for name, frame in frames.items()}, axis=1)
+    df.index.names = ["date_reference", "key_ticker"]
+    return df.dropna(how="all")
@@ -0,0 +1,310 @@
+import json
+import math
+from abc import ABC, abstractmethod
+
+import pandas as pd
+from pydantic import BaseModel, Field
+from typing_extensions import Dict, List, Literal, Mapping, Optional
+
+Bar = Mapping[str, float]
+
+
+def _sign(value: Optional[float]) -> Optional[int]:
+    if value is None or math.isnan(value):
+        return None
+    return 1 if value > 0 else -1 if value < 0 else 0
+
+
+def _divide(numerator: Optional[float], denominator: Optional[float]) -> float:
+    if numerator is None or denominator is None or math.isnan(numerator) or math.isnan(denominator):
+        return math.nan
+    if denominator == 0:
+        return math.nan if numerator == 0 else math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class EwmState(BaseModel):
+    """Recursive mean with the same recursion as pandas ewm(adjust=False)."""
+
+    alpha: float
+    value: Optional[float] = None
+    old_wt: float = 1.0
+
+    def update(self, x: Optional[float]) -> Optional[float]:
+        observed = x is not None and not math.isnan(x)
+        if self.value is None:
+            if observed:
+                self.value = x
+            return self.value
+
+        self.old_wt *= 1 - self.alpha
+        if observed:
+            self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+            self.old_wt = 1.0
+        return self.value
+
+
+class RollingMeanState(BaseModel):
+    """
+    Running sum over a ring buffer holding the last `window` values. Missing values are kept
+    as None and make the mean None until they leave the window, like pandas rolling(window).
+    """
+
+    window: int
+    values: List[Optional[float]] = Field(default_factory=list)
+    head: int = 0
+    total: float = 0.0
+    missing: int = 0
+
+    def update(self, x: Optional[float]) -> Optional[float]:
+        x = None if x is None or math.isnan(x) else x
+        if len(self.values) < self.window:
+            self.values.append(x)
+        else:
+            self._remove(self.values[self.head])
+            self.values[self.head] = x
+            self.head = (self.head + 1) % self.window
+        if x is None:
+            self.missing += 1
+        else:
+            self.total += x
+        if len(self.values) < self.window or self.missing:
+            return None
+        return self.total / self.window
+
+    def _remove(self, x: Optional[float]) -> None:
+        if x is None:
+            self.missing -= 1
+        else:
+            self.total -= x
+
+
+class IndicatorState(BaseModel, ABC):
+    """Base for indicators that accept one OHLCV bar at a time."""
+
+    kind: str
+    bars: int = 0
+    last_date: Optional[str] = None
+
+    def update(self, bar: Bar) -> dict:
+        self.bars += 1
+        if bar.get("date_reference") is not None:
+            self.last_date = str(bar["date_reference"])[:10]
+        return {"date_reference": self.last_date, **self._update(bar)}
+
+    @abstractmethod
+    def _update(self, bar: Bar) -> dict:
+        pass
+
+    def seed(self, df: pd.DataFrame) -> dict:
+        """Replays a history frame sorted by date, returns the output of the last bar."""
+        result = {}
+        df = df.reset_index() if "date_reference" not in df.columns else df
+        for bar in df.to_dict(orient="records"):
+            result = self.update(bar)
+        return result
+
+
+class SmaState(IndicatorState):
+    kind: Literal["sma"] = "sma"
+    short: RollingMeanState
+    long: RollingMeanState
+
+    @classmethod
+    def create(cls, short_window: int = 10, long_window: int = 20) -> "SmaState":
+        return cls(short=RollingMeanState(window=short_window), long=RollingMeanState(window=long_window))
+
+    def _update(self, bar: Bar) -> dict:
+        sma_short = self.short.update(bar["val_close"])
+        sma_long = self.long.update(bar["val_close"])
+        position = None
+        if sma_short is not None and sma_long is not None:
+            position = 1 if sma_short > sma_long else -1
+        return {"sma_short": sma_short, "sma_long": sma_long, "position": position}
+
+
+class EmaState(IndicatorState):
+    kind: Literal["ema"] = "ema"
+    short: EwmState
+    long: EwmState
+
+    @classmethod
+    def create(cls, short_window: int = 10, long_window: int = 20) -> "EmaState":
+        return cls(short=EwmState(alpha=2 / (short_window + 1)), long=EwmState(alpha=2 / (long_window + 1)))
+
+    def _update(self, bar: Bar) -> dict:
+        # NaN closes before the first observed one leave both averages unseeded, like pandas ewm
+        ema_short = self.short.update(bar["val_close"])
+        ema_long = self.long.update(bar["val_close"])
+        position = None
+        if ema_short is not None and ema_long is not None:
+            position = 1 if ema_short > ema_long else -1
+        return {"ema_short": ema_short, "ema_long": ema_long, "position": position}
+
+
+class RsiState(IndicatorState):
+    kind: Literal["rsi"] = "rsi"
+    up: EwmState
+    dn: EwmState
+    prev_close: Optional[float] = None
+
+    @classmethod
+    def create(cls, period: int = 7) -> "RsiState":
+        return cls(up=EwmState(alpha=1 / period), dn=EwmState(alpha=1 / period))
+
+    def _update(self, bar: Bar) -> dict:
+        close = bar["val_close"]
+        if self.prev_close is None:
+            self.prev_close = close
+            return {"rsi": None, "position": None}
+
+        delta = close - self.prev_close
+        self.prev_close = close
+        upavg = self.up.update(max(delta, 0.0))
+        dnavg = self.dn.update(-min(delta, 0.0))
+        rsi = 100 - 100 / (1 + _divide(upavg, dnavg))
+        if math.isnan(rsi):
+            return {"rsi": None, "position": None}
+        return {"rsi": rsi, "position": -1 if rsi > 70 else 1}
+
+
+class AdxState(IndicatorState):
+    kind: Literal["adx"] = "adx"
+    plus_dm: EwmState
+    minus_dm: EwmState
+    tr: EwmState
+    dx: EwmState
+    prev_high: Optional[float] = None
+    prev_low: Optional[float] = None
+    prev_close: Optional[float] = None
+
+    @classmethod
+    def create(cls, period: int = 14) -> "AdxState":
+        alpha = 1 / period
+        return cls(
+            plus_dm=EwmState(alpha=alpha),
+            minus_dm=EwmState(alpha=alpha),
+            tr=EwmState(alpha=alpha),
+            dx=EwmState(alpha=alpha),
+        )
+
+    def _update(self, bar: Bar) -> dict:
+        high, low, close = bar["val_high"], bar["val_low"], bar["val_close"]
+        if self.prev_close is None:
+            self.prev_high, self.prev_low, self.prev_close = high, low, close
+            return {"plus_di": None, "minus_di": None, "adx": None, "position": None}
+
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_high, self.prev_low, self.prev_close = high, low, close
+
+        tr_smooth = self.tr.update(tr)
+        plus_di = 100 * _divide(self.plus_dm.update(up_move if up_move > down_move and up_move > 0 else 0.0), tr_smooth)
+        minus_di = 100 * _divide(
+            self.minus_dm.update(down_move if down_move > up_move and down_move > 0 else 0.0), tr_smooth
+        )
+        adx = self.dx.update(100 * _divide(abs(plus_di - minus_di), plus_di + minus_di))
+
+        position = 1
+        if adx is not None and adx > 25 and minus_di > plus_di:
+            position = -1
+        return {"plus_di": plus_di, "minus_di": minus_di, "adx": adx, "position": position}
+
+
+class MacdState(IndicatorState):
+    kind: Literal["macd"] = "macd"
+    short: EwmState
+    long: EwmState
+    signal: EwmState
+    prev_macd: Optional[float] = None
+    prev_signal: Optional[float] = None
+
+    @classmethod
+    def create(cls, short_period: int = 7, long_period: int = 20, signal_period: int = 6) -> "MacdState":
+        return cls(
+            short=EwmState(alpha=2 / (short_period + 1)),
+            long=EwmState(alpha=2 / (long_period + 1)),
+            signal=EwmState(alpha=2 / (signal_period + 1)),
+        )
+
+    def _update(self, bar: Bar) -> dict:
+        ema_short = self.short.update(bar["val_close"])
+        ema_long = self.long.update(bar["val_close"])
+        # both averages start on the first observed close, before it there is no MACD to smooth
+        if ema_short is None or ema_long is None:
+            return {"macd": None, "signal": None, "histogram": None, "position": None}
+
+        macd = ema_short - ema_long
+        signal = self.signal.update(macd)
+        position = None
+        if self.prev_macd is not None:
+            position = -1 if self.prev_macd > self.prev_signal and macd < signal else 1
+        self.prev_macd, self.prev_signal = macd, signal
+        return {"macd": macd, "signal": signal, "histogram": macd - signal, "position": position}
+
+
+class ObvState(IndicatorState):
+    kind: Literal["obv"] = "obv"
+    obv: float = 0.0
+    prev_close: Optional[float] = None
+
+    @classmethod
+    def create(cls) -> "ObvState":
+        return cls()
+
+    def _update(self, bar: Bar) -> dict:
+        close, volume = bar["val_close"], bar["val_volume"]
+        if self.prev_close is None:
+            self.prev_close = close
+            return {"obv": self.obv, "position": None}
+
+        # a missing close on either side counts as a flat day, as in get_obv
+        change = _sign(close - self.prev_close) or 0
+        self.prev_close = close
+        self.obv += change * volume
+        return {"obv": self.obv, "position": _sign(change * volume)}
+
+
+class AdState(IndicatorState):
+    kind: Literal["ad"] = "ad"
+    ad_line: float = 0.0
+
+    @classmethod
+    def create(cls) -> "AdState":
+        return cls()
+
+    def _update(self, bar: Bar) -> dict:
+        high, low, close, volume = bar["val_high"], bar["val_low"], bar["val_close"], bar["val_volume"]
+        clv = _divide((close - low) - (high - close), high - low)
+        contribution = 0.0 if math.isnan(clv) else clv * volume
+        self.ad_line += contribution
+        # the first bar has no previous A/D value to compare with
+        return {"ad_line": self.ad_line, "position": _sign(contribution) if self.bars > 1 else None}
+
+
+STREAMING_INDICATORS = {
+    "sma": SmaState,
+    "ema": EmaState,
+    "rsi": RsiState,
+    "adx": AdxState,
+    "macd": MacdState,
+    "obv": ObvState,
+    "ad": AdState,
+}
+
+
+def create_indicator_state(kind: str, params: Optional[dict] = None) -> IndicatorState:
+    return STREAMING_INDICATORS[kind].create(**(params or {}))
+
+
+def dump_indicator_states(states: Dict[str, IndicatorState]) -> str:
+    """Serializes indicator states (e.g. keyed by ticker) so they can be persisted between DAG runs."""
+    return json.dumps({key: state.model_dump(mode="json") for key, state in states.items()})
+
+
+def load_indicator_states(payload: str) -> Dict[str, IndicatorState]:
+    return {
+        key: STREAMING_INDICATORS[state["kind"]].model_validate(state)
+        for key, state in json.loads(payload).items()
+    }
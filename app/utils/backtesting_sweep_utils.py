@@ -0,0 +1,164 @@
+import numpy as np
+import pandas as pd
+from typing_extensions import Dict, Iterable
+
+from app.utils.backtesting_panel_utils import ewm_mean
+
+SWEEP_COLUMNS = ["short_window", "long_window", "returns", "strategy", "trades"]
+
+
+def get_log_returns(close: np.ndarray) -> np.ndarray:
+    returns = np.full(close.shape, np.nan)
+    returns[1:] = np.log(close[1:] / close[:-1])
+    return returns
+
+
+def get_rolling_means(close: np.ndarray, windows: Iterable[int]) -> Dict[int, np.ndarray]:
+    # one cumulative sum and valid count shared by every window, windows with a NaN stay NaN
+    # like rolling_mean instead of poisoning every later window
+    totals = np.concatenate([[0.0], np.cumsum(np.nan_to_num(close))])
+    valid = np.concatenate([[0], np.cumsum(~np.isnan(close), dtype=np.int64)])
+    means = {}
+    for window in sorted(set(windows)):
+        values = np.full(close.shape, np.nan)
+        if window <= len(close):
+            full = valid[window:] - valid[:-window] == window
+            values[window - 1:] = np.where(full, (totals[window:] - totals[:-window]) / window, np.nan)
+        means[window] = values
+    return means
+
+
+def get_ewm_means(close: np.ndarray, spans: Iterable[int]) -> Dict[int, np.ndarray]:
+    # every span is smoothed in the same recursive pass, one column per span
+    spans = sorted(set(spans))
+    if len(close) == 0:
+        return {span: np.empty(0) for span in spans}
+    alpha = 2 / (np.asarray(spans, dtype=np.float64) + 1)
+    values = ewm_mean(np.repeat(close[:, None], len(spans), axis=1), alpha)
+    return {span: values[:, i] for i, span in enumerate(spans)}
+
+
+def _suffix_sum(values: np.ndarray) -> np.ndarray:
+    # suffix[t] = values[t:].sum(axis=0), with a trailing row of zeros
+    suffix = np.zeros((len(values) + 1,) + values.shape[1:])
+    suffix[:-1] = np.cumsum(values[::-1], axis=0)[::-1]
+    return suffix
+
+
+def evaluate_crossover_grid(
+        returns: np.ndarray,
+        short_values: np.ndarray,
+        long_values: np.ndarray,
+        start: np.ndarray
+) -> (np.ndarray, np.ndarray, np.ndarray):
+    """
+    Evaluates every (short, long) pair at once. short_values is (n, S), long_values is (n, L)
+    and start holds, per pair, the first bar kept by the single-ticker strategy after dropna.
+    Returns buy and hold log returns, strategy log returns and crossover counts, each (S, L).
+    """
+    position = np.where(short_values[:, :, None] > long_values[:, None, :], 1, -1).astype(np.int8)
+    clean_returns = np.nan_to_num(returns)
+
+    # strategy[t] = position[t - 1] * returns[t], so row t - 1 of contributions belongs to bar t
+    contributions = position[:-1] * clean_returns[1:, None, None]
+    changes = (position[1:] != position[:-1]).astype(np.int32)
+
+    index = np.broadcast_to(start, position.shape[1:])[None]
+    strategy = np.take_along_axis(_suffix_sum(contributions), index - 1, axis=0)[0]
+    # the first kept bar has no previous position inside the kept rows, so it can't be a crossover
+    trades = np.take_along_axis(_suffix_sum(changes), np.minimum(index, len(changes)), axis=0)[0]
+    buy_and_hold = _suffix_sum(clean_returns)[np.broadcast_to(start, position.shape[1:])]
+    return buy_and_hold, strategy, trades
+
+
+def _ranked_results(
+        short_windows: np.ndarray,
+        long_windows: np.ndarray,
+        returns: np.ndarray,
+        strategy: np.ndarray,
+        trades: np.ndarray
+) -> pd.DataFrame:
+    short_grid, long_grid = np.meshgrid(short_windows, long_windows, indexing="ij")
+    keep = short_grid < long_grid
+    df_results = pd.DataFrame({
+        "short_window": short_grid[keep],
+        "long_window": long_grid[keep],
+        "returns": np.exp(returns[keep]),
+        "strategy": np.exp(strategy[keep]),
+        "trades": trades[keep].astype(np.int64),
+    })
+    return df_results.sort_values(by="strategy", ascending=False, ignore_index=True)
+
+
+def get_sma_sweep(
+        df: pd.DataFrame,
+        short_windows: Iterable[int] = range(5, 55),
+        long_windows: Iterable[int] = range(10, 260, 5)
+) -> pd.DataFrame:
+    """Grid search over get_sma windows, ranked by gross strategy return."""
+    close = df['val_close'].to_numpy(dtype=np.float64)
+    short_windows = np.asarray(sorted(set(short_windows)))
+    long_windows = np.asarray(sorted(set(long_windows)))
+
+    means = get_rolling_means(close, np.concatenate([short_windows, long_windows]))
+    short_values = np.column_stack([means[w] for w in short_windows])
+    long_values = np.column_stack([means[w] for w in long_windows])
+
+    # get_sma keeps bars where both averages and the log return exist
+    start = np.maximum(np.maximum.outer(short_windows, long_windows) - 1, 1)
+    start = np.minimum(start, len(close))
+    returns, strategy, trades = evaluate_crossover_grid(get_log_returns(close), short_values, long_values, start)
+    return _ranked_results(short_windows, long_windows, returns, strategy, trades)
+
+
+def get_ema_sweep(
+        df: pd.DataFrame,
+        short_windows: Iterable[int] = range(5, 55),
+        long_windows: Iterable[int] = range(10, 260, 5)
+) -> pd.DataFrame:
+    """Grid search over get_ema spans, ranked by gross strategy return."""
+    close = df['val_close'].to_numpy(dtype=np.float64)
+    short_windows = np.asarray(sorted(set(short_windows)))
+    long_windows = np.asarray(sorted(set(long_windows)))
+
+    means = get_ewm_means(close, np.concatenate([short_windows, long_windows]))
+    short_values = np.column_stack([means[w] for w in short_windows])
+    long_values = np.column_stack([means[w] for w in long_windows])
+
+    # EWM averages exist from the first bar, only the log return drops a row
+    start = np.full((len(short_windows), len(long_windows)), min(1, len(close)))
+    returns, strategy, trades = evaluate_crossover_grid(get_log_returns(close), short_values, long_values, start)
+    return _ranked_results(short_windows, long_windows, returns, strategy, trades)
+
+
+SWEEPS = {
+    "sma": get_sma_sweep,
+    "ema": get_ema_sweep,
+}
+
+
+def get_sweep(
+        df: pd.DataFrame,
+        strategy: str = "sma",
+        short_windows: Iterable[int] = range(5, 55),
+        long_windows: Iterable[int] = range(10, 260, 5),
+        top: int = None
+) -> pd.DataFrame:
+    """Runs a sweep for one ticker, or for each ticker of a frame keyed by key_ticker."""
+    sweep = SWEEPS[strategy]
+    if "key_ticker" not in df.columns:
+        df_results = sweep(df, short_windows, long_windows)
+        return df_results.head(top) if top else df_results
+
+    if "date_reference" in df.columns:
+        df = df.sort_values(by="date_reference")
+
+    results = []
+    for key_ticker, df_ticker in df.groupby("key_ticker", sort=False):
+        df_results = sweep(df_ticker, short_windows, long_windows)
+        df_results = df_results.head(top) if top else df_results
+        results.append(df_results.assign(key_ticker=key_ticker))
+
+    if not results:
+        return pd.DataFrame(columns=["key_ticker"] + SWEEP_COLUMNS)
+    return pd.concat(results, ignore_index=True)[["key_ticker"] + SWEEP_COLUMNS]
@@ -0,0 +1,134 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+import pandas as pd
+from typing_extensions import Callable, Dict, Iterator, Optional, Union
+
+from app.utils import backtesting_utils
+from app.utils.backtesting_panel_utils import PANEL_FIELDS
+
+STRATEGIES = {
+    "sma": backtesting_utils.get_sma,
+    "ema": backtesting_utils.get_ema,
+    "stoch": backtesting_utils.get_stoch,
+    "rsi": backtesting_utils.get_rsi,
+    "adx": backtesting_utils.get_adx,
+    "cci": backtesting_utils.get_cci,
+    "aroon": backtesting_utils.get_aroon,
+    "bbands": backtesting_utils.get_bbands,
+    "ad": backtesting_utils.get_ad,
+    "obv": backtesting_utils.get_obv,
+    "macd": backtesting_utils.get_macd,
+}
+
+# per worker process views on the shared price block, set once by the pool initializer
+_worker_state = {}
+
+
+def _attach_shared_prices(values_name: str, dates_name: str, rows: int) -> None:
+    values_shm = SharedMemory(name=values_name)
+    dates_shm = SharedMemory(name=dates_name)
+    _worker_state["shm"] = (values_shm, dates_shm)
+    _worker_state["values"] = np.ndarray((rows, len(PANEL_FIELDS)), dtype=np.float64, buffer=values_shm.buf)
+    _worker_state["dates"] = np.ndarray((rows,), dtype="datetime64[ns]", buffer=dates_shm.buf)
+
+
+def summarize_backtest(key_ticker: str, result) -> dict:
+    df_strategy, df_crossovers = result if isinstance(result, tuple) else (result, None)
+    summary = {
+        "key_ticker": key_ticker,
+        "bars": len(df_strategy),
+        "date_start": pd.Timestamp(df_strategy.index[0]).strftime('%Y-%m-%d') if len(df_strategy) else None,
+        "date_end": pd.Timestamp(df_strategy.index[-1]).strftime('%Y-%m-%d') if len(df_strategy) else None,
+        "position": float(df_strategy['position'].iloc[-1]) if len(df_strategy) else None,
+        "returns": None,
+        "strategy": None,
+        "trades": len(df_crossovers) if df_crossovers is not None else None,
+    }
+    if 'strategy' in df_strategy.columns:
+        totals = df_strategy[['returns', 'strategy']].sum().apply(np.exp)
+        summary["returns"] = float(totals['returns'])
+        summary["strategy"] = float(totals['strategy'])
+    return summary
+
+
+def _backtest_shared_ticker(strategy: Union[str, Callable], params: dict, key_ticker: str, start: int, stop: int):
+    # slicing the shared block is free, the strategy function makes its own copy anyway
+    df = pd.DataFrame(
+        _worker_state["values"][start:stop],
+        columns=list(PANEL_FIELDS),
+        index=pd.DatetimeIndex(_worker_state["dates"][start:stop], name="date_reference"),
+    )
+    strategy_function = STRATEGIES[strategy] if isinstance(strategy, str) else strategy
+    return summarize_backtest(key_ticker, strategy_function(df, **params))
+
+
+def _to_shared_memory(array: np.ndarray) -> SharedMemory:
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[:] = array
+    return shm
+
+
+def backtest_universe(
+        strategy: Union[str, Callable],
+        params: Optional[dict],
+        tickers: Union[pd.DataFrame, Dict[str, pd.DataFrame]],
+        workers: Optional[int] = None
+) -> Iterator[dict]:
+    """
+    Runs one backtesting_utils strategy for every ticker across a process pool.
+    tickers is a long frame keyed by key_ticker and date_reference, or a mapping of ticker to frame.
+    Prices travel to the workers through shared memory and summaries are yielded as they finish.
+    """
+    if isinstance(strategy, str) and strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy '{strategy}', expected one of {list(STRATEGIES)}")
+
+    if isinstance(tickers, pd.DataFrame):
+        df = tickers.reset_index() if "date_reference" not in tickers.columns else tickers
+        tickers = {key_ticker: group for key_ticker, group in df.groupby("key_ticker", sort=False)}
+
+    # pack every ticker into one contiguous block, each ticker owning a [start, stop) row range
+    ranges = {}
+    blocks, dates = [], []
+    offset = 0
+    for key_ticker, df in tickers.items():
+        df = df.set_index("date_reference") if "date_reference" in df.columns else df
+        df = df.sort_index()
+        blocks.append(df.reindex(columns=list(PANEL_FIELDS)).to_numpy(dtype=np.float64))
+        dates.append(pd.to_datetime(df.index).to_numpy(dtype="datetime64[ns]"))
+        ranges[key_ticker] = (offset, offset + len(df))
+        offset += len(df)
+
+    if not ranges:
+        return
+
+    values_shm = _to_shared_memory(np.concatenate(blocks))
+    dates_shm = _to_shared_memory(np.concatenate(dates))
+    del blocks, dates
+
+    try:
+        with ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                initializer=_attach_shared_prices,
+                initargs=(values_shm.name, dates_shm.name, offset),
+        ) as executor:
+            futures = {
+                executor.submit(_backtest_shared_ticker, strategy, params or {}, key_ticker, start, stop): key_ticker
+                for key_ticker, (start, stop) in ranges.items()
+            }
+            try:
+                for future in as_completed(futures):
+                    try:
+                        yield future.result()
+                    except Exception as e:
+                        yield {"key_ticker": futures[future], "error": str(e)}
+            finally:
+                for future in futures:
+                    future.cancel()
+    finally:
+        values_shm.close()
+        values_shm.unlink()
+        dates_shm.close()
+        dates_shm.unlink()
@@ -2,6 +2,74 @@ import numpy as np
 import pandas as pd
 
 
+def _rolling_extreme(
+        values,
+        window: int,
+        find_max: bool = True
+) -> (np.ndarray, np.ndarray):
+    # van Herk / Gil-Werman: split the series in blocks of `window` bars, every window spans at most two
+    # blocks, so its extreme is the best of a suffix scan of the left block and a prefix scan of the right
+    # one. O(n) regardless of the window, ties resolve to the oldest bar like np.argmax / np.argmin.
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    extreme = np.full(values.shape, np.nan)
+    periods_since = np.full(values.shape, np.nan)
+    if window < 1 or n < window:
+        return extreme, periods_since
+
+    missing = np.isnan(values)
+    work = np.where(missing, -np.inf, values if find_max else -values)
+    pad = (-n) % window
+    work = np.concatenate([work, np.full((pad,) + values.shape[1:], -np.inf)])
+    blocks = work.reshape((-1, window) + values.shape[1:])
+    position = np.arange(len(work)).reshape((-1, window) + (1,) * (values.ndim - 1))
+
+    prefix_max = np.maximum.accumulate(blocks, axis=1)
+    new_max = np.ones(blocks.shape, dtype=bool)
+    new_max[:, 1:] = blocks[:, 1:] > prefix_max[:, :-1]
+    prefix_idx = np.maximum.accumulate(np.where(new_max, position, 0), axis=1)
+
+    suffix_max = np.maximum.accumulate(blocks[:, ::-1], axis=1)[:, ::-1]
+    at_max = np.ones(blocks.shape, dtype=bool)
+    at_max[:, :-1] = blocks[:, :-1] >= suffix_max[:, 1:]
+    suffix_idx = np.minimum.accumulate(np.where(at_max, position, len(work))[:, ::-1], axis=1)[:, ::-1]
+
+    shape = (len(work),) + values.shape[1:]
+    prefix_max, prefix_idx = prefix_max.reshape(shape), prefix_idx.reshape(shape)
+    suffix_max, suffix_idx = suffix_max.reshape(shape), suffix_idx.reshape(shape)
+
+    end = np.arange(window - 1, n)
+    start = end - window + 1
+    take_left = suffix_max[start] >= prefix_max[end]
+    best = np.where(take_left, suffix_max[start], prefix_max[end])
+    best_idx = np.where(take_left, suffix_idx[start], prefix_idx[end])
+
+    # windows holding a NaN have no value, same as rolling(window) with the default min_periods
+    counts = np.cumsum(~missing, axis=0)
+    counts[window:] = counts[window:] - counts[:-window]
+    complete = counts[window - 1:] == window
+
+    extreme[window - 1:] = np.where(complete, best if find_max else -best, np.nan)
+    periods_since[window - 1:] = np.where(complete, end.reshape((-1,) + (1,) * (values.ndim - 1)) - best_idx, np.nan)
+    return extreme, periods_since
+
+
+def get_rolling_max(values, window: int) -> np.ndarray:
+    return _rolling_extreme(values, window, find_max=True)[0]
+
+
+def get_rolling_min(values, window: int) -> np.ndarray:
+    return _rolling_extreme(values, window, find_max=False)[0]
+
+
+def get_periods_since_max(values, window: int) -> np.ndarray:
+    return _rolling_extreme(values, window, find_max=True)[1]
+
+
+def get_periods_since_min(values, window: int) -> np.ndarray:
+    return _rolling_extreme(values, window, find_max=False)[1]
+
+
 def get_crossovers(
         df: pd.DataFrame
 ) -> pd.DataFrame:
@@ -50,8 +118,8 @@ def get_stoch(
 ) -> (pd.DataFrame, pd.DataFrame):
     # Reference https://www.fmlabs.com/reference/default.htm?url=StochasticOscillator.htm
     df_stoch = df.copy()
-    lowest_low = df_stoch['val_low'].rolling(window=lookback).min()
-    highest_high = df_stoch['val_high'].rolling(window=lookback).max()
+    lowest_low = pd.Series(get_rolling_min(df_stoch['val_low'], lookback), index=df_stoch.index)
+    highest_high = pd.Series(get_rolling_max(df_stoch['val_high'], lookback), index=df_stoch.index)
     raw_k = 100 * (df_stoch['val_close'] - lowest_low) / (highest_high - lowest_low)
     slow_k = raw_k.rolling(window=smooth_k).mean()
     slow_d = slow_k.rolling(window=smooth_d).mean()
@@ -176,13 +244,10 @@ def get_aroon(
     # Reference https://www.fmlabs.com/reference/default.htm?url=Aroon.htm
     df_aroon = df.copy()
     # Calculate Periods Since Highest High
-    df_aroon['periods_since_hh'] = df_aroon['val_high'].rolling(window=period).apply(
-        lambda x: len(x) - 1 - np.argmax(x), raw=True
-    )
+    df_aroon['periods_since_hh'] = get_periods_since_max(df_aroon['val_high'], period)
 
     # Calculate Periods Since Lowest Low
-    df_aroon['periods_since_ll'] = df_aroon['val_low'].rolling(window=period).apply(lambda x: len(x) - 1 - np.argmin(x),
-                                                                                    raw=True)
+    df_aroon['periods_since_ll'] = get_periods_since_min(df_aroon['val_low'], period)
     # Calculate Aroon Up and Aroon Down
     df_aroon['aroon_up'] = 100 * (period - df_aroon['periods_since_hh']) / period
     df_aroon['aroon_down'] = 100 * (period - df_aroon['periods_since_ll']) / period
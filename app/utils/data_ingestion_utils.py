@@ -1,383 +1,910 @@
+import hashlib
+import io
+import logging
 import os
+import random
+import tempfile
+import threading
+import time
 import requests
-import json
+import numpy as np
+import orjson
 import pandas as pd
-from datetime import datetime
-from requests import Response
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from requests.adapters import HTTPAdapter
+from typing_extensions import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.utils.markets_stats_utils import (
+    STOCKS_LATEST_BAR_FIELDS,
+    format_stocks_latest_doc,
+    get_stats_close_query,
+    invalidate_stats_close_cache,
+)
+
+# (document field, source column, cast) where cast is one of "str", "date", "float" or "int"
+BulkField = Tuple[str, str, str]
+
+
+def cast_bulk_column(values: pd.Series, cast: str) -> pd.Series:
+    """Casts a source column for the bulk encoder, missing or unparsable values become None."""
+    if cast == "float":
+        return pd.to_numeric(values, errors="coerce").astype(np.float64)
+
+    if cast == "int":
+        numeric = np.trunc(pd.to_numeric(values, errors="coerce").astype(np.float64))
+        return pd.Series(pd.array(numeric, dtype="Int64"), index=values.index).astype(object).where(numeric.notna(), None)
+
+    if cast == "date":
+        if pd.api.types.is_datetime64_any_dtype(values):
+            dates = values.to_numpy(dtype="datetime64[D]").astype(str)
+        else:
+            # ISO strings (e.g. 2024-01-02T05:00:00Z), the date part is the first 10 characters
+            dates = values.astype(str).str[:10].to_numpy()
+        return pd.Series(dates, index=values.index, dtype=object).where(values.notna(), None)
+
+    return values.astype(object).where(values.notna(), None)
+
+
+def cast_bulk_frame(df: pd.DataFrame, fields: List[BulkField], key_ticker: Optional[str] = None) -> pd.DataFrame:
+    """Builds the document columns from `fields`, a missing source column yields None values."""
+    columns = {} if key_ticker is None else {"key_ticker": pd.Series(key_ticker, index=df.index, dtype=object)}
+    for name, source, cast in fields:
+        values = df[source] if source in df.columns else pd.Series(None, index=df.index, dtype=object)
+        columns[name] = cast_bulk_column(values, cast)
+    return pd.DataFrame(columns, index=df.index)
+
+
+def encode_bulk(index_name: str, ids: List[str], docs: pd.DataFrame) -> bytes:
+    """Serializes index actions and documents as a bulk NDJSON body, NaN values are written as null."""
+    if docs.empty:
+        return b""
+
+    meta_prefix = b'{"index":{"_index":' + orjson.dumps(index_name) + b',"_id":'
+    names = list(docs.columns)
+    # tolist unboxes whole columns at once, much cheaper than boxing row by row with to_dict
+    columns = [docs[name].tolist() for name in names]
+    lines = []
+    for id_str, values in zip(ids, zip(*columns)):
+        lines.append(meta_prefix + orjson.dumps(id_str) + b"}}")
+        lines.append(orjson.dumps(dict(zip(names, values))))
+    lines.append(b"")
+
+    # join sizes the output once and copies every line into that single buffer
+    return b"\n".join(lines)
+
+
+def get_bulk_ids(key_tickers, suffixes: pd.Series) -> List[str]:
+    return (pd.Series(key_tickers, index=suffixes.index).astype(str) + "_" + suffixes.astype(str)).tolist()
+
+
+_bulk_session = None
+_bulk_session_lock = threading.Lock()
+
+
+def get_bulk_session(pool_maxsize=16) -> requests.Session:
+    """Process wide session of the bulk writers, its connection pool is reused across ingest_* calls."""
+    global _bulk_session
+    with _bulk_session_lock:
+        if _bulk_session is None:
+            _bulk_session = requests.Session()
+            _bulk_session.mount("http://", HTTPAdapter(pool_maxsize=pool_maxsize))
+            _bulk_session.mount("https://", HTTPAdapter(pool_maxsize=pool_maxsize))
+        return _bulk_session
+
+
+class BulkWriter:
+    """
+    Streams bulk NDJSON bodies to Elasticsearch. Bodies are re-chunked by byte and document
+    thresholds, up to max_in_flight chunks are sent concurrently and items rejected with 429
+    are retried alone with exponential backoff. A request without an answer within `timeout`
+    (connect, read seconds) is retried like a 5xx. write returns a summary of the counts.
+    """
+
+    def __init__(self, es_url: Optional[str] = None, es_api_key: Optional[str] = None, max_bytes=5 * 1024 * 1024,
+                 max_docs=5000, max_in_flight=4, max_retries=5, backoff_seconds=1.0,
+                 session: Optional[requests.Session] = None, timeout=(10.0, 120.0)):
+        self.es_url = es_url or os.environ.get('ELASTICSEARCH_URL')
+        self.max_bytes = max_bytes
+        self.max_docs = max_docs
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.backoff_seconds = backoff_seconds
+        self.session = session or get_bulk_session()
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        # headers go with every request, the session may be shared with other writers
+        self.headers = {
+            'Authorization': f"ApiKey {es_api_key or os.environ.get('ELASTICSEARCH_API_KEY')}",
+            'Content-Type': 'application/x-ndjson'
+        }
+
+    def write(self, bodies: Iterable[bytes]) -> Dict[str, int]:
+        summary = {"indexed": 0, "failed": 0, "retried": 0, "requests": 0}
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            in_flight = set()
+            for chunk in self._chunks(bodies):
+                # bounded submission, the generator is only consumed as chunks complete
+                if len(in_flight) >= self.max_in_flight:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._merge(summary, done)
+                in_flight.add(executor.submit(self._send, chunk))
+            self._merge(summary, in_flight)
+
+        summary["errors"] = summary["failed"] > 0
+        return summary
+
+    def _chunks(self, bodies: Iterable[bytes]) -> Iterator[List[bytes]]:
+        chunk, size = [], 0
+        for body in bodies:
+            # orjson escapes newlines inside strings, every raw newline ends an action or a source line,
+            # blank lines left by joined bodies are dropped before pairing them
+            lines = [line for line in body.split(b"\n") if line]
+            for i in range(0, len(lines) - 1, 2):
+                pair = lines[i] + b"\n" + lines[i + 1] + b"\n"
+                if chunk and (size + len(pair) > self.max_bytes or len(chunk) >= self.max_docs):
+                    yield chunk
+                    chunk, size = [], 0
+                chunk.append(pair)
+                size += len(pair)
+        if chunk:
+            yield chunk
+
+    def _send(self, chunk: List[bytes]) -> Dict[str, int]:
+        counts = {"indexed": 0, "failed": 0, "retried": 0, "requests": 0}
+        pending = chunk
+        for attempt in range(self.max_retries + 1):
+            counts["requests"] += 1
+            try:
+                response = self.session.post(
+                    url=f"{self.es_url}/_bulk", data=b"".join(pending), headers=self.headers, timeout=self.timeout
+                )
+            except requests.RequestException as e:
+                self.logger.warning(f"BulkWriter -> bulk request error: {e}")
+                response = None
+
+            if response is None or response.status_code == 429 or response.status_code >= 500:
+                rejected = pending
+            elif not response.ok:
+                self.logger.warning(f"BulkWriter -> bulk request failed {response.status_code}: {response.text[:500]}")
+                counts["failed"] += len(pending)
+                return counts
+            else:
+                rejected = []
+                for pair, item in zip(pending, response.json()['items']):
+                    result = next(iter(item.values()))
+                    if result.get('status', 500) < 300:
+                        counts["indexed"] += 1
+                    elif result['status'] == 429:
+                        rejected.append(pair)
+                    else:
+                        self.logger.warning(f"BulkWriter -> {result.get('_id')} failed: {result.get('error')}")
+                        counts["failed"] += 1
+
+            if not rejected:
+                return counts
+            if attempt == self.max_retries:
+                break
+            counts["retried"] += len(rejected)
+            pending = rejected
+            time.sleep(self.backoff_seconds * 2 ** attempt * (1 + random.random()))
+
+        counts["failed"] += len(rejected)
+        return counts
+
+    @staticmethod
+    def _merge(summary: Dict[str, int], futures) -> None:
+        for future in futures:
+            for key, value in future.result().items():
+                summary[key] += value
+
+
+class BulkManifest:
+    """
+    Content hashes of the documents last indexed, one JSON file of _id -> hash per index and
+    ticker under `directory`. The encoder output is deterministic, so hashing the source line
+    of a bulk body is enough to tell an unchanged document from a new or changed one.
+
+    The directory (INGESTION_MANIFEST_DIR) must outlive the workers, on storage wiped between
+    runs every document counts as changed again.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or os.environ.get('INGESTION_MANIFEST_DIR')
+        if not self.directory:
+            raise ValueError("BulkManifest -> INGESTION_MANIFEST_DIR is not set, a persistent directory is required")
+
+    def get_path(self, index_name: str, key_ticker: str) -> str:
+        return os.path.join(self.directory, index_name, f"{key_ticker}.json")
+
+    def load(self, index_name: str, key_ticker: str) -> Dict[str, str]:
+        path = self.get_path(index_name, key_ticker)
+        if not os.path.exists(path):
+            return {}
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    def save(self, index_name: str, key_ticker: str, hashes: Dict[str, str]) -> None:
+        path = self.get_path(index_name, key_ticker)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(orjson.dumps(hashes))
+        os.replace(f"{path}.tmp", path)
+
+    def select_changed(self, key_ticker: str, body: bytes) -> Tuple[bytes, Dict[str, Dict[str, str]]]:
+        """Drops the documents whose hash matches the manifest, returns the rest of the body and every hash by index."""
+        lines = [line for line in body.split(b"\n") if line]
+        manifests, hashes, changed = {}, {}, []
+        for i in range(0, len(lines) - 1, 2):
+            action = orjson.loads(lines[i])["index"]
+            index_name = action["_index"]
+            if index_name not in manifests:
+                manifests[index_name] = self.load(index_name, key_ticker)
+                hashes[index_name] = {}
+
+            digest = hashlib.blake2b(lines[i + 1], digest_size=16).hexdigest()
+            hashes[index_name][action["_id"]] = digest
+            if manifests[index_name].get(action["_id"]) != digest:
+                changed.append(lines[i] + b"\n" + lines[i + 1] + b"\n")
+        return b"".join(changed), hashes
+
+
+def write_changed_bulk(key_ticker: str, body: bytes, manifest: Optional[BulkManifest] = None,
+                       skip_unchanged=True) -> Dict[str, int]:
+    """
+    Sends only the documents of `body` that are new or changed since the last write of the
+    ticker. The manifest is updated only when no document failed, so a partly failed run
+    sends the same documents again. With skip_unchanged=False the whole body is sent and
+    the manifest rebuilt, e.g. after an index was recreated. The summary adds "skipped".
+    Without a manifest nor INGESTION_MANIFEST_DIR the whole body is sent.
+    """
+    if manifest is None:
+        if not os.environ.get('INGESTION_MANIFEST_DIR'):
+            logging.getLogger(__name__).warning(
+                "write_changed_bulk -> INGESTION_MANIFEST_DIR is not set, unchanged documents are not skipped"
+            )
+            summary = BulkWriter().write([body])
+            summary["skipped"] = 0
+            return summary
+        manifest = BulkManifest()
+
+    changed, hashes = manifest.select_changed(key_ticker, body)
+    if not skip_unchanged:
+        changed = body
+
+    summary = BulkWriter().write([changed])
+    summary["skipped"] = sum(map(len, hashes.values())) - changed.count(b"\n") // 2
+    if not summary["failed"]:
+        for index_name, index_hashes in hashes.items():
+            manifest.save(index_name, key_ticker, index_hashes)
+    return summary
+
+
+class TokenBucket:
+    """
+    Thread safe token bucket refilled with `rate` tokens per `period` seconds. A caller that
+    finds the bucket empty reserves the next token and sleeps until it is due, so concurrent
+    callers are served in order at exactly the configured rate.
+    """
+
+    def __init__(self, rate: float, period: float = 60.0, capacity: float = 1.0):
+        self.rate = rate / period
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+            self.updated_at = now
+            self.tokens -= 1
+            wait_seconds = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        time.sleep(wait_seconds)
+
+    def pause(self, seconds: float) -> None:
+        """Holds every caller back for at least `seconds`, e.g. once the provider reports its quota exhausted."""
+        with self.lock:
+            self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+class AlphaVantageClient:
+    """
+    Shared AlphaVantage client: one keep-alive session, a token bucket sized to the plan quota
+    and an on-disk cache of the responses keyed by (function, symbol, date), so re-running an
+    ingestion on the same day costs no API call. Quota notes, which AlphaVantage answers with
+    a 200, are never cached and are retried once the bucket is paused for `retry_seconds`.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None,
+                 requests_per_minute: Optional[int] = None, url="https://www.alphavantage.co/query",
+                 session: Optional[requests.Session] = None, max_retries=3, retry_seconds=60.0, pool_maxsize=16):
+        self.api_key = api_key or os.environ.get('ALPHAVANTAGE_API_KEY')
+        self.cache_dir = cache_dir or os.environ.get(
+            'ALPHAVANTAGE_CACHE_DIR', os.path.join(tempfile.gettempdir(), "alphavantage")
+        )
+        self.bucket = TokenBucket(requests_per_minute or int(os.environ.get('ALPHAVANTAGE_REQUESTS_PER_MINUTE', '75')))
+        self.url = url
+        self.max_retries = max_retries
+        self.retry_seconds = retry_seconds
+        self.calls = 0
+        self.cache_hits = 0
+        self.counts_lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_maxsize=pool_maxsize))
+            session.mount("https://", HTTPAdapter(pool_maxsize=pool_maxsize))
+        self.session = session
+
+    def get_path(self, function: str, symbol: str, date: str, datatype="json") -> str:
+        return os.path.join(self.cache_dir, date, function, f"{symbol}.{datatype}")
+
+    def query(self, function: str, symbol: str, datatype="json"):
+        """Response of a function for a symbol, the parsed JSON payload or the CSV text with datatype="csv"."""
+        path = self.get_path(function, symbol, datetime.now().strftime('%Y-%m-%d'), datatype)
+
+        if os.path.exists(path):
+            with self.counts_lock:
+                self.cache_hits += 1
+            with open(path, "rb") as f:
+                content = f.read()
+        else:
+            content = self._fetch(function, symbol, datatype)
+            # write then rename so a concurrent run never reads a partial response
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(f"{path}.{threading.get_ident()}.tmp", "wb") as f:
+                f.write(content)
+            os.replace(f"{path}.{threading.get_ident()}.tmp", path)
+
+        return orjson.loads(content) if datatype == "json" else content.decode("utf-8")
+
+    def _fetch(self, function: str, symbol: str, datatype: str) -> bytes:
+        params = {"function": function, "symbol": symbol, "apikey": self.api_key, "datatype": datatype}
+        message = None
+        for attempt in range(self.max_retries + 1):
+            self.bucket.acquire()
+            with self.counts_lock:
+                self.calls += 1
+            response = self.session.get(self.url, params=params, timeout=60)
+            response.raise_for_status()
+
+            # errors and quota notes come back as a 200 JSON object, even for datatype=csv
+            payload = orjson.loads(response.content) if response.content.lstrip().startswith(b"{") else None
+            if not isinstance(payload, dict):
+                return response.content
+            if "Error Message" in payload:
+                raise ValueError(f"AlphaVantage {function} {symbol}: {payload['Error Message']}")
+            message = payload.get("Note") or payload.get("Information")
+            if message is None:
+                return response.content
+
+            self.logger.warning(f"AlphaVantageClient -> quota reached on {function} {symbol}, attempt {attempt + 1}: {message}")
+            self.bucket.pause(self.retry_seconds)
+
+        raise RuntimeError(f"AlphaVantage {function} {symbol}: {message}")
+
+
+_alpha_vantage_client = None
+_alpha_vantage_client_lock = threading.Lock()
+
+
+def get_alpha_vantage_client() -> AlphaVantageClient:
+    """Process wide client, every ingester shares its session, token bucket and cache."""
+    global _alpha_vantage_client
+    with _alpha_vantage_client_lock:
+        if _alpha_vantage_client is None:
+            _alpha_vantage_client = AlphaVantageClient()
+        return _alpha_vantage_client
+
+
+STOCKS_EOD_FIELDS = {
+    "alpaca": [
+        ("date_reference", "t", "date"),
+        ("val_open", "o", "float"),
+        ("val_close", "c", "float"),
+        ("val_high", "h", "float"),
+        ("val_low", "l", "float"),
+        ("val_volume", "v", "int"),
+    ],
+    "alphavantage": [
+        ("date_reference", "timestamp", "date"),
+        ("val_open", "open", "float"),
+        ("val_close", "close", "float"),
+        ("val_high", "high", "float"),
+        ("val_low", "low", "float"),
+        ("val_volume", "volume", "int"),
+    ],
+}
+
+STOCKS_INSIDER_TRADES_FIELDS = [
+    ("date_reference", "transaction_date", "date"),
+    ("text_executive_name", "executive", "str"),
+    ("text_executive_title", "executive_title", "str"),
+    ("key_acquisition_disposal", "acquisition_or_disposal", "str"),
+    ("val_share_quantity", "shares", "float"),
+    ("val_share_price", "share_price", "float"),
+]
+
+STOCKS_METADATA_FIELDS = [
+    ("Symbol", "Symbol", "str"),
+    ("asset_type", "AssetType", "str"),
+    ("name", "Name", "str"),
+    ("description", "Description", "str"),
+    ("cik", "CIK", "str"),
+    ("exchange", "Exchange", "str"),
+    ("currency", "Currency", "str"),
+    ("country", "Country", "str"),
+    ("sector", "Sector", "str"),
+    ("industry", "Industry", "str"),
+    ("address", "Address", "str"),
+    ("official_site", "OfficialSite", "str"),
+    ("fiscal_year_end", "FiscalYearEnd", "str"),
+    ("latest_quarter", "LatestQuarter", "str"),
+    ("market_capitalization", "MarketCapitalization", "int"),
+    ("ebitda", "EBITDA", "int"),
+    ("pe_ratio", "PERatio", "float"),
+    ("peg_ratio", "PEGRatio", "float"),
+    ("book_value", "BookValue", "float"),
+    ("dividend_per_share", "DividendPerShare", "float"),
+    ("dividend_yield", "DividendYield", "float"),
+    ("eps", "EPS", "float"),
+    ("revenue_per_share_ttm", "RevenuePerShareTTM", "float"),
+    ("profit_margin", "ProfitMargin", "float"),
+    ("operating_margin_ttm", "OperatingMarginTTM", "float"),
+    ("return_on_assets_ttm", "ReturnOnAssetsTTM", "float"),
+    ("return_on_equity_ttm", "ReturnOnEquityTTM", "float"),
+    ("revenue_ttm", "RevenueTTM", "int"),
+    ("gross_profit_ttm", "GrossProfitTTM", "int"),
+    ("diluted_eps_ttm", "DilutedEPSTTM", "float"),
+    ("quarterly_earnings_growth_yoy", "QuarterlyEarningsGrowthYOY", "float"),
+    ("quarterly_revenue_growth_yoy", "QuarterlyRevenueGrowthYOY", "float"),
+    ("analyst_target_price", "AnalystTargetPrice", "float"),
+    ("analyst_rating_strong_buy", "AnalystRatingStrongBuy", "int"),
+    ("analyst_rating_buy", "AnalystRatingBuy", "int"),
+    ("analyst_rating_hold", "AnalystRatingHold", "int"),
+    ("analyst_rating_sell", "AnalystRatingSell", "int"),
+    ("analyst_rating_strong_sell", "AnalystRatingStrongSell", "int"),
+    ("trailing_pe", "TrailingPE", "float"),
+    ("forward_pe", "ForwardPE", "float"),
+    ("price_to_sales_ratio_ttm", "PriceToSalesRatioTTM", "float"),
+    ("price_to_book_ratio", "PriceToBookRatio", "float"),
+    ("ev_to_revenue", "EVToRevenue", "float"),
+    ("ev_to_ebitda", "EVToEBITDA", "float"),
+    ("beta", "Beta", "float"),
+    ("week_52_high", "52WeekHigh", "float"),
+    ("week_52_low", "52WeekLow", "float"),
+    ("moving_average_50_day", "50DayMovingAverage", "float"),
+    ("moving_average_200_day", "200DayMovingAverage", "float"),
+    ("shares_outstanding", "SharesOutstanding", "int"),
+    ("shares_float", "SharesFloat", "int"),
+    ("percent_insiders", "PercentInsiders", "float"),
+    ("percent_institutions", "PercentInstitutions", "float"),
+    ("dividend_date", "DividendDate", "str"),
+    ("ex_dividend_date", "ExDividendDate", "str"),
+]
+
+STOCKS_FUNDAMENTAL_INCOME_STATEMENT_FIELDS = [
+    ("fiscal_date_ending", "fiscalDateEnding", "date"),
+    ("reported_currency", "reportedCurrency", "str"),
+    ("gross_profit", "grossProfit", "int"),
+    ("total_revenue", "totalRevenue", "int"),
+    ("cost_of_revenue", "costOfRevenue", "int"),
+    ("cost_of_goods_and_services_sold", "costofGoodsAndServicesSold", "int"),
+    ("operating_income", "operatingIncome", "int"),
+    ("selling_general_and_administrative", "sellingGeneralAndAdministrative", "int"),
+    ("research_and_development", "researchAndDevelopment", "int"),
+    ("operating_expenses", "operatingExpenses", "int"),
+    ("investment_income_net", "investmentIncomeNet", "float"),
+    ("net_interest_income", "netInterestIncome", "int"),
+    ("interest_income", "interestIncome", "int"),
+    ("interest_expense", "interestExpense", "int"),
+    ("non_interest_income", "nonInterestIncome", "float"),
+    ("other_non_operating_income", "otherNonOperatingIncome", "float"),
+    ("depreciation", "depreciation", "float"),
+    ("depreciation_and_amortization", "depreciationAndAmortization", "int"),
+    ("income_before_tax", "incomeBeforeTax", "int"),
+    ("income_tax_expense", "incomeTaxExpense", "int"),
+    ("interest_and_debt_expense", "interestAndDebtExpense", "float"),
+    ("net_income_from_continuing_operations", "netIncomeFromContinuingOperations", "int"),
+    ("comprehensive_income_net_of_tax", "comprehensiveIncomeNetOfTax", "float"),
+    ("ebit", "ebit", "int"),
+    ("ebitda", "ebitda", "int"),
+    ("net_income", "netIncome", "int"),
+]
+
+STOCKS_FUNDAMENTAL_BALANCE_SHEET_FIELDS = [
+    ("fiscal_date_ending", "fiscalDateEnding", "date"),
+    ("reported_currency", "reportedCurrency", "str"),
+    ("total_assets", "totalAssets", "int"),
+    ("total_current_assets", "totalCurrentAssets", "int"),
+    ("cash_and_cash_equivalents_at_carrying_value", "cashAndCashEquivalentsAtCarryingValue", "int"),
+    ("cash_and_short_term_investments", "cashAndShortTermInvestments", "int"),
+    ("inventory", "inventory", "int"),
+    ("current_net_receivables", "currentNetReceivables", "int"),
+    ("total_non_current_assets", "totalNonCurrentAssets", "int"),
+    ("property_plant_equipment", "propertyPlantEquipment", "int"),
+    ("accumulated_depreciation_amortization_ppe", "accumulatedDepreciationAmortizationPPE", "int"),
+    ("intangible_assets", "intangibleAssets", "int"),
+    ("intangible_assets_excluding_goodwill", "intangibleAssetsExcludingGoodwill", "int"),
+    ("goodwill", "goodwill", "int"),
+    ("investments", "investments", "int"),
+    ("long_term_investments", "longTermInvestments", "int"),
+    ("short_term_investments", "shortTermInvestments", "int"),
+    ("other_current_assets", "otherCurrentAssets", "int"),
+    ("other_non_current_assets", "otherNonCurrentAssets", "int"),
+    ("total_liabilities", "totalLiabilities", "int"),
+    ("total_current_liabilities", "totalCurrentLiabilities", "int"),
+    ("current_accounts_payable", "currentAccountsPayable", "int"),
+    ("deferred_revenue", "deferredRevenue", "int"),
+    ("current_debt", "currentDebt", "int"),
+    ("short_term_debt", "shortTermDebt", "int"),
+    ("total_non_current_liabilities", "totalNonCurrentLiabilities", "int"),
+    ("capital_lease_obligations", "capitalLeaseObligations", "int"),
+    ("long_term_debt", "longTermDebt", "int"),
+    ("current_long_term_debt", "currentLongTermDebt", "int"),
+    ("long_term_debt_noncurrent", "longTermDebtNoncurrent", "int"),
+    ("short_long_term_debt_total", "shortLongTermDebtTotal", "int"),
+    ("other_current_liabilities", "otherCurrentLiabilities", "int"),
+    ("other_non_current_liabilities", "otherNonCurrentLiabilities", "int"),
+    ("total_shareholder_equity", "totalShareholderEquity", "int"),
+    ("treasury_stock", "treasuryStock", "int"),
+    ("retained_earnings", "retainedEarnings", "int"),
+    ("common_stock", "commonStock", "int"),
+    ("common_stock_shares_outstanding", "commonStockSharesOutstanding", "int"),
+]
+
+STOCKS_FUNDAMENTAL_CASH_FLOW_FIELDS = [
+    ("fiscal_date_ending", "fiscalDateEnding", "date"),
+    ("reported_currency", "reportedCurrency", "str"),
+    ("operating_cashflow", "operatingCashflow", "int"),
+    ("payments_for_operating_activities", "paymentsForOperatingActivities", "int"),
+    ("proceeds_from_operating_activities", "proceedsFromOperatingActivities", "int"),
+    ("change_in_operating_liabilities", "changeInOperatingLiabilities", "int"),
+    ("change_in_operating_assets", "changeInOperatingAssets", "int"),
+    ("depreciation_depletion_and_amortization", "depreciationDepletionAndAmortization", "int"),
+    ("capital_expenditures", "capitalExpenditures", "int"),
+    ("change_in_receivables", "changeInReceivables", "int"),
+    ("change_in_inventory", "changeInInventory", "int"),
+    ("profit_loss", "profitLoss", "int"),
+    ("cashflow_from_investment", "cashflowFromInvestment", "int"),
+    ("cashflow_from_financing", "cashflowFromFinancing", "int"),
+    ("proceeds_from_repayments_of_short_term_debt", "proceedsFromRepaymentsOfShortTermDebt", "int"),
+    ("payments_for_repurchase_of_common_stock", "paymentsForRepurchaseOfCommonStock", "int"),
+    ("payments_for_repurchase_of_equity", "paymentsForRepurchaseOfEquity", "int"),
+    ("payments_for_repurchase_of_preferred_stock", "paymentsForRepurchaseOfPreferredStock", "int"),
+    ("dividend_payout", "dividendPayout", "int"),
+    ("dividend_payout_common_stock", "dividendPayoutCommonStock", "int"),
+    ("dividend_payout_preferred_stock", "dividendPayoutPreferredStock", "int"),
+    ("proceeds_from_issuance_of_common_stock", "proceedsFromIssuanceOfCommonStock", "int"),
+    ("proceeds_from_issuance_of_long_term_debt_and_capital_securities_net", "proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet", "int"),
+    ("proceeds_from_issuance_of_preferred_stock", "proceedsFromIssuanceOfPreferredStock", "int"),
+    ("proceeds_from_repurchase_of_equity", "proceedsFromRepurchaseOfEquity", "int"),
+    ("proceeds_from_sale_of_treasury_stock", "proceedsFromSaleOfTreasuryStock", "int"),
+    ("change_in_cash_and_cash_equivalents", "changeInCashAndCashEquivalents", "int"),
+    ("change_in_exchange_rate", "changeInExchangeRate", "int"),
+    ("net_income", "netIncome", "int"),
+]
+
+STOCKS_FUNDAMENTAL_EARNINGS_ESTIMATES_FIELDS = [
+    ("date", "date", "date"),
+    ("horizon", "horizon", "str"),
+    ("eps_estimate_average", "eps_estimate_average", "float"),
+    ("eps_estimate_high", "eps_estimate_high", "float"),
+    ("eps_estimate_low", "eps_estimate_low", "float"),
+    ("eps_estimate_analyst_count", "eps_estimate_analyst_count", "float"),
+    ("eps_estimate_average_7_days_ago", "eps_estimate_average_7_days_ago", "float"),
+    ("eps_estimate_average_30_days_ago", "eps_estimate_average_30_days_ago", "float"),
+    ("eps_estimate_average_60_days_ago", "eps_estimate_average_60_days_ago", "float"),
+    ("eps_estimate_average_90_days_ago", "eps_estimate_average_90_days_ago", "float"),
+    ("eps_estimate_revision_up_trailing_7_days", "eps_estimate_revision_up_trailing_7_days", "float"),
+    ("eps_estimate_revision_down_trailing_7_days", "eps_estimate_revision_down_trailing_7_days", "float"),
+    ("eps_estimate_revision_up_trailing_30_days", "eps_estimate_revision_up_trailing_30_days", "float"),
+    ("eps_estimate_revision_down_trailing_30_days", "eps_estimate_revision_down_trailing_30_days", "float"),
+    ("revenue_estimate_average", "revenue_estimate_average", "float"),
+    ("revenue_estimate_high", "revenue_estimate_high", "float"),
+    ("revenue_estimate_low", "revenue_estimate_low", "float"),
+    ("revenue_estimate_analyst_count", "revenue_estimate_analyst_count", "float"),
+]
 
 
 def format_bulk_stocks_eod(ticker: str, df: pd.DataFrame, index_suffix: str, source: str) -> bytes:
     index_name = f"quant-agents_stocks-eod_{index_suffix}"
-    lines = []
+    docs = cast_bulk_frame(df, STOCKS_EOD_FIELDS[source], ticker)
+    docs = docs[docs["val_open"].notna() & docs["val_close"].notna()]
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["date_reference"]), docs)
 
-    for _, row in df.iterrows():
 
-        date_reference = row.get('timestamp') if source == "alphavantage" else row.get('t').split('T')[0]
-        open_ = row.get('open') if source == "alphavantage" else row.get('o')
-        close = row.get('close') if source == "alphavantage" else row.get('c')
-        high = row.get('high') if source == "alphavantage" else row.get('h')
-        low = row.get('low') if source == "alphavantage" else row.get('l')
-        volume = row.get('volume') if source == "alphavantage" else row.get('v')
+def get_stocks_eod_watermarks(tickers: List[str], index_suffix="latest") -> Dict[str, str]:
+    """Most recent date_reference indexed per ticker, resolved with a single terms aggregation."""
+    es_url = os.environ.get('ELASTICSEARCH_URL')
+    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
 
-        if open_ is None or close is None:
-            continue
-        id_str = f"{ticker}_{str(date_reference)}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "date_reference": date_reference,
-            "val_open": float(open_),
-            "val_close": float(close) if close is not None else None,
-            "val_high": float(high) if high is not None else None,
-            "val_low": float(low) if low is not None else None,
-            "val_volume": int(volume) if volume is not None else None,
+    response = requests.post(
+        url=f"{es_url}/quant-agents_stocks-eod_{index_suffix}/_search",
+        headers={
+            'Authorization': f'ApiKey {es_api_key}',
+            'Content-Type': 'application/json'
+        },
+        json={
+            "size": 0,
+            "query": {"terms": {"key_ticker": tickers}},
+            "aggs": {
+                "tickers": {
+                    "terms": {"field": "key_ticker", "size": max(len(tickers), 1)},
+                    "aggs": {"watermark": {"max": {"field": "date_reference", "format": "yyyy-MM-dd"}}}
+                }
+            }
         }
+    )
+    response.raise_for_status()
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
+    buckets = response.json()['aggregations']['tickers']['buckets']
+    return {bucket['key']: bucket['watermark']['value_as_string'] for bucket in buckets}
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
 
+def update_stocks_latest(tickers: List[str], index_suffix="latest", searches_per_request=200) -> Dict[str, int]:
+    """
+    Rewrites the quant-agents_stocks-latest_* document of each ticker from its two most recent
+    bars in quant-agents_stocks-eod_{index_suffix}, to be called once the bars are written.
+    Documents go to the latest index of the suffix and to quant-agents_stocks-latest_latest, the
+    counterpart of the quant-agents_stocks-eod_latest alias, so MarketsStatsService answers
+    the latest stats of either with a get by ticker. Returns the BulkWriter summary.
+    """
+    es_url = os.environ.get('ELASTICSEARCH_URL')
+    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
+    eod_index_name = f"quant-agents_stocks-eod_{index_suffix}"
+    headers = {'Authorization': f"ApiKey {es_api_key}", 'Content-Type': 'application/x-ndjson'}
+
+    # makes the bars of the previous bulk requests searchable
+    requests.post(url=f"{es_url}/{eod_index_name}/_refresh", headers=headers).raise_for_status()
+
+    docs = []
+    for i in range(0, len(tickers), searches_per_request):
+        chunk = tickers[i:i + searches_per_request]
+        lines = []
+        for ticker in chunk:
+            lines.append(b"{}")
+            lines.append(orjson.dumps(get_stats_close_query(ticker, None)))
+        lines.append(b"")
+        response = requests.post(url=f"{es_url}/{eod_index_name}/_msearch", headers=headers, data=b"\n".join(lines))
+        response.raise_for_status()
+        for ticker, item in zip(chunk, response.json()['responses']):
+            doc = format_stocks_latest_doc(ticker, item['hits']['hits']) if 'error' not in item else None
+            if doc is not None:
+                docs.append(doc)
+
+    df = pd.DataFrame(docs, columns=["key_ticker", "date_reference"] + STOCKS_LATEST_BAR_FIELDS + [
+        "prev_date_reference"] + [f"prev_{field}" for field in STOCKS_LATEST_BAR_FIELDS] + ["percent_variance"])
+    return BulkWriter(es_url, es_api_key).write(
+        encode_bulk(f"quant-agents_stocks-latest_{suffix}", df["key_ticker"].tolist(), df)
+        for suffix in dict.fromkeys([index_suffix, "latest"])
+    )
 
-def ingest_stocks_eod(ticker: str, index_suffix="latest", source="alpaca") -> Response:
+
+def ingest_stocks_eod(ticker: str, index_suffix="latest", source="alpaca", full_refresh=True,
+                      watermark: Optional[str] = None, update_latest=True) -> Dict[str, int]:
+    """
+    Indexes the daily bars of a ticker. With full_refresh=False only the bars from the
+    watermark on are requested and indexed, the watermark bar itself is rewritten to pick
+    up late corrections. The watermark is looked up when not given (see
+    get_stocks_eod_watermarks to resolve many tickers at once). With update_latest=False the
+    latest document and cached stats are left to the caller, as ingest_stocks_eod_tickers
+    does once for all its tickers. Returns the BulkWriter summary.
+    """
     es_url = os.environ.get('ELASTICSEARCH_URL')
     es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
 
+    if not full_refresh and watermark is None:
+        watermark = get_stocks_eod_watermarks([ticker], index_suffix).get(ticker)
+
     ticker_daily_time_series = None
 
     if source == "alpaca":
         now = datetime.now()
-        yesterday = now.replace(day=now.day - 1)
+        yesterday = now - timedelta(days=1)
         back_one_year = now.replace(year=now.year - 1)
+        start = back_one_year.strftime('%Y-%m-%d') if full_refresh or watermark is None else watermark
+        if start > yesterday.strftime('%Y-%m-%d'):
+            return BulkWriter(es_url, es_api_key).write([])
         alpaca_api_key = os.environ.get('APCA-API-KEY-ID')
         alpaca_api_secret = os.environ.get('APCA-API-SECRET-KEY')
-        alpaca_time_series_url = f"https://data.alpaca.markets/v2/stocks/{ticker}/bars?timeframe=1D&start={back_one_year.strftime('%Y-%m-%d')}&end={yesterday.strftime('%Y-%m-%d')}&adjustment=all"
+        alpaca_time_series_url = f"https://data.alpaca.markets/v2/stocks/{ticker}/bars?timeframe=1D&start={start}&end={yesterday.strftime('%Y-%m-%d')}&adjustment=all"
         response = requests.get(alpaca_time_series_url, headers={
             "accept": "application/json",
             "APCA-API-KEY-ID": alpaca_api_key,
             "APCA-API-SECRET-KEY": alpaca_api_secret
-        })
+        }, timeout=60)
         ticker_daily_time_series = pd.json_normalize(response.json().get('bars'))
 
     elif source == "alphavantage":
-        alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-        alpha_vantage_time_series_url = f"https://www.alphavantage.co/query?function=TIME_SERIES_DAILY&symbol={ticker}&apikey={alpha_vantage_api_key}&datatype=csv"
-        ticker_daily_time_series = pd.read_csv(alpha_vantage_time_series_url)
+        alpha_vantage_time_series = get_alpha_vantage_client().query("TIME_SERIES_DAILY", ticker, datatype="csv")
+        ticker_daily_time_series = pd.read_csv(io.StringIO(alpha_vantage_time_series))
+        if not full_refresh and watermark is not None:
+            ticker_daily_time_series = ticker_daily_time_series[ticker_daily_time_series['timestamp'] >= watermark]
+
+    summary = BulkWriter(es_url, es_api_key).write([
+        format_bulk_stocks_eod(ticker, ticker_daily_time_series, index_suffix, source)
+    ])
+    if update_latest and summary["indexed"]:
+        refresh_stocks_latest([ticker], index_suffix)
+
+    return summary
+
+
+def refresh_stocks_latest(tickers: List[str], index_suffix="latest") -> None:
+    """Rewrites the latest documents of tickers with new bars, then drops their now stale cached stats."""
+    update_stocks_latest(tickers, index_suffix)
+    broker_url = os.environ.get('BROKER_URL')
+    if broker_url:
+        invalidate_stats_close_cache(broker_url, tickers)
+
+
+def ingest_stocks_eod_tickers(tickers: List[str], index_suffix="latest", source="alpaca",
+                              full_refresh=True) -> Dict[str, Dict[str, int]]:
+    """
+    Indexes the daily bars of many tickers one by one with ingest_stocks_eod. Watermarks are
+    resolved in one aggregation and the latest documents refreshed once at the end, a single
+    index refresh and msearch round for the whole list. Returns the summary of each ticker.
+    """
+    watermarks = {} if full_refresh else get_stocks_eod_watermarks(tickers, index_suffix)
+
+    summaries = {}
+    for ticker in tickers:
+        summaries[ticker] = ingest_stocks_eod(
+            ticker, index_suffix, source, full_refresh, watermarks.get(ticker), update_latest=False
+        )
+
+    written = [ticker for ticker, summary in summaries.items() if summary["indexed"]]
+    if written:
+        refresh_stocks_latest(written, index_suffix)
+    return summaries
+
+
+class AlpacaBarsClient:
+    """Daily bars of many symbols through the multi-symbol /v2/stocks/bars endpoint."""
+
+    def __init__(self, session=None, url="https://data.alpaca.markets/v2/stocks/bars", page_limit=10000,
+                 symbols_per_request=100, timeout=60):
+        self.session = session or requests.Session()
+        self.url = url
+        self.page_limit = page_limit
+        self.symbols_per_request = symbols_per_request
+        self.timeout = timeout
+        self.headers = {
+            "accept": "application/json",
+            "APCA-API-KEY-ID": os.environ.get('APCA-API-KEY-ID'),
+            "APCA-API-SECRET-KEY": os.environ.get('APCA-API-SECRET-KEY')
+        }
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_eod(ticker, ticker_daily_time_series, index_suffix, source)
-    )
+    def get_bars_pages(self, symbols: List[str], start: str, end: str, timeframe="1D",
+                       adjustment="all") -> Iterator[Dict[str, List[dict]]]:
+        """Yields the bars of every page, keyed by symbol, following next_page_token until exhausted."""
+        for i in range(0, len(symbols), self.symbols_per_request):
+            params = {
+                "symbols": ",".join(symbols[i:i + self.symbols_per_request]),
+                "timeframe": timeframe,
+                "start": start,
+                "end": end,
+                "adjustment": adjustment,
+                "limit": self.page_limit,
+            }
+            while True:
+                response = self.session.get(self.url, params=params, headers=self.headers, timeout=self.timeout)
+                response.raise_for_status()
+                page = response.json()
+                yield page.get('bars') or {}
+
+                if not page.get('next_page_token'):
+                    break
+                params = {**params, "page_token": page['next_page_token']}
+
+
+def format_bulk_stocks_eod_pages(pages: Iterable[Dict[str, List[dict]]], index_suffix="latest",
+                                 index_suffixes: Optional[Dict[str, str]] = None) -> Iterator[Tuple[List[str], bytes]]:
+    """Encodes each page of AlpacaBarsClient as one bulk body, `index_suffixes` overrides the index per symbol."""
+    for page in pages:
+        symbols = [symbol for symbol, bars in page.items() if bars]
+        if not symbols:
+            continue
+        body = b"".join(
+            format_bulk_stocks_eod(
+                symbol, pd.DataFrame(page[symbol]), (index_suffixes or {}).get(symbol, index_suffix), "alpaca"
+            )
+            for symbol in symbols
+        )
+        yield symbols, body
+
+
+def ingest_stocks_eod_bars(tickers: List[str], start: str, end: str, index_suffix="latest",
+                           index_suffixes: Optional[Dict[str, str]] = None,
+                           client: Optional[AlpacaBarsClient] = None) -> Dict[str, int]:
+    """Indexes the daily bars of many tickers, Alpaca pages are streamed to the bulk writer as they arrive."""
+    es_url = os.environ.get('ELASTICSEARCH_URL')
+    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
+    broker_url = os.environ.get('BROKER_URL')
+    client = client or AlpacaBarsClient()
 
+    written = set()
 
-def format_bulk_stocks_insider_trades(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
-    index_name = f"quant-agents_stocks-insider-trades_{index_suffix}"
-    lines = []
+    def bodies():
+        pages = client.get_bars_pages(tickers, start, end)
+        for symbols, body in format_bulk_stocks_eod_pages(pages, index_suffix, index_suffixes):
+            written.update(symbols)
+            yield body
 
-    for _, row in df.iterrows():
-        date_reference = row.get('transaction_date').strftime('%Y-%m-%d')
-        executive = row.get('executive')
-        executive_title = row.get('executive_title')
-        acquisition_or_disposal = row.get('acquisition_or_disposal')
-        shares = row.get('shares')
-        share_price = row.get('share_price')
-
-        id_str = f"{ticker}_{date_reference}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "date_reference": date_reference,
-            "text_executive_name": executive,
-            "text_executive_title": executive_title,
-            "key_acquisition_disposal": acquisition_or_disposal,
-            "val_share_quantity": float(shares),
-            "val_share_price": float(share_price)
-        }
+    summary = BulkWriter(es_url, es_api_key).write(bodies())
+    if summary["indexed"]:
+        symbols_by_suffix = {}
+        for symbol in sorted(written):
+            symbols_by_suffix.setdefault((index_suffixes or {}).get(symbol, index_suffix), []).append(symbol)
+        for suffix, symbols in symbols_by_suffix.items():
+            update_stocks_latest(symbols, suffix)
+    if broker_url and summary["indexed"]:
+        invalidate_stats_close_cache(broker_url, sorted(written))
+
+    return summary
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
+def format_bulk_stocks_insider_trades(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
+    index_name = f"quant-agents_stocks-insider-trades_{index_suffix}"
+    docs = cast_bulk_frame(df, STOCKS_INSIDER_TRADES_FIELDS, ticker)
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["date_reference"]), docs)
 
 
-def ingest_stocks_insider_trades(ticker: str, cutoff_days=365, index_suffix="latest") -> Response:
+def ingest_stocks_insider_trades(ticker: str, cutoff_days=365, index_suffix="latest",
+                                 client: Optional[AlphaVantageClient] = None) -> Dict[str, int]:
     es_url = os.environ.get('ELASTICSEARCH_URL')
     es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_insider_trades_url = f"https://www.alphavantage.co/query?function=INSIDER_TRANSACTIONS&symbol={ticker}&apikey={alpha_vantage_api_key}"
+    client = client or get_alpha_vantage_client()
 
-    ticker_insider_trades_data = requests.get(alpha_vantage_insider_trades_url).json()
+    ticker_insider_trades_data = client.query("INSIDER_TRANSACTIONS", ticker)
     df = pd.json_normalize(ticker_insider_trades_data['data'])
     df["transaction_date"] = pd.to_datetime(df["transaction_date"], errors='coerce')
     cutoff = pd.Timestamp.now() - pd.Timedelta(days=cutoff_days)
     ticker_recent_insider_trades = df[df["transaction_date"] >= cutoff].reset_index(drop=True)
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_insider_trades(ticker, ticker_recent_insider_trades, index_suffix)
-    )
+    return BulkWriter(es_url, es_api_key).write([format_bulk_stocks_insider_trades(ticker, ticker_recent_insider_trades, index_suffix)])
 
 
 def format_bulk_stocks_metadata(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
     today = datetime.now().strftime('%Y-%m-%d')
     index_name = f"quant-agents_stocks-metadata_{index_suffix}"
-    lines = []
-
-    for _, row in df.iterrows():
-        # canonical values, accept multiple key variants
-        symbol = row.get('Symbol') or ticker
-        asset_type = row.get('AssetType')
-        name = row.get('Name')
-        description = row.get('Description')
-        cik = row.get('CIK')
-        exchange = row.get('Exchange')
-        currency = row.get('Currency')
-        country = row.get('Country')
-        sector = row.get('Sector')
-        industry = row.get('Industry')
-        address = row.get('Address')
-        official_site = row.get('OfficialSite')
-        fiscal_year_end = row.get('FiscalYearEnd')
-
-        latest_quarter = row.get('LatestQuarter')
-        dividend_date = row.get('DividendDate')
-        ex_dividend_date = row.get('ExDividendDate')
-
-        # numeric conversions
-        market_capitalization = int(row.get('MarketCapitalization'))
-        ebitda = int(row.get('EBITDA'))
-        pe_ratio = float(row.get('PERatio'))
-        peg_ratio = float(row.get('PEGRatio'))
-        book_value = float(row.get('BookValue'))
-        dividend_per_share = float(row.get('DividendPerShare'))
-        dividend_yield = float(row.get('DividendYield'))
-        eps = float(row.get('EPS'))
-        revenue_per_share_ttm = float(row.get('RevenuePerShareTTM'))
-        profit_margin = float(row.get('ProfitMargin'))
-        operating_margin_ttm = float(row.get('OperatingMarginTTM'))
-        return_on_assets_ttm = float(row.get('ReturnOnAssetsTTM'))
-        return_on_equity_ttm = float(row.get('ReturnOnEquityTTM'))
-
-        revenue_ttm = int(row.get('RevenueTTM'))
-        gross_profit_ttm = int(row.get('GrossProfitTTM'))
-        diluted_eps_ttm = float(row.get('DilutedEPSTTM'))
-
-        quarterly_earnings_growth_yoy = float(row.get('QuarterlyEarningsGrowthYOY'))
-        quarterly_revenue_growth_yoy = float(row.get('QuarterlyRevenueGrowthYOY'))
-
-        analyst_target_price = float(row.get('AnalystTargetPrice'))
-        analyst_rating_strong_buy = int(row.get('AnalystRatingStrongBuy'))
-        analyst_rating_buy = int(row.get('AnalystRatingBuy'))
-        analyst_rating_hold = int(row.get('AnalystRatingHold'))
-        analyst_rating_sell = int(row.get('AnalystRatingSell'))
-        analyst_rating_strong_sell = int(row.get('AnalystRatingStrongSell'))
-
-        trailing_pe = float(row.get('TrailingPE'))
-        forward_pe = float(row.get('ForwardPE'))
-        price_to_sales_ratio_ttm = float(row.get('PriceToSalesRatioTTM'))
-        price_to_book_ratio = float(row.get('PriceToBookRatio'))
-        ev_to_revenue = float(row.get('EVToRevenue'))
-        ev_to_ebitda = float(row.get('EVToEBITDA'))
-        beta = float(row.get('Beta'))
-
-        week_52_high = float(row.get('52WeekHigh'))
-        week_52_low = float(row.get('52WeekLow'))
-        moving_average_50_day = float(row.get('50DayMovingAverage'))
-        moving_average_200_day = float(row.get('200DayMovingAverage'))
-
-        shares_outstanding = int(row.get('SharesOutstanding'))
-        shares_float = int(row.get('SharesFloat'))
-        percent_insiders = float(row.get('PercentInsiders'))
-        percent_institutions = float(row.get('PercentInstitutions'))
-
-        # build id using symbol and latest_quarter or today
-        id_suffix = latest_quarter or today
-        id_str = f"{symbol}_{id_suffix}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": symbol,
-            "asset_type": asset_type,
-            "name": name,
-            "description": description,
-            "cik": cik,
-            "exchange": exchange,
-            "currency": currency,
-            "country": country,
-            "sector": sector,
-            "industry": industry,
-            "address": address,
-            "official_site": official_site,
-            "fiscal_year_end": fiscal_year_end,
-            "latest_quarter": latest_quarter,
-            "market_capitalization": market_capitalization,
-            "ebitda": ebitda,
-            "pe_ratio": pe_ratio,
-            "peg_ratio": peg_ratio,
-            "book_value": book_value,
-            "dividend_per_share": dividend_per_share,
-            "dividend_yield": dividend_yield,
-            "eps": eps,
-            "revenue_per_share_ttm": revenue_per_share_ttm,
-            "profit_margin": profit_margin,
-            "operating_margin_ttm": operating_margin_ttm,
-            "return_on_assets_ttm": return_on_assets_ttm,
-            "return_on_equity_ttm": return_on_equity_ttm,
-            "revenue_ttm": revenue_ttm,
-            "gross_profit_ttm": gross_profit_ttm,
-            "diluted_eps_ttm": diluted_eps_ttm,
-            "quarterly_earnings_growth_yoy": quarterly_earnings_growth_yoy,
-            "quarterly_revenue_growth_yoy": quarterly_revenue_growth_yoy,
-            "analyst_target_price": analyst_target_price,
-            "analyst_rating_strong_buy": analyst_rating_strong_buy,
-            "analyst_rating_buy": analyst_rating_buy,
-            "analyst_rating_hold": analyst_rating_hold,
-            "analyst_rating_sell": analyst_rating_sell,
-            "analyst_rating_strong_sell": analyst_rating_strong_sell,
-            "trailing_pe": trailing_pe,
-            "forward_pe": forward_pe,
-            "price_to_sales_ratio_ttm": price_to_sales_ratio_ttm,
-            "price_to_book_ratio": price_to_book_ratio,
-            "ev_to_revenue": ev_to_revenue,
-            "ev_to_ebitda": ev_to_ebitda,
-            "beta": beta,
-            "week_52_high": week_52_high,
-            "week_52_low": week_52_low,
-            "moving_average_50_day": moving_average_50_day,
-            "moving_average_200_day": moving_average_200_day,
-            "shares_outstanding": shares_outstanding,
-            "shares_float": shares_float,
-            "percent_insiders": percent_insiders,
-            "percent_institutions": percent_institutions,
-            "dividend_date": dividend_date,
-            "ex_dividend_date": ex_dividend_date,
-        }
+    docs = cast_bulk_frame(df, STOCKS_METADATA_FIELDS)
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
+    # canonical symbol, falls back to the requested ticker, the id to today without a latest quarter
+    docs.insert(0, "key_ticker", docs.pop("Symbol").fillna(ticker).replace("", ticker))
+    id_suffix = docs["latest_quarter"].fillna(today).replace("", today)
+    return encode_bulk(index_name, get_bulk_ids(docs["key_ticker"], id_suffix), docs)
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
 
-
-def ingest_stocks_metadata(ticker: str, index_suffix="latest") -> Response:
+def ingest_stocks_metadata(ticker: str, index_suffix="latest",
+                           client: Optional[AlphaVantageClient] = None) -> Dict[str, int]:
     es_url = os.environ.get('ELASTICSEARCH_URL')
     es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_overview_url = f"https://www.alphavantage.co/query?function=OVERVIEW&symbol={ticker}&apikey={alpha_vantage_api_key}"
+    client = client or get_alpha_vantage_client()
 
-    ticker_overview_data = requests.get(alpha_vantage_overview_url).json()
+    ticker_overview_data = client.query("OVERVIEW", ticker)
     ticker_metadata = pd.json_normalize(ticker_overview_data)
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_metadata(ticker, ticker_metadata, index_suffix)
-    )
+    return BulkWriter(es_url, es_api_key).write([format_bulk_stocks_metadata(ticker, ticker_metadata, index_suffix)])
 
 
 def format_bulk_stocks_fundamental_income_statement(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
     today = datetime.now().strftime('%Y-%m-%d')
     index_name = f"quant-agents_stocks-fundamental-income-statement_{index_suffix}"
-    lines = []
-
-    for _, row in df.iterrows():
-        fiscal_date_ending = row.get('fiscalDateEnding').strftime('%Y-%m-%d')
-        reported_currency = row.get('reportedCurrency')
-        gross_profit = int(row.get('grossProfit'))
-        total_revenue = int(row.get('totalRevenue'))
-        cost_of_revenue = int(row.get('costOfRevenue'))
-        cost_of_goods_and_services_sold = int(row.get('costofGoodsAndServicesSold'))
-
-        operating_income = int(row.get('operatingIncome'))
-        selling_general_and_administrative = int(row.get('sellingGeneralAndAdministrative'))
-        research_and_development = int(row.get('researchAndDevelopment'))
-        operating_expenses = int(row.get('operatingExpenses'))
-
-        investment_income_net = float(row.get('investmentIncomeNet'))
-        net_interest_income = int(row.get('netInterestIncome'))
-        interest_income = int(row.get('interestIncome'))
-        interest_expense = int(row.get('interestExpense'))
-
-        non_interest_income = float(row.get('nonInterestIncome'))
-        other_non_operating_income = float(row.get('otherNonOperatingIncome'))
-        depreciation = float(row.get('depreciation'))
-        depreciation_and_amortization = int(row.get('depreciationAndAmortization'))
-
-        income_before_tax = int(row.get('incomeBeforeTax'))
-        income_tax_expense = int(row.get('incomeTaxExpense'))
-        interest_and_debt_expense = float(row.get('interestAndDebtExpense'))
-
-        net_income_from_continuing_operations = int(row.get('netIncomeFromContinuingOperations'))
-        comprehensive_income_net_of_tax = float(row.get('comprehensiveIncomeNetOfTax'))
-
-        ebit = int(row.get('ebit'))
-        ebitda = int(row.get('ebitda'))
-        net_income = int(row.get('netIncome'))
-
-        id_suffix = fiscal_date_ending or today
-        id_str = f"{ticker}_{id_suffix}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "fiscal_date_ending": fiscal_date_ending,
-            "reported_currency": reported_currency,
-            "gross_profit": gross_profit,
-            "total_revenue": total_revenue,
-            "cost_of_revenue": cost_of_revenue,
-            "cost_of_goods_and_services_sold": cost_of_goods_and_services_sold,
-            "operating_income": operating_income,
-            "selling_general_and_administrative": selling_general_and_administrative,
-            "research_and_development": research_and_development,
-            "operating_expenses": operating_expenses,
-            "investment_income_net": investment_income_net,
-            "net_interest_income": net_interest_income,
-            "interest_income": interest_income,
-            "interest_expense": interest_expense,
-            "non_interest_income": non_interest_income,
-            "other_non_operating_income": other_non_operating_income,
-            "depreciation": depreciation,
-            "depreciation_and_amortization": depreciation_and_amortization,
-            "income_before_tax": income_before_tax,
-            "income_tax_expense": income_tax_expense,
-            "interest_and_debt_expense": interest_and_debt_expense,
-            "net_income_from_continuing_operations": net_income_from_continuing_operations,
-            "comprehensive_income_net_of_tax": comprehensive_income_net_of_tax,
-            "ebit": ebit,
-            "ebitda": ebitda,
-            "net_income": net_income,
-        }
+    docs = cast_bulk_frame(df, STOCKS_FUNDAMENTAL_INCOME_STATEMENT_FIELDS, ticker)
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["fiscal_date_ending"].fillna(today)), docs)
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
-
-
-def ingest_stocks_fundamental_income_statement(ticker: str, cutoff_days=3650, index_suffix="latest") -> Response:
-    es_url = os.environ.get('ELASTICSEARCH_URL')
-    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_income_statement_url = f"https://www.alphavantage.co/query?function=INCOME_STATEMENT&symbol={ticker}&apikey={alpha_vantage_api_key}"
+def ingest_stocks_fundamental_income_statement(ticker: str, cutoff_days=3650, index_suffix="latest",
+                                               client: Optional[AlphaVantageClient] = None, skip_unchanged=True) -> Dict[str, int]:
+    client = client or get_alpha_vantage_client()
 
-    ticker_income_statement_data = requests.get(alpha_vantage_income_statement_url).json()
+    ticker_income_statement_data = client.query("INCOME_STATEMENT", ticker)
     df = pd.json_normalize(ticker_income_statement_data['annualReports'])
     df["fiscalDateEnding"] = pd.to_datetime(df["fiscalDateEnding"], errors='coerce')
     cutoff = pd.Timestamp.now() - pd.Timedelta(days=cutoff_days)
@@ -385,142 +912,23 @@ def ingest_stocks_fundamental_income_statement(ticker: str, cutoff_days=3650, in
     pd.set_option('future.no_silent_downcasting', True)
     ticker_recent_income_statement = ticker_recent_income_statement.replace({None: 0, 'None': 0, 'null': 0})
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_fundamental_income_statement(ticker, ticker_recent_income_statement, index_suffix)
-    )
+    # ten years of reports barely change between runs, only new or restated ones are sent
+    body = format_bulk_stocks_fundamental_income_statement(ticker, ticker_recent_income_statement, index_suffix)
+    return write_changed_bulk(ticker, body, skip_unchanged=skip_unchanged)
 
 
 def format_bulk_stocks_fundamental_balance_sheet(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
     today = datetime.now().strftime('%Y-%m-%d')
     index_name = f"quant-agents_stocks-fundamental-balance-sheet_{index_suffix}"
-    lines = []
-
-    for _, row in df.iterrows():
-        fiscal_date_ending = row.get('fiscalDateEnding').strftime('%Y-%m-%d')
-        reported_currency = row.get('reportedCurrency')
-        total_assets = int(row.get('totalAssets')) if row.get('totalAssets') != "None" else None
-        total_current_assets = int(row.get('totalCurrentAssets')) if row.get('totalCurrentAssets') != "None" else None
-        cash_and_cash_equivalents_at_carrying_value = int(row.get('cashAndCashEquivalentsAtCarryingValue')) if row.get(
-            'cashAndCashEquivalentsAtCarryingValue') != "None" else None
-        cash_and_short_term_investments = int(row.get('cashAndShortTermInvestments')) if row.get(
-            'cashAndShortTermInvestments') != "None" else None
-        inventory = int(row.get('inventory')) if row.get('inventory') != "None" else None
-        current_net_receivables = int(row.get('currentNetReceivables')) if row.get(
-            'currentNetReceivables') != "None" else None
-        total_non_current_assets = int(row.get('totalNonCurrentAssets')) if row.get(
-            'totalNonCurrentAssets') != "None" else None
-        property_plant_equipment = int(row.get('propertyPlantEquipment')) if row.get(
-            'propertyPlantEquipment') != "None" else None
-        accumulated_depreciation_amortization_ppe = int(row.get('accumulatedDepreciationAmortizationPPE')) if row.get(
-            'accumulatedDepreciationAmortizationPPE') != "None" else None
-        intangible_assets = int(row.get('intangibleAssets')) if row.get('intangibleAssets') != "None" else None
-        intangible_assets_excluding_goodwill = int(row.get('intangibleAssetsExcludingGoodwill')) if row.get(
-            'intangibleAssetsExcludingGoodwill') != "None" else None
-        goodwill = int(row.get('goodwill')) if row.get('goodwill') != "None" else None
-        investments = int(row.get('investments')) if row.get('investments') != "None" else None
-        long_term_investments = int(row.get('longTermInvestments')) if row.get(
-            'longTermInvestments') != "None" else None
-        short_term_investments = int(row.get('shortTermInvestments')) if row.get(
-            'shortTermInvestments') != "None" else None
-        other_current_assets = int(row.get('otherCurrentAssets')) if row.get('otherCurrentAssets') != "None" else None
-        other_non_current_assets = int(row.get('otherNonCurrentAssets')) if row.get(
-            'otherNonCurrentAssets') != "None" else None
-        total_liabilities = int(row.get('totalLiabilities')) if row.get('totalLiabilities') != "None" else None
-        total_current_liabilities = int(row.get('totalCurrentLiabilities')) if row.get(
-            'totalCurrentLiabilities') != "None" else None
-        current_accounts_payable = int(row.get('currentAccountsPayable')) if row.get(
-            'currentAccountsPayable') != "None" else None
-        deferred_revenue = int(row.get('deferredRevenue')) if row.get('deferredRevenue') != "None" else None
-        current_debt = int(row.get('currentDebt')) if row.get('currentDebt') != "None" else None
-        short_term_debt = int(row.get('shortTermDebt')) if row.get('shortTermDebt') != "None" else None
-        total_non_current_liabilities = int(row.get('totalNonCurrentLiabilities')) if row.get(
-            'totalNonCurrentLiabilities') != "None" else None
-        capital_lease_obligations = int(row.get('capitalLeaseObligations')) if row.get(
-            'capitalLeaseObligations') != "None" else None
-        long_term_debt = int(row.get('longTermDebt')) if row.get('longTermDebt') != "None" else None
-        current_long_term_debt = int(row.get('currentLongTermDebt')) if row.get(
-            'currentLongTermDebt') != "None" else None
-        long_term_debt_noncurrent = int(row.get('longTermDebtNoncurrent')) if row.get(
-            'longTermDebtNoncurrent') != "None" else None
-        short_long_term_debt_total = int(row.get('shortLongTermDebtTotal')) if row.get(
-            'shortLongTermDebtTotal') != "None" else None
-        other_current_liabilities = int(row.get('otherCurrentLiabilities')) if row.get(
-            'otherCurrentLiabilities') != "None" else None
-        other_non_current_liabilities = int(row.get('otherNonCurrentLiabilities')) if row.get(
-            'otherNonCurrentLiabilities') != "None" else None
-        total_shareholder_equity = int(row.get('totalShareholderEquity')) if row.get(
-            'totalShareholderEquity') != "None" else None
-        treasury_stock = int(row.get('treasuryStock')) if row.get('treasuryStock') != "None" else None
-        retained_earnings = int(row.get('retainedEarnings')) if row.get('retainedEarnings') != "None" else None
-        common_stock = int(row.get('commonStock')) if row.get('commonStock') != "None" else None
-        common_stock_shares_outstanding = int(row.get('commonStockSharesOutstanding')) if row.get(
-            'commonStockSharesOutstanding') != "None" else None
-
-        id_suffix = fiscal_date_ending or today
-        id_str = f"{ticker}_{id_suffix}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "fiscal_date_ending": fiscal_date_ending,
-            "reported_currency": reported_currency,
-            "total_assets": total_assets,
-            "total_current_assets": total_current_assets,
-            "cash_and_cash_equivalents_at_carrying_value": cash_and_cash_equivalents_at_carrying_value,
-            "cash_and_short_term_investments": cash_and_short_term_investments,
-            "inventory": inventory,
-            "current_net_receivables": current_net_receivables,
-            "total_non_current_assets": total_non_current_assets,
-            "property_plant_equipment": property_plant_equipment,
-            "accumulated_depreciation_amortization_ppe": accumulated_depreciation_amortization_ppe,
-            "intangible_assets": intangible_assets,
-            "intangible_assets_excluding_goodwill": intangible_assets_excluding_goodwill,
-            "goodwill": goodwill,
-            "investments": investments,
-            "long_term_investments": long_term_investments,
-            "short_term_investments": short_term_investments,
-            "other_current_assets": other_current_assets,
-            "other_non_current_assets": other_non_current_assets,
-            "total_liabilities": total_liabilities,
-            "total_current_liabilities": total_current_liabilities,
-            "current_accounts_payable": current_accounts_payable,
-            "deferred_revenue": deferred_revenue,
-            "current_debt": current_debt,
-            "short_term_debt": short_term_debt,
-            "total_non_current_liabilities": total_non_current_liabilities,
-            "capital_lease_obligations": capital_lease_obligations,
-            "long_term_debt": long_term_debt,
-            "current_long_term_debt": current_long_term_debt,
-            "long_term_debt_noncurrent": long_term_debt_noncurrent,
-            "short_long_term_debt_total": short_long_term_debt_total,
-            "other_current_liabilities": other_current_liabilities,
-            "other_non_current_liabilities": other_non_current_liabilities,
-            "total_shareholder_equity": total_shareholder_equity,
-            "treasury_stock": treasury_stock,
-            "retained_earnings": retained_earnings,
-            "common_stock": common_stock,
-            "common_stock_shares_outstanding": common_stock_shares_outstanding,
-        }
+    docs = cast_bulk_frame(df, STOCKS_FUNDAMENTAL_BALANCE_SHEET_FIELDS, ticker)
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["fiscal_date_ending"].fillna(today)), docs)
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
-
-
-def ingest_stocks_fundamental_balance_sheet(ticker: str, cutoff_days=3650, index_suffix="latest") -> Response:
-    es_url = os.environ.get('ELASTICSEARCH_URL')
-    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_balance_sheet_url = f"https://www.alphavantage.co/query?function=BALANCE_SHEET&symbol={ticker}&apikey={alpha_vantage_api_key}"
+def ingest_stocks_fundamental_balance_sheet(ticker: str, cutoff_days=3650, index_suffix="latest",
+                                            client: Optional[AlphaVantageClient] = None, skip_unchanged=True) -> Dict[str, int]:
+    client = client or get_alpha_vantage_client()
 
-    ticker_balance_sheet_data = requests.get(alpha_vantage_balance_sheet_url).json()
+    ticker_balance_sheet_data = client.query("BALANCE_SHEET", ticker)
     df = pd.json_normalize(ticker_balance_sheet_data['annualReports'])
     df["fiscalDateEnding"] = pd.to_datetime(df["fiscalDateEnding"], errors='coerce')
     cutoff = pd.Timestamp.now() - pd.Timedelta(days=cutoff_days)
@@ -528,125 +936,23 @@ def ingest_stocks_fundamental_balance_sheet(ticker: str, cutoff_days=3650, index
     pd.set_option('future.no_silent_downcasting', True)
     ticker_recent_balance_sheet = ticker_recent_balance_sheet.replace({None: 0, 'None': 0, 'null': 0})
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_fundamental_balance_sheet(ticker, ticker_recent_balance_sheet, index_suffix)
-    )
+    # ten years of reports barely change between runs, only new or restated ones are sent
+    body = format_bulk_stocks_fundamental_balance_sheet(ticker, ticker_recent_balance_sheet, index_suffix)
+    return write_changed_bulk(ticker, body, skip_unchanged=skip_unchanged)
 
 
 def format_bulk_stocks_fundamental_cash_flow(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
     today = datetime.now().strftime('%Y-%m-%d')
     index_name = f"quant-agents_stocks-fundamental-cash-flow_{index_suffix}"
-    lines = []
-
-    for _, row in df.iterrows():
-        fiscal_date_ending = row.get('fiscalDateEnding').strftime('%Y-%m-%d')
-        reported_currency = row.get('reportedCurrency')
-        operating_cashflow = int(row.get('operatingCashflow')) if row.get('operatingCashflow') != "None" else None
-        payments_for_operating_activities = int(row.get('paymentsForOperatingActivities')) if row.get(
-            'paymentsForOperatingActivities') != "None" else None
-        proceeds_from_operating_activities = int(row.get('proceedsFromOperatingActivities')) if row.get(
-            'proceedsFromOperatingActivities') != "None" else None
-        change_in_operating_liabilities = int(row.get('changeInOperatingLiabilities')) if row.get(
-            'changeInOperatingLiabilities') != "None" else None
-        change_in_operating_assets = int(row.get('changeInOperatingAssets')) if row.get(
-            'changeInOperatingAssets') != "None" else None
-        depreciation_depletion_and_amortization = int(row.get('depreciationDepletionAndAmortization')) if row.get(
-            'depreciationDepletionAndAmortization') != "None" else None
-        capital_expenditures = int(row.get('capitalExpenditures')) if row.get('capitalExpenditures') != "None" else None
-        change_in_receivables = int(row.get('changeInReceivables')) if row.get(
-            'changeInReceivables') != "None" else None
-        change_in_inventory = int(row.get('changeInInventory')) if row.get('changeInInventory') != "None" else None
-        profit_loss = int(row.get('profitLoss')) if row.get('profitLoss') != "None" else None
-        cashflow_from_investment = int(row.get('cashflowFromInvestment')) if row.get(
-            'cashflowFromInvestment') != "None" else None
-        cashflow_from_financing = int(row.get('cashflowFromFinancing')) if row.get(
-            'cashflowFromFinancing') != "None" else None
-        proceeds_from_repayments_of_short_term_debt = int(row.get('proceedsFromRepaymentsOfShortTermDebt')) if row.get(
-            'proceedsFromRepaymentsOfShortTermDebt') != "None" else None
-        payments_for_repurchase_of_common_stock = int(row.get('paymentsForRepurchaseOfCommonStock')) if row.get(
-            'paymentsForRepurchaseOfCommonStock') != "None" else None
-        payments_for_repurchase_of_equity = int(row.get('paymentsForRepurchaseOfEquity')) if row.get(
-            'paymentsForRepurchaseOfEquity') != "None" else None
-        payments_for_repurchase_of_preferred_stock = int(row.get('paymentsForRepurchaseOfPreferredStock')) if row.get(
-            'paymentsForRepurchaseOfPreferredStock') != "None" else None
-        dividend_payout = int(row.get('dividendPayout')) if row.get('dividendPayout') != "None" else None
-        dividend_payout_common_stock = int(row.get('dividendPayoutCommonStock')) if row.get(
-            'dividendPayoutCommonStock') != "None" else None
-        dividend_payout_preferred_stock = int(row.get('dividendPayoutPreferredStock')) if row.get(
-            'dividendPayoutPreferredStock') != "None" else None
-        proceeds_from_issuance_of_common_stock = int(row.get('proceedsFromIssuanceOfCommonStock')) if row.get(
-            'proceedsFromIssuanceOfCommonStock') != "None" else None
-        proceeds_from_issuance_of_long_term_debt_and_capital_securities_net = int(
-            row.get('proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet')) if row.get(
-            'proceedsFromIssuanceOfLongTermDebtAndCapitalSecuritiesNet') != "None" else None
-        proceeds_from_issuance_of_preferred_stock = int(row.get('proceedsFromIssuanceOfPreferredStock')) if row.get(
-            'proceedsFromIssuanceOfPreferredStock') != "None" else None
-        proceeds_from_repurchase_of_equity = int(row.get('proceedsFromRepurchaseOfEquity')) if row.get(
-            'proceedsFromRepurchaseOfEquity') != "None" else None
-        proceeds_from_sale_of_treasury_stock = int(row.get('proceedsFromSaleOfTreasuryStock')) if row.get(
-            'proceedsFromSaleOfTreasuryStock') != "None" else None
-        change_in_cash_and_cash_equivalents = int(row.get('changeInCashAndCashEquivalents')) if row.get(
-            'changeInCashAndCashEquivalents') != "None" else None
-        change_in_exchange_rate = int(row.get('changeInExchangeRate')) if row.get(
-            'changeInExchangeRate') != "None" else None
-        net_income = int(row.get('netIncome')) if row.get('netIncome') != "None" else None
-
-        id_suffix = fiscal_date_ending or today
-        id_str = f"{ticker}_{id_suffix}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "fiscal_date_ending": fiscal_date_ending,
-            "reported_currency": reported_currency,
-            "operating_cashflow": operating_cashflow,
-            "payments_for_operating_activities": payments_for_operating_activities,
-            "proceeds_from_operating_activities": proceeds_from_operating_activities,
-            "change_in_operating_liabilities": change_in_operating_liabilities,
-            "change_in_operating_assets": change_in_operating_assets,
-            "depreciation_depletion_and_amortization": depreciation_depletion_and_amortization,
-            "capital_expenditures": capital_expenditures,
-            "change_in_receivables": change_in_receivables,
-            "change_in_inventory": change_in_inventory,
-            "profit_loss": profit_loss,
-            "cashflow_from_investment": cashflow_from_investment,
-            "cashflow_from_financing": cashflow_from_financing,
-            "proceeds_from_repayments_of_short_term_debt": proceeds_from_repayments_of_short_term_debt,
-            "payments_for_repurchase_of_common_stock": payments_for_repurchase_of_common_stock,
-            "payments_for_repurchase_of_equity": payments_for_repurchase_of_equity,
-            "payments_for_repurchase_of_preferred_stock": payments_for_repurchase_of_preferred_stock,
-            "dividend_payout": dividend_payout,
-            "dividend_payout_common_stock": dividend_payout_common_stock,
-            "dividend_payout_preferred_stock": dividend_payout_preferred_stock,
-            "proceeds_from_issuance_of_common_stock": proceeds_from_issuance_of_common_stock,
-            "proceeds_from_issuance_of_long_term_debt_and_capital_securities_net": proceeds_from_issuance_of_long_term_debt_and_capital_securities_net,
-            "proceeds_from_issuance_of_preferred_stock": proceeds_from_issuance_of_preferred_stock,
-            "proceeds_from_repurchase_of_equity": proceeds_from_repurchase_of_equity,
-            "proceeds_from_sale_of_treasury_stock": proceeds_from_sale_of_treasury_stock,
-            "change_in_cash_and_cash_equivalents": change_in_cash_and_cash_equivalents,
-            "change_in_exchange_rate": change_in_exchange_rate,
-            "net_income": net_income,
-        }
+    docs = cast_bulk_frame(df, STOCKS_FUNDAMENTAL_CASH_FLOW_FIELDS, ticker)
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["fiscal_date_ending"].fillna(today)), docs)
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
-
-
-def ingest_stocks_fundamental_cash_flow(ticker: str, cutoff_days=3650, index_suffix="latest") -> Response:
-    es_url = os.environ.get('ELASTICSEARCH_URL')
-    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_cash_flow_url = f"https://www.alphavantage.co/query?function=CASH_FLOW&symbol={ticker}&apikey={alpha_vantage_api_key}"
+def ingest_stocks_fundamental_cash_flow(ticker: str, cutoff_days=3650, index_suffix="latest",
+                                        client: Optional[AlphaVantageClient] = None, skip_unchanged=True) -> Dict[str, int]:
+    client = client or get_alpha_vantage_client()
 
-    ticker_cash_flow_data = requests.get(alpha_vantage_cash_flow_url).json()
+    ticker_cash_flow_data = client.query("CASH_FLOW", ticker)
     df = pd.json_normalize(ticker_cash_flow_data['annualReports'])
     df["fiscalDateEnding"] = pd.to_datetime(df["fiscalDateEnding"], errors='coerce')
     cutoff = pd.Timestamp.now() - pd.Timedelta(days=cutoff_days)
@@ -654,99 +960,23 @@ def ingest_stocks_fundamental_cash_flow(ticker: str, cutoff_days=3650, index_suf
     pd.set_option('future.no_silent_downcasting', True)
     ticker_recent_cash_flow = ticker_recent_cash_flow.replace({None: 0, 'None': 0, 'null': 0})
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_fundamental_cash_flow(ticker, ticker_recent_cash_flow, index_suffix)
-    )
+    # ten years of reports barely change between runs, only new or restated ones are sent
+    body = format_bulk_stocks_fundamental_cash_flow(ticker, ticker_recent_cash_flow, index_suffix)
+    return write_changed_bulk(ticker, body, skip_unchanged=skip_unchanged)
 
 
 def format_bulk_stocks_fundamental_earnings_estimates(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
     today = datetime.now().strftime('%Y-%m-%d')
     index_name = f"quant-agents_stocks-fundamental-estimated-earnings_{index_suffix}"
-    lines = []
-
-    for _, row in df.iterrows():
-        date = row.get('date').strftime('%Y-%m-%d')
-        horizon = row.get('horizon')
-        eps_estimate_average = float(row.get('eps_estimate_average')) if row.get(
-            'eps_estimate_average') is not None else None
-        eps_estimate_high = float(row.get('eps_estimate_high')) if row.get('eps_estimate_high') is not None else None
-        eps_estimate_low = float(row.get('eps_estimate_low')) if row.get('eps_estimate_low') is not None else None
-        eps_estimate_analyst_count = float(row.get('eps_estimate_analyst_count')) if row.get(
-            'eps_estimate_analyst_count') is not None else None
-        eps_estimate_average_7_days_ago = float(row.get('eps_estimate_average_7_days_ago')) if row.get(
-            'eps_estimate_average_7_days_ago') is not None else None
-        eps_estimate_average_30_days_ago = float(row.get('eps_estimate_average_30_days_ago')) if row.get(
-            'eps_estimate_average_30_days_ago') is not None else None
-        eps_estimate_average_60_days_ago = float(row.get('eps_estimate_average_60_days_ago')) if row.get(
-            'eps_estimate_average_60_days_ago') is not None else None
-        eps_estimate_average_90_days_ago = float(row.get('eps_estimate_average_90_days_ago')) if row.get(
-            'eps_estimate_average_90_days_ago') is not None else None
-        eps_estimate_revision_up_trailing_7_days = float(
-            row.get('eps_estimate_revision_up_trailing_7_days')) if row.get(
-            'eps_estimate_revision_up_trailing_7_days') is not None else None
-        eps_estimate_revision_down_trailing_7_days = float(
-            row.get('eps_estimate_revision_down_trailing_7_days')) if row.get(
-            'eps_estimate_revision_down_trailing_7_days') is not None else None
-        eps_estimate_revision_up_trailing_30_days = float(
-            row.get('eps_estimate_revision_up_trailing_30_days')) if row.get(
-            'eps_estimate_revision_up_trailing_30_days') is not None else None
-        eps_estimate_revision_down_trailing_30_days = float(
-            row.get('eps_estimate_revision_down_trailing_30_days')) if row.get(
-            'eps_estimate_revision_down_trailing_30_days') is not None else None
-        revenue_estimate_average = float(row.get('revenue_estimate_average')) if row.get(
-            'revenue_estimate_average') is not None else None
-        revenue_estimate_high = float(row.get('revenue_estimate_high')) if row.get(
-            'revenue_estimate_high') is not None else None
-        revenue_estimate_low = float(row.get('revenue_estimate_low')) if row.get(
-            'revenue_estimate_low') is not None else None
-        revenue_estimate_analyst_count = float(row.get('revenue_estimate_analyst_count')) if row.get(
-            'revenue_estimate_analyst_count') is not None else None
-
-        id_suffix = date or today
-        id_str = f"{ticker}_{id_suffix}"
-
-        meta = {"index": {"_index": index_name, "_id": id_str}}
-
-        doc = {
-            "key_ticker": ticker,
-            "date": date,
-            "horizon": horizon,
-            "eps_estimate_average": eps_estimate_average,
-            "eps_estimate_high": eps_estimate_high,
-            "eps_estimate_low": eps_estimate_low,
-            "eps_estimate_analyst_count": eps_estimate_analyst_count,
-            "eps_estimate_average_7_days_ago": eps_estimate_average_7_days_ago,
-            "eps_estimate_average_30_days_ago": eps_estimate_average_30_days_ago,
-            "eps_estimate_average_60_days_ago": eps_estimate_average_60_days_ago,
-            "eps_estimate_average_90_days_ago": eps_estimate_average_90_days_ago,
-            "eps_estimate_revision_up_trailing_7_days": eps_estimate_revision_up_trailing_7_days,
-            "eps_estimate_revision_down_trailing_7_days": eps_estimate_revision_down_trailing_7_days,
-            "eps_estimate_revision_up_trailing_30_days": eps_estimate_revision_up_trailing_30_days,
-            "eps_estimate_revision_down_trailing_30_days": eps_estimate_revision_down_trailing_30_days,
-            "revenue_estimate_average": revenue_estimate_average,
-            "revenue_estimate_high": revenue_estimate_high,
-            "revenue_estimate_low": revenue_estimate_low,
-            "revenue_estimate_analyst_count": revenue_estimate_analyst_count,
-        }
+    docs = cast_bulk_frame(df, STOCKS_FUNDAMENTAL_EARNINGS_ESTIMATES_FIELDS, ticker)
+    return encode_bulk(index_name, get_bulk_ids(ticker, docs["date"].fillna(today)), docs)
 
-        lines.append(json.dumps(meta))
-        lines.append(json.dumps(doc))
 
-    return (("\n".join(lines)) + "\n").encode("utf-8")
-
-
-def ingest_stocks_fundamental_earnings_estimates(ticker: str, cutoff_days=3650, index_suffix="latest") -> Response:
-    es_url = os.environ.get('ELASTICSEARCH_URL')
-    es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
-    alpha_vantage_api_key = os.environ.get('ALPHAVANTAGE_API_KEY')
-    alpha_vantage_earnings_estimates_url = f"https://www.alphavantage.co/query?function=EARNINGS_ESTIMATES&symbol={ticker}&apikey={alpha_vantage_api_key}"
+def ingest_stocks_fundamental_earnings_estimates(ticker: str, cutoff_days=3650, index_suffix="latest",
+                                                 client: Optional[AlphaVantageClient] = None, skip_unchanged=True) -> Dict[str, int]:
+    client = client or get_alpha_vantage_client()
 
-    ticker_earnings_estimates_data = requests.get(alpha_vantage_earnings_estimates_url).json()
+    ticker_earnings_estimates_data = client.query("EARNINGS_ESTIMATES", ticker)
     df = pd.json_normalize(ticker_earnings_estimates_data['estimates'])
     df["date"] = pd.to_datetime(df["date"], errors='coerce')
     cutoff = pd.Timestamp.now() - pd.Timedelta(days=cutoff_days)
@@ -754,11 +984,49 @@ def ingest_stocks_fundamental_earnings_estimates(ticker: str, cutoff_days=3650,
     pd.set_option('future.no_silent_downcasting', True)
     ticker_recent_earnings_estimates = ticker_recent_earnings_estimates.replace({None: 0, 'None': 0, 'null': 0})
 
-    return requests.post(
-        url=f"{es_url}/_bulk",
-        headers={
-            'Authorization': f'ApiKey {es_api_key}',
-            'Content-Type': 'application/x-ndjson'
-        },
-        data=format_bulk_stocks_fundamental_earnings_estimates(ticker, ticker_recent_earnings_estimates, index_suffix)
+    # ten years of reports barely change between runs, only new or restated ones are sent
+    body = format_bulk_stocks_fundamental_earnings_estimates(ticker, ticker_recent_earnings_estimates, index_suffix)
+    return write_changed_bulk(ticker, body, skip_unchanged=skip_unchanged)
+
+
+ALPHA_VANTAGE_INGESTERS = {
+    "insider_trades": ingest_stocks_insider_trades,
+    "metadata": ingest_stocks_metadata,
+    "fundamental_income_statement": ingest_stocks_fundamental_income_statement,
+    "fundamental_balance_sheet": ingest_stocks_fundamental_balance_sheet,
+    "fundamental_cash_flow": ingest_stocks_fundamental_cash_flow,
+    "fundamental_earnings_estimates": ingest_stocks_fundamental_earnings_estimates,
+}
+
+
+def ingest_stocks_alpha_vantage(tickers: List[str], ingesters: Optional[List[str]] = None, index_suffix="latest",
+                                client: Optional[AlphaVantageClient] = None, max_workers=8) -> Dict[str, Dict[str, dict]]:
+    """
+    Runs the AlphaVantage ingesters (all of ALPHA_VANTAGE_INGESTERS by default) over many
+    tickers. Every (ticker, ingester) pair is a job on a thread pool sharing one client, the
+    token bucket hands out calls at the quota rate while other workers format and index, so
+    the quota stays fully used without being exceeded. A failed job is reported as
+    {"error": message} instead of aborting the others. Returns the summaries by ticker and ingester.
+    """
+    client = client or get_alpha_vantage_client()
+    names = ingesters or list(ALPHA_VANTAGE_INGESTERS)
+    results = {ticker: {} for ticker in tickers}
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(ALPHA_VANTAGE_INGESTERS[name], ticker, index_suffix=index_suffix, client=client): (ticker, name)
+            for ticker in tickers
+            for name in names
+        }
+        for future in futures:
+            ticker, name = futures[future]
+            try:
+                results[ticker][name] = future.result()
+            except Exception as e:
+                logging.getLogger(__name__).warning(f"AlphaVantage ingestion {name} failed for {ticker}: {e}")
+                results[ticker][name] = {"error": str(e)}
+
+    logging.getLogger(__name__).info(
+        f"AlphaVantage ingestion -> {client.calls} calls, {client.cache_hits} cached responses"
     )
+    return results
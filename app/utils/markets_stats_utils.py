@@ -0,0 +1,134 @@
+import math
+
+import redis
+from typing_extensions import Iterable, List, Optional
+
+CACHE_PREFIX = "markets_stats"
+
+
+def get_volatile_key(key_ticker: str, prefix: str = CACHE_PREFIX) -> str:
+    return f"{prefix}:volatile:{key_ticker}"
+
+
+def invalidate_stats_close_cache(redis_url: str, key_tickers: Iterable[str], prefix: str = CACHE_PREFIX) -> int:
+    """
+    Drops the cached latest stats of the given tickers, meant to be called by the EOD
+    ingestion once new bars are written. Returns the number of deleted entries.
+    """
+    client = redis.StrictRedis.from_url(redis_url)
+    deleted = 0
+    try:
+        for key_ticker in key_tickers:
+            volatile_key = get_volatile_key(key_ticker, prefix)
+            keys = list(client.smembers(volatile_key))
+            deleted += client.delete(*keys, volatile_key)
+    finally:
+        client.close()
+    return deleted
+
+
+def get_stats_close_query(key_ticker: str, close_date: Optional[str]) -> dict:
+    filters = [
+        {
+            "term": {
+                "key_ticker": {
+                    "value": key_ticker
+                }
+            }
+        },
+        {
+            "exists": {
+                "field": "val_close"
+            }
+        }
+    ]
+
+    if close_date is not None:
+        filters.append(
+            {
+                "range": {
+                    "date_reference": {
+                        "lte": close_date
+                    }
+                }
+            }
+        )
+
+    # only the two most recent bars are needed, let the index sort instead of scripting over the history
+    return {
+        "size": 2,
+        "query": {
+            "bool": {
+                "filter": filters
+            }
+        },
+        "sort": [
+            {
+                "date_reference": {
+                    "order": "desc"
+                }
+            }
+        ],
+        "_source": ["date_reference", "val_open", "val_high", "val_low", "val_close", "val_volume"]
+    }
+
+
+def compute_stats_close(hits: list) -> Optional[dict]:
+    if len(hits) < 2:
+        return None
+
+    latest = hits[0]["_source"]
+    prev = hits[1]["_source"]["val_close"]
+    variance = 0 if prev == 0 else ((latest["val_close"] - prev) / prev) * 100
+
+    return {
+        "most_recent_open": latest.get("val_open"),
+        "most_recent_high": latest.get("val_high"),
+        "most_recent_low": latest.get("val_low"),
+        "most_recent_close": latest["val_close"],
+        "most_recent_volume": latest.get("val_volume"),
+        "most_recent_date": latest["date_reference"][:10],
+        # round half up to 2 decimals, as Math.round did in the former Painless reduce script
+        "percent_variance": math.floor(variance * 100.0 + 0.5) / 100.0,
+    }
+
+
+def get_latest_index_name(index_name: str) -> Optional[str]:
+    """
+    quant-agents_stocks-latest_* counterpart of an EOD index or alias, None for patterns
+    and other indices. The EOD ingestion keeps one document per ticker in it.
+    """
+    if "*" in index_name or "," in index_name or "_stocks-eod_" not in index_name:
+        return None
+    return index_name.replace("_stocks-eod_", "_stocks-latest_", 1)
+
+
+def compute_stats_close_latest(source: dict) -> dict:
+    return {
+        "most_recent_open": source.get("val_open"),
+        "most_recent_high": source.get("val_high"),
+        "most_recent_low": source.get("val_low"),
+        "most_recent_close": source["val_close"],
+        "most_recent_volume": source.get("val_volume"),
+        "most_recent_date": source["date_reference"][:10],
+        "percent_variance": source["percent_variance"],
+    }
+
+
+STOCKS_LATEST_BAR_FIELDS = ["val_open", "val_close", "val_high", "val_low", "val_volume"]
+
+
+def format_stocks_latest_doc(ticker: str, hits: List[dict]) -> Optional[dict]:
+    """Latest document of a ticker from its two most recent EOD hits, None with less than two bars."""
+    stats = compute_stats_close(hits)
+    if stats is None:
+        return None
+    latest, prev = hits[0]["_source"], hits[1]["_source"]
+    return {
+        "key_ticker": ticker,
+        "date_reference": stats["most_recent_date"],
+        **{field: latest.get(field) for field in STOCKS_LATEST_BAR_FIELDS},
+        "prev_date_reference": prev["date_reference"][:10],
+        **{f"prev_{field}": prev.get(field) for field in STOCKS_LATEST_BAR_FIELDS},
+        "percent_variance": stats["percent_variance"],
+    }
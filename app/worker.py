@@ -0,0 +1,45 @@
+import logging
+import os
+import signal
+import socket
+import threading
+
+from app.core.container import Container
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def main():
+    """
+    Agent worker process for the messages posted in async mode, run with `python -m app.worker`.
+    Each of the AGENT_WORKERS threads takes one job at a time from the Redis queue, under the
+    worker id `{WORKER_ID}-{index}` (WORKER_ID defaults to the hostname) whose processing list
+    is requeued on the next start.
+    """
+    container = Container()
+    container.tracer().setup()
+    worker = container.message_job_worker()
+    worker_id = os.environ.get("WORKER_ID", socket.gethostname())
+    threads = [
+        threading.Thread(
+            target=worker.run, args=(f"{worker_id}-{index}",), name=f"message-job-worker-{index}"
+        )
+        for index in range(int(os.environ.get("AGENT_WORKERS", "8")))
+    ]
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+    signal.signal(signal.SIGINT, lambda signum, frame: worker.stop())
+
+    logger.info(f"Message job worker -> starting {len(threads)} threads")
+    for thread in threads:
+        thread.start()
+    # the main thread keeps receiving signals while the workers finish their current job
+    while any(thread.is_alive() for thread in threads):
+        for thread in threads:
+            thread.join(timeout=1)
+    logger.info("Message job worker -> stopped")
+
+
+if __name__ == "__main__":
+    main()
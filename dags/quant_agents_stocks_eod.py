@@ -22,11 +22,17 @@ dag = DAG(
     secrets=[Secret('env', None, 'quant-agents-secrets')],
 )
 def load_stocks_eod():
+    import math
     import os
+    import threading
+    import time
     import requests
     import json
     import pandas as pd
-    from datetime import datetime
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+    from datetime import datetime, timedelta
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 
     def format_bulk_stocks_eod(ticker: str, df: pd.DataFrame, index_suffix: str) -> bytes:
         index_name = f"quant-agents_stocks-eod_{index_suffix}"
@@ -62,36 +68,180 @@ def load_stocks_eod():
 
         return (("\n".join(lines)) + "\n").encode("utf-8")
 
-    def ingest_stocks_eod(ticker: str, index_suffix="latest") -> requests.Response:
-        es_url = os.environ.get('ELASTICSEARCH_URL')
-        es_api_key = os.environ.get('ELASTICSEARCH_API_KEY')
+    es_url = os.environ.get('ELASTICSEARCH_URL')
+    max_workers = int(os.environ.get('STOCKS_EOD_WORKERS', '8'))
+    tickers_per_bulk = int(os.environ.get('STOCKS_EOD_TICKERS_PER_BULK', '25'))
+    alpaca_requests_per_minute = int(os.environ.get('STOCKS_EOD_ALPACA_REQUESTS_PER_MINUTE', '200'))
+    # incremental runs only fetch bars from each ticker watermark on, a weekly full refresh
+    # rewrites the rolling year so split and dividend adjustments reach older bars
+    full_refresh = (
+        os.environ.get('STOCKS_EOD_FULL_REFRESH') == "1"
+        or datetime.now().weekday() == int(os.environ.get('STOCKS_EOD_FULL_REFRESH_WEEKDAY', '5'))
+    )
+
+    def create_session(headers: dict) -> requests.Session:
+        # one keep-alive pool per host shared by all workers, 429 and 5xx are retried honoring Retry-After
+        session = requests.Session()
+        retries = Retry(total=5, backoff_factor=1, status_forcelist=[429, 500, 502, 503, 504], allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers, max_retries=retries)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(headers)
+        return session
+
+    alpaca_session = create_session({
+        "accept": "application/json",
+        "APCA-API-KEY-ID": os.environ.get('APCA-API-KEY-ID'),
+        "APCA-API-SECRET-KEY": os.environ.get('APCA-API-SECRET-KEY')
+    })
+    es_session = create_session({
+        'Authorization': f"ApiKey {os.environ.get('ELASTICSEARCH_API_KEY')}",
+        'Content-Type': 'application/x-ndjson'
+    })
+
+    # spaces Alpaca requests evenly so the workers together stay under the plan rate limit
+    rate_limit_lock = threading.Lock()
+    next_request_at = [time.monotonic()]
+
+    def wait_alpaca_rate_limit():
+        with rate_limit_lock:
+            now = time.monotonic()
+            request_at = max(now, next_request_at[0])
+            next_request_at[0] = request_at + 60 / alpaca_requests_per_minute
+        time.sleep(max(0.0, request_at - now))
+
+    def get_watermarks(index_suffix: str, tickers: list) -> dict:
+        # max date_reference of every ticker in one terms aggregation
+        response = es_session.post(
+            url=f"{es_url}/quant-agents_stocks-eod_{index_suffix}/_search",
+            headers={'Content-Type': 'application/json'},
+            data=json.dumps({
+                "size": 0,
+                "query": {"terms": {"key_ticker": tickers}},
+                "aggs": {
+                    "tickers": {
+                        "terms": {"field": "key_ticker", "size": len(tickers)},
+                        "aggs": {"watermark": {"max": {"field": "date_reference", "format": "yyyy-MM-dd"}}}
+                    }
+                }
+            })
+        )
+        response.raise_for_status()
+        buckets = response.json()['aggregations']['tickers']['buckets']
+        return {bucket['key']: bucket['watermark']['value_as_string'] for bucket in buckets}
 
+    def fetch_stocks_eod(ticker: str, watermark: str = None) -> pd.DataFrame:
         now = datetime.now()
-        end = now.replace(day=now.day - 1)
-        start = now.replace(year=now.year - 1)
-        alpaca_time_series_url = f"https://data.alpaca.markets/v2/stocks/{ticker}/bars?timeframe=1D&start={start.strftime('%Y-%m-%d')}&end={end.strftime('%Y-%m-%d')}&adjustment=all"
-        response = requests.get(alpaca_time_series_url, headers={
-            "accept": "application/json",
-            "APCA-API-KEY-ID": os.environ.get('APCA-API-KEY-ID'),
-            "APCA-API-SECRET-KEY": os.environ.get('APCA-API-SECRET-KEY')
-        })
-        ticker_daily_time_series = pd.json_normalize(response.json().get('bars'))
-
-        return requests.post(
-            url=f"{es_url}/_bulk",
-            headers={
-                'Authorization': f'ApiKey {es_api_key}',
-                'Content-Type': 'application/x-ndjson'
-            },
-            data=format_bulk_stocks_eod(ticker, ticker_daily_time_series, index_suffix)
-        )
+        end = (now - timedelta(days=1)).strftime('%Y-%m-%d')
+        # the watermark bar is fetched again so a late correction of it is picked up
+        start = watermark or now.replace(year=now.year - 1).strftime('%Y-%m-%d')
+        if start > end:
+            return pd.DataFrame()
+        alpaca_time_series_url = f"https://data.alpaca.markets/v2/stocks/{ticker}/bars?timeframe=1D&start={start}&end={end}&adjustment=all"
+        wait_alpaca_rate_limit()
+        response = alpaca_session.get(alpaca_time_series_url)
+        return pd.json_normalize(response.json().get('bars'))
+
+    def update_stocks_latest(index_suffix: str, tickers: list):
+        # same documents as app.utils.data_ingestion_utils.update_stocks_latest, read by _id in /markets/stats_close
+        eod_index = f"quant-agents_stocks-eod_{index_suffix}"
+        es_session.post(url=f"{es_url}/{eod_index}/_refresh").raise_for_status()
+        searches = []
+        for ticker in tickers:
+            searches.append({})
+            searches.append({
+                "size": 2,
+                "query": {"bool": {"filter": [{"term": {"key_ticker": {"value": ticker}}}, {"exists": {"field": "val_close"}}]}},
+                "sort": [{"date_reference": {"order": "desc"}}],
+                "_source": ["date_reference", "val_open", "val_high", "val_low", "val_close", "val_volume"]
+            })
+        response = es_session.post(url=f"{es_url}/{eod_index}/_msearch", data="\n".join(json.dumps(search) for search in searches) + "\n")
+        response.raise_for_status()
+
+        lines = []
+        for ticker, item in zip(tickers, response.json()['responses']):
+            hits = item.get('hits', {}).get('hits', [])
+            if len(hits) < 2:
+                continue
+            latest, prev = hits[0]['_source'], hits[1]['_source']
+            variance = 0 if prev['val_close'] == 0 else ((latest['val_close'] - prev['val_close']) / prev['val_close']) * 100
+            doc = {
+                "key_ticker": ticker,
+                "date_reference": latest['date_reference'][:10],
+                **{field: latest.get(field) for field in ["val_open", "val_close", "val_high", "val_low", "val_volume"]},
+                "prev_date_reference": prev['date_reference'][:10],
+                **{f"prev_{field}": prev.get(field) for field in ["val_open", "val_close", "val_high", "val_low", "val_volume"]},
+                "percent_variance": math.floor(variance * 100.0 + 0.5) / 100.0,
+            }
+            for suffix in dict.fromkeys([index_suffix, "latest"]):
+                lines.append(json.dumps({"index": {"_index": f"quant-agents_stocks-latest_{suffix}", "_id": ticker}}))
+                lines.append(json.dumps(doc))
+        if lines:
+            es_session.post(url=f"{es_url}/_bulk", data="\n".join(lines) + "\n").raise_for_status()
+
+    def ingest_stocks_eod_batch(companies: list) -> dict:
+        # many tickers share one bulk body, each action line carries its own index
+        bodies = []
+        for company in companies:
+            ticker_daily_time_series = fetch_stocks_eod(company["key_ticker"], watermarks.get(company["key_ticker"]))
+            body = format_bulk_stocks_eod(company["key_ticker"], ticker_daily_time_series, company["index"])
+            if body.strip():
+                bodies.append(body)
+        if not bodies:
+            return {"items": [], "errors": False}
+        response = es_session.post(url=f"{es_url}/_bulk", data=b"".join(bodies))
+        if not response.ok:
+            return {"errors": True, "status": response.status_code}
+
+        # the bars are indexed at this point, a failed latest refresh is reported without failing the batch
+        for index_suffix in {company["index"] for company in companies}:
+            suffix_tickers = [company["key_ticker"] for company in companies if company["index"] == index_suffix]
+            try:
+                update_stocks_latest(index_suffix, suffix_tickers)
+            except Exception as e:
+                print(f"Latest stocks update failed for {suffix_tickers} in {index_suffix}: {e}")
+        return response.json()
+
+    def invalidate_stats_close_cache(tickers: list):
+        # same layout as app.services.markets_stats_cache, drops the cached latest stats of the tickers
+        import redis
+        client = redis.StrictRedis.from_url(os.environ.get('BROKER_URL'))
+        for ticker in tickers:
+            volatile_key = f"markets_stats:volatile:{ticker}"
+            client.delete(*client.smembers(volatile_key), volatile_key)
+        client.close()
 
     api_endpoint = "https://quaks.ai"
     indexed_key_ticker_list = requests.get(f"{api_endpoint}/json/indexed_key_ticker_list.json").json()
-
-    for company in indexed_key_ticker_list:
-        stocks_eod_response = ingest_stocks_eod(company["key_ticker"],  company["index"])
-        print(f"Ingestion complete stocks EOD for {company["key_ticker"]}, index {company["index"]}: {stocks_eod_response.json()}")
+    watermarks = {}
+    if not full_refresh:
+        for index_suffix in {company["index"] for company in indexed_key_ticker_list}:
+            watermarks.update(get_watermarks(
+                index_suffix, [company["key_ticker"] for company in indexed_key_ticker_list if company["index"] == index_suffix]
+            ))
+    print(f"Ingestion stocks EOD {'full refresh' if full_refresh else 'incremental'}, {len(watermarks)} watermarks")
+
+    batches = [
+        indexed_key_ticker_list[i:i + tickers_per_bulk]
+        for i in range(0, len(indexed_key_ticker_list), tickers_per_bulk)
+    ]
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(ingest_stocks_eod_batch, batch): batch for batch in batches}
+        for future in as_completed(futures):
+            tickers = [company["key_ticker"] for company in futures[future]]
+            try:
+                bulk_response = future.result()
+            except Exception as e:
+                print(f"Ingestion failed stocks EOD for {tickers}: {e}")
+                continue
+            print(f"Ingestion complete stocks EOD for {tickers}: {len(bulk_response.get('items', []))} items, errors: {bulk_response.get('errors')}")
+            if os.environ.get('BROKER_URL') and 'items' in bulk_response:
+                # cached stats expire on their own, a Redis outage must not stop the remaining batches
+                try:
+                    invalidate_stats_close_cache(tickers)
+                except Exception as e:
+                    print(f"Stats close cache invalidation failed for {tickers}: {e}")
 
 with dag:
     load_stocks_eod()
@@ -78,6 +78,39 @@ resource "elasticstack_elasticsearch_index" "sp500" {
   depends_on = [elasticstack_elasticsearch_index_template.quant-agents_stocks-eod_template]
 }
 
+resource "elasticstack_elasticsearch_index_template" "quant-agents_stocks-latest_template" {
+  name = "quant-agents_stocks-latest_template"
+
+  index_patterns = ["quant-agents_stocks-latest_*"]
+
+  template {
+    mappings = jsonencode({
+      dynamic = "strict"
+      properties = {
+        key_ticker          = { type = "keyword" }
+        date_reference      = { type = "date", format = "yyyy-MM-dd" }
+        val_open            = { type = "double" }
+        val_close           = { type = "double" }
+        val_high            = { type = "double" }
+        val_low             = { type = "double" }
+        val_volume          = { type = "double" }
+        prev_date_reference = { type = "date", format = "yyyy-MM-dd" }
+        prev_val_open       = { type = "double" }
+        prev_val_close      = { type = "double" }
+        prev_val_high       = { type = "double" }
+        prev_val_low        = { type = "double" }
+        prev_val_volume     = { type = "double" }
+        percent_variance    = { type = "double" }
+      }
+    })
+
+    settings = jsonencode({
+      number_of_shards   = 1
+      number_of_replicas = 1
+    })
+  }
+}
+
 resource "elasticstack_elasticsearch_index_template" "quant-agents_stocks-insider-trades_template" {
   name = "quant-agents_stocks-insider-trades_template"
 
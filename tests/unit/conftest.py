@@ -0,0 +1,37 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# the Container reads config-test.yml instead of Vault, as in tests/conftest.py
+os.environ["TESTING"] = "1"
+
+
+# unit tests run without the containers started by the session fixtures of tests/conftest.py
+@pytest.fixture(scope="session", autouse=True)
+def test_config():
+    yield
+
+
+@pytest.fixture(scope="function", autouse=True)
+def set_access_token():
+    yield
+
+
+@pytest.fixture
+def ohlcv():
+    # random walk daily bars, indexed by date like the frames read from the EOD index
+    rng = np.random.default_rng(42)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 150)))
+    spread = close * rng.uniform(0.005, 0.03, 150)
+    yield pd.DataFrame(
+        {
+            "val_open": close + rng.uniform(-0.5, 0.5, 150) * spread,
+            "val_high": close + spread,
+            "val_low": close - spread,
+            "val_close": close,
+            "val_volume": rng.integers(1_000, 100_000, 150).astype(np.float64),
+        },
+        index=pd.Index(pd.date_range("2024-01-01", periods=150, freq="B"), name="date_reference"),
+    )
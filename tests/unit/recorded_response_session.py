@@ -0,0 +1,43 @@
+import hashlib
+import json
+import os
+
+import requests
+from requests import Response
+from typing_extensions import Optional
+
+
+class RecordedResponseSession:
+    """
+    Offline stand-in for requests.Session GET calls. Responses are replayed from JSON files
+    under `directory`, one per url and params. When a live `session` is given, missing
+    responses are fetched through it and recorded, later runs then need no network.
+    """
+
+    def __init__(self, directory: str, session: Optional[requests.Session] = None):
+        self.directory = directory
+        self.session = session
+
+    def get_path(self, url: str, params: Optional[dict]) -> str:
+        key = json.dumps([url, sorted((params or {}).items())])
+        return os.path.join(self.directory, f"{hashlib.sha256(key.encode('utf-8')).hexdigest()[:24]}.json")
+
+    def get(self, url: str, params: Optional[dict] = None, **kwargs) -> Response:
+        path = self.get_path(url, params)
+
+        if not os.path.exists(path):
+            if self.session is None:
+                raise FileNotFoundError(f"No recorded response for {url} {params}")
+            response = self.session.get(url, params=params, **kwargs)
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump({"url": url, "params": params, "status_code": response.status_code, "body": response.json()}, f)
+            return response
+
+        with open(path) as f:
+            recorded = json.load(f)
+        response = Response()
+        response.status_code = recorded["status_code"]
+        response.url = url
+        response._content = json.dumps(recorded["body"]).encode("utf-8")
+        return response
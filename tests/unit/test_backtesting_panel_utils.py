@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import backtesting_utils
+from app.utils.backtesting_panel_utils import PANEL_INDICATORS, Panel, get_panel_indicators, stack_panel
+
+
+@pytest.fixture
+def tickers(ohlcv):
+    # a second ticker with its own path and a third listed a month later than the others
+    reversed_bars = pd.DataFrame(ohlcv.to_numpy()[::-1], index=ohlcv.index, columns=ohlcv.columns)
+    yield {"AAA": ohlcv, "BBB": reversed_bars, "CCC": 0.5 * ohlcv.iloc[20:]}
+
+
+def to_long(tickers):
+    return pd.concat([df.assign(key_ticker=key_ticker) for key_ticker, df in tickers.items()]).reset_index()
+
+
+@pytest.mark.parametrize("indicator", sorted(PANEL_INDICATORS))
+def test_panel_matches_backtesting_utils(tickers, indicator):
+    frames = get_panel_indicators(to_long(tickers), {indicator: {}})[indicator]
+
+    for key_ticker, df in tickers.items():
+        reference = getattr(backtesting_utils, f"get_{indicator}")(df)
+        df_reference, df_crossovers = reference if isinstance(reference, tuple) else (reference, None)
+
+        kept = frames["position"][key_ticker].dropna()
+        assert kept.index.equals(df_reference.index)
+        columns = [column for column in frames if column in df_reference.columns]
+        assert "position" in columns and len(columns) > 1
+        for column in columns:
+            np.testing.assert_allclose(
+                frames[column][key_ticker].loc[kept.index], df_reference[column], rtol=1e-7, atol=1e-9,
+                err_msg=f"{indicator} {column} {key_ticker}"
+            )
+        if df_crossovers is not None:
+            crossover = frames["crossover"][key_ticker]
+            assert crossover[crossover].index.equals(df_crossovers.index)
+
+
+def test_panel_from_wide_and_stack_panel(tickers):
+    close = pd.DataFrame({key_ticker: df["val_close"] for key_ticker, df in tickers.items()})
+    frames = get_panel_indicators(Panel.from_wide(close), {"sma": {"short_window": 5, "long_window": 10}})["sma"]
+
+    df_long = stack_panel({"sma_short": frames["sma_short"], "position": frames["position"]})
+    assert df_long.index.names == ["date_reference", "key_ticker"]
+    df_sma, _ = backtesting_utils.get_sma(tickers["CCC"], 5, 10)
+    np.testing.assert_allclose(df_long.xs("CCC", level="key_ticker")["sma_short"].dropna(), df_sma["sma_short"])
+
+
+def test_panel_unknown_output(tickers):
+    with pytest.raises(ValueError):
+        get_panel_indicators(to_long(tickers), {"rsi": {}}, outputs={"rsi": ["sma_short"]})
@@ -0,0 +1,108 @@
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils import backtesting_utils
+from app.utils.backtesting_streaming_utils import (
+    IndicatorState,
+    create_indicator_state,
+    dump_indicator_states,
+    load_indicator_states,
+)
+
+STREAMING_REFERENCES = [
+    ("sma", {"short_window": 5, "long_window": 20}, backtesting_utils.get_sma, ["sma_short", "sma_long"]),
+    ("ema", {"short_window": 5, "long_window": 20}, backtesting_utils.get_ema, ["ema_short", "ema_long"]),
+    ("rsi", {"period": 7}, backtesting_utils.get_rsi, ["rsi"]),
+    ("adx", {"period": 14}, backtesting_utils.get_adx, ["plus_di", "minus_di", "adx"]),
+    ("macd", {}, backtesting_utils.get_macd, ["macd", "signal", "histogram"]),
+    ("obv", {}, backtesting_utils.get_obv, ["obv"]),
+    ("ad", {}, backtesting_utils.get_ad, ["ad_line"]),
+]
+
+
+def replay(state: IndicatorState, df: pd.DataFrame) -> pd.DataFrame:
+    rows = [state.update(bar) for bar in df.reset_index().to_dict(orient="records")]
+    return pd.DataFrame(rows, index=df.index)
+
+
+@pytest.mark.parametrize("kind, params, reference, columns", STREAMING_REFERENCES)
+def test_streaming_matches_backtesting_utils(ohlcv, kind, params, reference, columns):
+    df_reference, _ = reference(ohlcv, **params)
+    df_streaming = replay(create_indicator_state(kind, params), ohlcv).loc[df_reference.index]
+
+    for column in columns:
+        np.testing.assert_allclose(df_streaming[column].astype(float), df_reference[column], rtol=1e-9)
+    assert df_streaming["position"].tolist() == df_reference["position"].tolist()
+
+
+def test_seed_and_reload_continue_the_stream(ohlcv):
+    states = {"T": create_indicator_state("macd")}
+    states["T"].seed(ohlcv.iloc[:100])
+    states = load_indicator_states(dump_indicator_states(states))
+
+    expected = replay(create_indicator_state("macd"), ohlcv).iloc[-1]
+    result = replay(states["T"], ohlcv.iloc[100:]).iloc[-1]
+    assert result["macd"] == pytest.approx(expected["macd"])
+    assert states["T"].last_date == "2024-07-26"
+
+
+def test_indicator_state_is_abstract():
+    with pytest.raises(TypeError):
+        IndicatorState(kind="custom")
+
+
+def test_ema_skips_nan_closes_until_seeded(ohlcv):
+    df = ohlcv.copy()
+    df.iloc[:3, df.columns.get_loc("val_close")] = np.nan
+    df_streaming = replay(create_indicator_state("ema", {"short_window": 5, "long_window": 20}), df)
+
+    assert df_streaming["position"].iloc[:3].isna().all()
+    expected = df["val_close"].ewm(span=5, adjust=False).mean()
+    assert df_streaming["ema_short"].iloc[-1] == pytest.approx(expected.iloc[-1])
+    assert not math.isnan(df_streaming["position"].iloc[3])
+
+
+@pytest.mark.parametrize("kind, params, reference, columns", [
+    ("sma", {"short_window": 5, "long_window": 20}, backtesting_utils.get_sma, ["sma_short", "sma_long"]),
+    ("ema", {"short_window": 5, "long_window": 20}, backtesting_utils.get_ema, ["ema_short", "ema_long"]),
+    ("macd", {}, backtesting_utils.get_macd, ["macd", "signal", "histogram"]),
+    ("obv", {}, backtesting_utils.get_obv, ["obv"]),
+])
+@pytest.mark.parametrize("missing", [[0, 1], [40], [60, 61, 90]])
+def test_streaming_matches_backtesting_utils_with_missing_closes(ohlcv, kind, params, reference, columns, missing):
+    df = ohlcv.copy()
+    df.iloc[missing, df.columns.get_loc("val_close")] = np.nan
+    df_reference, _ = reference(df, **params)
+    df_streaming = replay(create_indicator_state(kind, params), df).loc[df_reference.index]
+
+    for column in columns:
+        np.testing.assert_allclose(df_streaming[column].astype(float), df_reference[column], rtol=1e-9)
+    assert df_streaming["position"].tolist() == df_reference["position"].tolist()
+
+
+def test_sma_state_recovers_after_a_missing_close():
+    state = create_indicator_state("sma", {"short_window": 2, "long_window": 3})
+    outputs = [state.update({"val_close": close})["sma_short"] for close in [1.0, 2.0, math.nan, 4.0, 5.0, 6.0]]
+
+    assert outputs == [None, 1.5, None, None, 4.5, 5.5]
+    state = load_indicator_states(dump_indicator_states({"T": state}))["T"]
+    assert state.update({"val_close": 7.0})["sma_short"] == 6.5
+
+
+def test_obv_state_counts_missing_closes_as_flat():
+    state = create_indicator_state("obv")
+    bars = [(10.0, 100.0), (math.nan, 200.0), (11.0, 300.0), (12.0, 400.0)]
+    outputs = [state.update({"val_close": close, "val_volume": volume}) for close, volume in bars]
+
+    assert [output["obv"] for output in outputs] == [0.0, 0.0, 0.0, 400.0]
+    assert [output["position"] for output in outputs] == [None, 0, 0, 1]
+
+
+def test_macd_state_waits_for_the_first_close():
+    state = create_indicator_state("macd")
+
+    assert state.update({"val_close": math.nan})["macd"] is None
+    assert state.update({"val_close": 10.0})["macd"] == 0.0
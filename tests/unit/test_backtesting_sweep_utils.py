@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.backtesting_sweep_utils import get_ema_sweep, get_rolling_means, get_sma_sweep
+from app.utils.backtesting_utils import get_ema, get_sma
+
+
+@pytest.fixture
+def df():
+    rng = np.random.default_rng(7)
+    yield pd.DataFrame({"val_close": 100 * np.exp(np.cumsum(rng.normal(0, 0.02, 120)))})
+
+
+@pytest.mark.parametrize("sweep, backtest", [(get_sma_sweep, get_sma), (get_ema_sweep, get_ema)])
+def test_sweep_matches_single_backtests(df, sweep, backtest):
+    df_results = sweep(df, short_windows=[3, 5, 10], long_windows=[8, 20, 40])
+
+    assert len(df_results) == 8
+    for row in df_results.itertuples():
+        df_backtest, df_crossovers = backtest(df, int(row.short_window), int(row.long_window))
+        assert row.returns == pytest.approx(np.exp(df_backtest["returns"].sum()))
+        assert row.strategy == pytest.approx(np.exp(df_backtest["strategy"].sum()))
+        assert row.trades == len(df_crossovers)
+
+
+def test_rolling_means_skip_windows_with_nan():
+    close = np.array([1.0, 2.0, np.nan, 4.0, 5.0, 6.0, 7.0])
+    means = get_rolling_means(close, [2, 3])
+
+    for window, values in means.items():
+        np.testing.assert_allclose(values, pd.Series(close).rolling(window).mean().to_numpy())
+
+
+def test_ema_sweep_on_empty_frame():
+    df_results = get_ema_sweep(pd.DataFrame({"val_close": []}), short_windows=[3], long_windows=[8])
+
+    assert df_results[["returns", "strategy", "trades"]].values.tolist() == [[1.0, 1.0, 0]]
@@ -0,0 +1,68 @@
+import pandas as pd
+import pytest
+
+from app.utils.backtesting_universe_utils import STRATEGIES, backtest_universe, summarize_backtest
+
+
+def obv_long_history(df):
+    # module level so the pool can pickle it
+    if len(df) < 100:
+        raise ValueError("not enough bars")
+    return STRATEGIES["obv"](df)
+
+
+@pytest.fixture
+def universe(ohlcv):
+    # tickers of different lengths and price levels, so a wrong row range shows up in the summaries
+    yield {
+        "AAPL": ohlcv,
+        "MSFT": ohlcv.iloc[30:] * 2.5,
+        "IBM": ohlcv.iloc[:90] / 3,
+    }
+
+
+@pytest.mark.parametrize(
+    "strategy, params", [("sma", {"short_window": 5, "long_window": 20}), ("macd", {}), ("obv", {})]
+)
+def test_backtest_universe_matches_single_backtests(universe, strategy, params):
+    results = {summary["key_ticker"]: summary for summary in backtest_universe(strategy, params, universe, workers=2)}
+
+    assert sorted(results) == sorted(universe)
+    for key_ticker, df in universe.items():
+        expected = summarize_backtest(key_ticker, STRATEGIES[strategy](df, **params))
+        summary = results[key_ticker]
+        assert {k: summary[k] for k in ("bars", "date_start", "date_end", "trades")} == {
+            k: expected[k] for k in ("bars", "date_start", "date_end", "trades")
+        }
+        for field in ("position", "returns", "strategy"):
+            assert summary[field] == pytest.approx(expected[field], nan_ok=True)
+
+
+def test_backtest_universe_from_long_frame(universe):
+    df = pd.concat(
+        [df.assign(key_ticker=key_ticker) for key_ticker, df in universe.items()]
+    ).reset_index().sample(frac=1, random_state=3)
+
+    results = {summary["key_ticker"]: summary for summary in backtest_universe("sma", None, df, workers=2)}
+
+    for key_ticker, df_ticker in universe.items():
+        expected = summarize_backtest(key_ticker, STRATEGIES["sma"](df_ticker))
+        assert results[key_ticker]["bars"] == expected["bars"]
+        assert results[key_ticker]["strategy"] == pytest.approx(expected["strategy"])
+
+
+def test_backtest_universe_reports_failing_tickers(universe):
+    results = {summary["key_ticker"]: summary for summary in backtest_universe(obv_long_history, None, universe)}
+
+    assert results["IBM"] == {"key_ticker": "IBM", "error": "not enough bars"}
+    for key_ticker in ("AAPL", "MSFT"):
+        assert results[key_ticker] == summarize_backtest(key_ticker, obv_long_history(universe[key_ticker]))
+
+
+def test_backtest_universe_rejects_unknown_strategy(universe):
+    with pytest.raises(ValueError):
+        list(backtest_universe("wma", None, universe))
+
+
+def test_backtest_universe_without_tickers():
+    assert list(backtest_universe("sma", None, {})) == []
@@ -0,0 +1,55 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.utils.backtesting_utils import (
+    get_periods_since_max,
+    get_periods_since_min,
+    get_rolling_max,
+    get_rolling_min,
+)
+
+
+def naive_rolling_extreme(values, window, find_max):
+    # reference: window by window with pandas, ties resolve to the oldest bar like np.argmax
+    values = pd.Series(values, dtype=np.float64)
+    extreme = values.rolling(window).max() if find_max else values.rolling(window).min()
+    arg = np.argmax if find_max else np.argmin
+    periods_since = values.rolling(window).apply(lambda w: window - 1 - arg(w), raw=True)
+    return extreme.to_numpy(), periods_since.to_numpy()
+
+
+@pytest.mark.parametrize("window", [1, 2, 3, 5, 7])
+@pytest.mark.parametrize("find_max", [True, False])
+def test_rolling_extreme_with_ties_and_nan(window, find_max):
+    rng = np.random.default_rng(window)
+    # few distinct levels so most windows hold ties, NaN at the start, middle and end
+    values = rng.integers(0, 4, 40).astype(np.float64)
+    values[[0, 17, 18, 39]] = np.nan
+    extreme, periods_since = naive_rolling_extreme(values, window, find_max)
+
+    get_extreme, get_periods_since = (
+        (get_rolling_max, get_periods_since_max) if find_max else (get_rolling_min, get_periods_since_min)
+    )
+    np.testing.assert_array_equal(get_extreme(values, window), extreme)
+    np.testing.assert_array_equal(get_periods_since(values, window), periods_since)
+
+
+def test_rolling_extreme_ties_resolve_to_the_oldest_bar():
+    values = [1.0, 3.0, 3.0, 2.0, 3.0]
+
+    np.testing.assert_array_equal(get_periods_since_max(values, 3), [np.nan, np.nan, 1, 2, 2])
+    np.testing.assert_array_equal(get_periods_since_min([2.0, 2.0, 2.0], 2), [np.nan, 1, 1])
+
+
+def test_rolling_extreme_on_a_panel():
+    rng = np.random.default_rng(0)
+    values = rng.integers(0, 5, (30, 3)).astype(np.float64)
+    values[10, 1] = np.nan
+
+    expected = np.column_stack([naive_rolling_extreme(values[:, i], 4, True)[1] for i in range(3)])
+    np.testing.assert_array_equal(get_periods_since_max(values, 4), expected)
+
+
+def test_rolling_extreme_window_longer_than_series():
+    assert np.isnan(get_rolling_max([1.0, 2.0], 3)).all()
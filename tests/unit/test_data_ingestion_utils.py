@@ -0,0 +1,162 @@
+from pathlib import Path
+
+import orjson
+import pandas as pd
+import pytest
+from requests import Response
+
+from app.utils import data_ingestion_utils
+from app.utils.data_ingestion_utils import (
+    AlpacaBarsClient,
+    BulkManifest,
+    BulkWriter,
+    encode_bulk,
+    format_bulk_stocks_eod_pages,
+    ingest_stocks_eod_tickers,
+    write_changed_bulk,
+)
+from tests.unit.recorded_response_session import RecordedResponseSession
+
+RECORDED_BARS = Path(__file__).parent / "fixtures" / "alpaca_bars"
+
+
+@pytest.fixture
+def client():
+    yield AlpacaBarsClient(session=RecordedResponseSession(str(RECORDED_BARS)), page_limit=3)
+
+
+def test_bars_pages_follow_next_page_token(client):
+    pages = list(client.get_bars_pages(["AAPL", "MSFT"], "2024-01-02", "2024-01-04"))
+
+    assert len(pages) == 2
+    merged = {}
+    for page in pages:
+        for symbol, bars in page.items():
+            merged.setdefault(symbol, []).extend(bar["t"][:10] for bar in bars)
+    assert merged == {
+        "AAPL": ["2024-01-02", "2024-01-03"],
+        "MSFT": ["2024-01-02", "2024-01-03", "2024-01-04"],
+    }
+
+
+def test_bars_requests_are_bounded_by_a_timeout():
+    calls = []
+
+    class Session(RecordedResponseSession):
+        def get(self, url, params=None, **kwargs):
+            calls.append(kwargs)
+            return super().get(url, params, **kwargs)
+
+    client = AlpacaBarsClient(session=Session(str(RECORDED_BARS)), page_limit=3, timeout=5)
+    list(client.get_bars_pages(["AAPL", "MSFT"], "2024-01-02", "2024-01-04"))
+
+    assert [call["timeout"] for call in calls] == [5, 5]
+
+
+def test_bars_pages_encode_bulk_bodies(client):
+    pages = client.get_bars_pages(["AAPL", "MSFT"], "2024-01-02", "2024-01-04")
+    bodies = list(format_bulk_stocks_eod_pages(pages, index_suffix="nasdaq_100", index_suffixes={"MSFT": "sp_500"}))
+
+    assert [symbols for symbols, _ in bodies] == [["AAPL", "MSFT"], ["MSFT"]]
+    actions = [
+        orjson.loads(line)["index"]
+        for _, body in bodies
+        for line in body.split(b"\n")[0::2] if line
+    ]
+    assert [(action["_index"], action["_id"]) for action in actions] == [
+        ("quant-agents_stocks-eod_nasdaq_100", "AAPL_2024-01-02"),
+        ("quant-agents_stocks-eod_nasdaq_100", "AAPL_2024-01-03"),
+        ("quant-agents_stocks-eod_sp_500", "MSFT_2024-01-02"),
+        ("quant-agents_stocks-eod_sp_500", "MSFT_2024-01-03"),
+        ("quant-agents_stocks-eod_sp_500", "MSFT_2024-01-04"),
+    ]
+
+
+def test_recorded_session_without_recording_raises(tmp_path):
+    session = RecordedResponseSession(str(tmp_path))
+    with pytest.raises(FileNotFoundError):
+        session.get("https://data.alpaca.markets/v2/stocks/bars", params={"symbols": "AAPL"})
+
+
+def test_empty_frame_keeps_bulk_pairs(tmp_path):
+    docs = pd.DataFrame({"val_close": [1.0, 2.0]})
+    empty = encode_bulk("index", [], docs.iloc[:0])
+    body = encode_bulk("index", ["a", "b"], docs) + empty + encode_bulk("index", ["c"], docs.iloc[:1])
+
+    assert empty == b""
+    chunks = list(BulkWriter("http://localhost:9200", "key")._chunks([body, b"\n"]))
+    assert [orjson.loads(pair.split(b"\n")[0])["index"]["_id"] for pair in chunks[0]] == ["a", "b", "c"]
+
+    _, hashes = BulkManifest(str(tmp_path)).select_changed("T", body)
+    assert list(hashes["index"]) == ["a", "b", "c"]
+
+
+class BulkSession:
+    def __init__(self):
+        self.calls = []
+
+    def post(self, url, data, **kwargs):
+        self.calls.append(kwargs)
+        response = Response()
+        response.status_code = 200
+        items = [{"index": {"status": 201}} for _ in data.split(b"\n")[0::2] if _]
+        response._content = orjson.dumps({"items": items})
+        return response
+
+
+def test_bulk_writer_uses_injected_session_with_timeout():
+    session = BulkSession()
+    body = encode_bulk("index", ["a", "b"], pd.DataFrame({"val_close": [1.0, 2.0]}))
+
+    for _ in range(2):
+        summary = BulkWriter("http://localhost:9200", "key", session=session, timeout=(1.0, 5.0)).write([body])
+        assert summary["indexed"] == 2
+
+    assert len(session.calls) == 2
+    assert all(call["timeout"] == (1.0, 5.0) for call in session.calls)
+    assert session.calls[0]["headers"]["Authorization"] == "ApiKey key"
+
+
+def test_bulk_writers_share_the_default_session():
+    assert BulkWriter("http://localhost:9200", "key").session is BulkWriter("http://localhost:9200", "other").session
+
+
+def test_manifest_requires_a_directory(monkeypatch):
+    monkeypatch.delenv("INGESTION_MANIFEST_DIR", raising=False)
+    with pytest.raises(ValueError):
+        BulkManifest()
+
+
+def test_write_changed_bulk_skips_unchanged_documents(monkeypatch, tmp_path):
+    session = BulkSession()
+    monkeypatch.setattr(data_ingestion_utils, "get_bulk_session", lambda: session)
+    docs = pd.DataFrame({"val_close": [1.0, 2.0]})
+    body = encode_bulk("index", ["a", "b"], docs)
+
+    monkeypatch.delenv("INGESTION_MANIFEST_DIR", raising=False)
+    assert write_changed_bulk("T", body)["skipped"] == 0
+
+    monkeypatch.setenv("INGESTION_MANIFEST_DIR", str(tmp_path))
+    assert write_changed_bulk("T", body)["indexed"] == 2
+    summary = write_changed_bulk("T", encode_bulk("index", ["a", "b"], docs.assign(val_close=[1.0, 3.0])))
+    assert (summary["indexed"], summary["skipped"]) == (1, 1)
+
+
+def test_ingest_stocks_eod_tickers_refreshes_latest_once(monkeypatch):
+    ingested, refreshed = [], []
+
+    def ingest_stocks_eod(ticker, index_suffix, source, full_refresh, watermark, update_latest=True):
+        ingested.append((ticker, watermark, update_latest))
+        return {"indexed": 0 if ticker == "IBM" else 1, "errors": 0}
+
+    monkeypatch.setattr(data_ingestion_utils, "ingest_stocks_eod", ingest_stocks_eod)
+    monkeypatch.setattr(data_ingestion_utils, "get_stocks_eod_watermarks",
+                        lambda tickers, index_suffix: {"AAPL": "2024-01-03"})
+    monkeypatch.setattr(data_ingestion_utils, "refresh_stocks_latest",
+                        lambda tickers, index_suffix: refreshed.append((tickers, index_suffix)))
+
+    summaries = ingest_stocks_eod_tickers(["AAPL", "MSFT", "IBM"], full_refresh=False)
+
+    assert list(summaries) == ["AAPL", "MSFT", "IBM"]
+    assert ingested == [("AAPL", "2024-01-03", False), ("MSFT", None, False), ("IBM", None, False)]
+    assert refreshed == [(["AAPL", "MSFT"], "latest")]
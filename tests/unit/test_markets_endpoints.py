@@ -0,0 +1,190 @@
+import elasticsearch
+import pyarrow as pa
+import pytest
+from dependency_injector import providers
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.container import Container
+from app.interface.api.markets.endpoints import router as markets_router
+from app.services.markets_indicators import MarketsIndicatorsCache
+from app.services.markets_stats_cache import MarketsStatsCache
+from app.utils import backtesting_utils
+
+EOD_INDEX = "quant-agents_stocks-eod_latest"
+
+
+class FakeElasticsearch:
+    """Answers the queries of the markets services from in-memory bars and latest documents."""
+
+    def __init__(self, bars: dict, latest: dict):
+        self.bars = bars
+        self.latest = latest
+        self.calls = []
+
+    def _hits(self, body: dict) -> list:
+        filters = body["query"]["bool"]["filter"]
+        key_ticker = filters[0]["term"]["key_ticker"]["value"]
+        date_range = next((f["range"]["date_reference"] for f in filters if "range" in f), {})
+        bars = [
+            bar for bar in self.bars.get(key_ticker, [])
+            if date_range.get("gte", "") <= bar["date_reference"] <= date_range.get("lte", "9999")
+        ]
+        bars.sort(key=lambda bar: bar["date_reference"], reverse=body["sort"][0]["date_reference"]["order"] == "desc")
+        bars = bars[:body["size"]]
+
+        if "docvalue_fields" not in body:
+            return [{"_source": bar} for bar in bars]
+        fields = [field for field in body["docvalue_fields"] if isinstance(field, str)]
+        return [
+            {
+                "fields": {"date_reference": [bar["date_reference"]], **{field: [bar[field]] for field in fields}},
+                "sort": [bar["date_reference"]],
+            }
+            for bar in bars
+        ]
+
+    async def get(self, index, id, **kwargs):
+        self.calls.append("get")
+        if id not in self.latest:
+            raise elasticsearch.NotFoundError("document_missing_exception", meta=None, body={"found": False})
+        return {"_id": id, "found": True, "_source": self.latest[id]}
+
+    async def search(self, index, body, **kwargs):
+        self.calls.append("search")
+        return {"hits": {"hits": self._hits(body)}}
+
+    async def msearch(self, index, body, **kwargs):
+        self.calls.append("msearch")
+        return {"responses": [{"hits": {"hits": self._hits(search)}} for search in body[1::2]]}
+
+    async def mget(self, index, ids, **kwargs):
+        self.calls.append("mget")
+        return {
+            "docs": [
+                {"_id": key_ticker, "found": True, "_source": self.latest[key_ticker]} if key_ticker in self.latest
+                else {"_id": key_ticker, "found": False}
+                for key_ticker in ids
+            ]
+        }
+
+
+@pytest.fixture
+def bars(ohlcv):
+    df = ohlcv.reset_index()
+    df["date_reference"] = df["date_reference"].dt.strftime("%Y-%m-%d")
+    yield {"AAPL": df.to_dict(orient="records"), "MSFT": df.iloc[:3].to_dict(orient="records")}
+
+
+@pytest.fixture
+def es(bars):
+    latest = {"AAPL": {**bars["AAPL"][-1], "percent_variance": 1.25}}
+    yield FakeElasticsearch(bars, latest)
+
+
+@pytest.fixture
+def client(es):
+    container = Container()
+    container.es.override(providers.Object(es))
+    container.markets_stats_cache.override(providers.Object(MarketsStatsCache()))
+    container.markets_indicators_cache.override(providers.Object(MarketsIndicatorsCache()))
+
+    application = FastAPI()
+    application.container = container
+    application.include_router(markets_router, prefix="/markets")
+    yield TestClient(application)
+    container.unwire()
+
+
+def test_stats_close_batch(client, es, bars):
+    response = client.post(f"/markets/stats_close/{EOD_INDEX}", json={"key_tickers": ["AAPL", "MSFT", "IBM"]})
+
+    assert response.status_code == 200
+    data = response.json()
+    # AAPL comes from the latest index, MSFT from the msearch and IBM has no bars
+    assert list(data) == ["AAPL", "MSFT"]
+    assert data["AAPL"]["percent_variance"] == 1.25
+    msft = bars["MSFT"]
+    assert data["MSFT"]["most_recent_date"] == msft[-1]["date_reference"]
+    assert data["MSFT"]["most_recent_close"] == pytest.approx(msft[-1]["val_close"])
+    assert es.calls == ["mget", "msearch"]
+
+    # the second request is answered by the stats cache
+    assert client.post(f"/markets/stats_close/{EOD_INDEX}", json={"key_tickers": ["AAPL", "MSFT"]}).json() == data
+    assert es.calls == ["mget", "msearch"]
+
+
+def test_stats_close(client, es):
+    response = client.get(f"/markets/stats_close/{EOD_INDEX}/AAPL")
+
+    assert response.status_code == 200
+    assert response.json()["percent_variance"] == 1.25
+    assert es.calls == ["get"]
+
+
+def test_stats_close_unknown_ticker(client, es):
+    response = client.get(f"/markets/stats_close/{EOD_INDEX}/IBM")
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == f"Stats close not found, id: {EOD_INDEX}/IBM"
+    assert es.calls == ["get", "search"]
+
+
+def test_stats_close_batch_rejects_invalid_dates(client):
+    response = client.post(
+        f"/markets/stats_close/{EOD_INDEX}", json={"key_tickers": ["AAPL"], "close_date": "2024-13-01"}
+    )
+    assert response.status_code == 400
+
+
+def test_ohlcv_json_and_arrow(client, bars):
+    url = f"/markets/ohlcv/{EOD_INDEX}/AAPL"
+    params = {"start_date": "2024-01-02", "end_date": "2024-01-05", "fields": "val_close,val_volume"}
+
+    response = client.get(url, params=params)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "public, max-age=3600, s-maxage=3600"
+    data = response.json()
+    assert list(data) == ["key_ticker", "date_reference", "val_close", "val_volume"]
+    assert data["date_reference"] == ["2024-01-02", "2024-01-03", "2024-01-04", "2024-01-05"]
+    assert data["val_close"] == [bar["val_close"] for bar in bars["AAPL"][1:5]]
+
+    response = client.get(url, params={**params, "format": "arrow"})
+    assert response.headers["content-type"] == "application/vnd.apache.arrow.stream"
+    table = pa.ipc.open_stream(response.content).read_all()
+    assert table.column("val_close").to_pylist() == data["val_close"]
+
+
+def test_ohlcv_rejects_unknown_fields(client):
+    response = client.get(f"/markets/ohlcv/{EOD_INDEX}/AAPL", params={"fields": "val_close,val_unknown"})
+    assert response.status_code == 400
+
+
+def test_indicators(client, ohlcv):
+    indicators = {"sma": {"short_window": 5, "long_window": 20}, "rsi": {}}
+    response = client.post(f"/markets/indicators/{EOD_INDEX}/AAPL", json={"indicators": indicators})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert len(data["date_reference"]) == len(ohlcv)
+    sma = data["indicators"]["sma"]
+    df_sma, df_crossovers = backtesting_utils.get_sma(ohlcv, 5, 20)
+    assert sma["values"]["sma_short"][:4] == [None] * 4
+    assert sma["values"]["sma_long"][-1] == pytest.approx(df_sma["sma_long"].iloc[-1])
+    assert sma["crossovers"] == df_crossovers.index.strftime("%Y-%m-%d").tolist()
+    assert "rsi" in data["indicators"]
+
+
+@pytest.mark.parametrize("indicators", [
+    {"sma": {"short_window": 0}},
+    {"rsi": {"period": 2.5}},
+    {"bbands": {"period": 1}},
+])
+def test_indicators_rejects_invalid_windows(client, indicators):
+    response = client.post(f"/markets/indicators/{EOD_INDEX}/AAPL", json={"indicators": indicators})
+    assert response.status_code == 400
+
+
+def test_indicators_without_bars(client):
+    response = client.post(f"/markets/indicators/{EOD_INDEX}/IBM", json={"indicators": {"sma": {}}})
+    assert response.status_code == 404
@@ -0,0 +1,197 @@
+from types import SimpleNamespace
+
+import fakeredis
+import pytest
+import redis
+
+from app.domain.repositories.message_jobs import MessageJobNotFoundError
+from app.interface.api.messages.schema import Message, MessageRequest
+from app.services.message_jobs import MessageJobService, MessageJobWorker
+
+
+@pytest.fixture
+def message_job_service():
+    service = MessageJobService("redis://localhost:6379/0")
+    service.redis_client = fakeredis.FakeStrictRedis()
+    yield service
+
+
+def enqueue(message_job_service):
+    message_request = MessageRequest(message_role="human", message_content="hello", agent_id="agent-1")
+    return message_job_service.enqueue(message_request, "public", "human-1")
+
+
+def test_dequeue_keeps_job_in_processing_until_acknowledged(message_job_service):
+    job = enqueue(message_job_service)
+    processing_key = message_job_service.get_processing_key("worker-0")
+
+    assert message_job_service.dequeue("worker-0", timeout=1)["id"] == job["id"]
+    assert message_job_service.redis_client.lrange(processing_key, 0, -1) == [job["id"].encode()]
+
+    message_job_service.acknowledge(job["id"], "worker-0")
+    assert message_job_service.redis_client.llen(processing_key) == 0
+
+
+def test_requeue_stale_puts_jobs_of_a_killed_worker_back_first(message_job_service):
+    stale = enqueue(message_job_service)
+    message_job_service.dequeue("worker-0", timeout=1)
+    queued = enqueue(message_job_service)
+
+    assert message_job_service.requeue_stale("worker-1") == 0
+    assert message_job_service.requeue_stale("worker-0") == 1
+    assert message_job_service.dequeue("worker-0", timeout=1)["id"] == stale["id"]
+    assert message_job_service.dequeue("worker-0", timeout=1)["id"] == queued["id"]
+
+
+def test_dequeue_drops_expired_jobs(message_job_service):
+    job = enqueue(message_job_service)
+    message_job_service.redis_client.delete(message_job_service.get_job_key(job["id"]))
+
+    assert message_job_service.dequeue("worker-0", timeout=1) is None
+    assert message_job_service.redis_client.llen(message_job_service.get_processing_key("worker-0")) == 0
+
+
+class FakeAgent:
+    def __init__(self, error=None):
+        self.error = error
+
+    def process_message(self, message_request, schema):
+        if self.error is not None:
+            raise self.error
+        return Message(
+            message_role="assistant", message_content="hi", agent_id=message_request.agent_id, response_data={}
+        )
+
+
+class FakeMessageService:
+    def __init__(self):
+        self.created = []
+
+    def get_message_by_id(self, message_id, schema):
+        return SimpleNamespace(id=message_id)
+
+    def create_message(self, **kwargs):
+        self.created.append(kwargs)
+        return SimpleNamespace(id="assistant-1")
+
+
+class FakeTaskNotificationService:
+    def __init__(self):
+        self.updates = []
+
+    def publish_update(self, task_progress):
+        self.updates.append(task_progress)
+
+
+def create_worker(message_job_service, agent):
+    return MessageJobWorker(
+        message_job_service=message_job_service,
+        agent_service=SimpleNamespace(get_agent_by_id=lambda agent_id, schema: SimpleNamespace(agent_type="test")),
+        agent_registry=SimpleNamespace(get_agent=lambda agent_type: agent),
+        message_service=FakeMessageService(),
+        task_notification_service=FakeTaskNotificationService(),
+    )
+
+
+def test_process_job_completes_with_the_assistant_message(message_job_service):
+    job = enqueue(message_job_service)
+    worker = create_worker(message_job_service, FakeAgent())
+
+    worker.process_job(message_job_service.dequeue("worker-0", timeout=1))
+
+    stored = message_job_service.get_job(job["id"], "public")
+    assert (stored["status"], stored["assistant_message_id"], stored["error"]) == ("completed", "assistant-1", None)
+    created = worker.message_service.created[0]
+    assert (created["message_content"], created["replies_to"].id) == ("hi", "human-1")
+    assert worker.task_notification_service.updates == []
+
+
+def test_process_job_records_and_publishes_failures(message_job_service):
+    job = enqueue(message_job_service)
+    worker = create_worker(message_job_service, FakeAgent(RuntimeError("model unavailable")))
+
+    worker.process_job(message_job_service.dequeue("worker-0", timeout=1))
+
+    stored = message_job_service.get_job(job["id"], "public")
+    assert (stored["status"], stored["error"]) == ("failed", "model unavailable")
+    assert worker.message_service.created == []
+    update = worker.task_notification_service.updates[0]
+    assert (update.agent_id, update.status, update.message_content) == ("agent-1", "failed", "model unavailable")
+
+
+def test_run_acknowledges_processed_jobs(message_job_service):
+    job = enqueue(message_job_service)
+    worker = create_worker(message_job_service, FakeAgent())
+    process_job = worker.process_job
+
+    def process_and_stop(job):
+        worker.stop()
+        return process_job(job)
+
+    worker.process_job = process_and_stop
+    worker.run("worker-0", poll_timeout=1)
+
+    assert message_job_service.get_job(job["id"], "public")["status"] == "completed"
+    assert message_job_service.redis_client.llen(message_job_service.get_processing_key("worker-0")) == 0
+
+
+def test_jobs_of_other_schemas_are_not_found(message_job_service):
+    job = enqueue(message_job_service)
+
+    with pytest.raises(MessageJobNotFoundError):
+        message_job_service.get_job(job["id"], "other_schema")
+
+
+def test_jobs_are_failed_after_max_attempts(message_job_service):
+    job = enqueue(message_job_service)
+
+    for attempt in range(1, message_job_service.max_attempts + 1):
+        assert message_job_service.dequeue("worker-0", timeout=1)["attempts"] == attempt
+        # the worker dies before acknowledging, its next start requeues the job
+        message_job_service.requeue_stale("worker-0")
+
+    assert message_job_service.dequeue("worker-0", timeout=1) is None
+    stored = message_job_service.get_job(job["id"], "public")
+    assert (stored["status"], stored["error"]) == ("failed", "Gave up after 3 attempts")
+    assert message_job_service.redis_client.llen(message_job_service.get_processing_key("worker-0")) == 0
+
+
+def test_finished_jobs_are_not_processed_again(message_job_service):
+    job = enqueue(message_job_service)
+    message_job_service.update_job(message_job_service.dequeue("worker-0", timeout=1), status="completed")
+    message_job_service.requeue_stale("worker-0")
+
+    assert message_job_service.dequeue("worker-0", timeout=1) is None
+    assert message_job_service.get_job(job["id"], "public")["status"] == "completed"
+
+
+def test_process_job_fails_invalid_requests(message_job_service):
+    job = enqueue(message_job_service)
+    worker = create_worker(message_job_service, FakeAgent())
+    dequeued = message_job_service.dequeue("worker-0", timeout=1)
+    dequeued["message_request"]["message_role"] = "unknown"
+
+    assert worker.process_job(dequeued)["status"] == "failed"
+    assert worker.task_notification_service.updates[0].agent_id == "agent-1"
+    assert message_job_service.get_job(job["id"], "public")["status"] == "failed"
+
+
+def test_run_survives_redis_errors_while_processing(message_job_service, monkeypatch):
+    enqueue(message_job_service)
+    worker = create_worker(message_job_service, FakeAgent())
+    calls = []
+    dequeue_update = message_job_service.update_job
+
+    def update_job(job, **fields):
+        if "status" not in fields:
+            return dequeue_update(job, **fields)
+        calls.append(fields)
+        worker.stop()
+        raise redis.ConnectionError("redis went away")
+
+    monkeypatch.setattr(message_job_service, "update_job", update_job)
+    worker.run("worker-0", poll_timeout=0)
+
+    # in_progress then failed were attempted, the job waits in the processing list for the next start
+    assert [fields["status"] for fields in calls] == ["in_progress", "failed"]
+    assert message_job_service.redis_client.llen(message_job_service.get_processing_key("worker-0")) == 1
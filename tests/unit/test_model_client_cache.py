@@ -0,0 +1,75 @@
+import fakeredis
+import pytest
+
+from app.services.model_client_cache import ModelClientCache
+
+
+@pytest.fixture
+def server():
+    yield fakeredis.FakeServer()
+
+
+def create_cache(server, **kwargs) -> ModelClientCache:
+    cache = ModelClientCache(**kwargs)
+    cache.redis_client = fakeredis.FakeStrictRedis(server=server)
+    return cache
+
+
+class Factory:
+    def __init__(self):
+        self.built = 0
+
+    def __call__(self):
+        self.built += 1
+        return object()
+
+
+def test_clients_are_reused_until_their_schema_is_invalidated():
+    cache, factory = ModelClientCache(), Factory()
+
+    client = cache.get_or_create("tenant_a", ("agent-1", "chat", "gpt"), factory)
+    assert cache.get_or_create("tenant_a", ("agent-1", "chat", "gpt"), factory) is client
+    other = cache.get_or_create("tenant_b", ("agent-1", "chat", "gpt"), factory)
+
+    cache.invalidate("tenant_a")
+    assert cache.get_or_create("tenant_a", ("agent-1", "chat", "gpt"), factory) is not client
+    assert cache.get_or_create("tenant_b", ("agent-1", "chat", "gpt"), factory) is other
+    assert (factory.built, cache.hits, cache.misses) == (3, 2, 3)
+
+
+def test_invalidate_reaches_other_processes_through_the_generation(server):
+    # two caches on one Redis stand for two API processes
+    local = create_cache(server, generation_ttl=0)
+    remote = create_cache(server, generation_ttl=0)
+    factory = Factory()
+
+    client = remote.get_or_create("tenant_a", "key", factory)
+    assert remote.get_or_create("tenant_a", "key", factory) is client
+
+    local.invalidate("tenant_a")
+    assert remote.get_or_create("tenant_a", "key", factory) is not client
+    assert factory.built == 2
+
+
+def test_generation_is_read_at_most_every_generation_ttl(server):
+    local = create_cache(server)
+    remote = create_cache(server, generation_ttl=60)
+    factory = Factory()
+
+    client = remote.get_or_create("tenant_a", "key", factory)
+    local.invalidate("tenant_a")
+    # within generation_ttl the remote process keeps its client
+    assert remote.get_or_create("tenant_a", "key", factory) is client
+
+    remote.generations.clear()
+    assert remote.get_or_create("tenant_a", "key", factory) is not client
+
+
+def test_lru_bound_and_shared_http_clients():
+    cache, factory = ModelClientCache(max_entries=2), Factory()
+    for key in ("a", "b", "c"):
+        cache.get_or_create("tenant_a", key, factory)
+
+    assert [key for _, key in cache.entries] == ["b", "c"]
+    assert cache.get_http_client("http://ollama:11434") is cache.get_http_client("http://ollama:11434")
+    assert cache.get_http_client("http://ollama:11434") is not cache.get_http_client("https://api.openai.com/v1")
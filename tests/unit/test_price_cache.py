@@ -0,0 +1,122 @@
+import asyncio
+
+import numpy as np
+import orjson
+import pandas as pd
+import pytest
+
+from app.infrastructure.database.prices import PriceCache
+from app.services.markets_indicators import MarketsIndicatorsService
+from app.services.markets_ohlcv import MarketsOhlcvService
+
+EOD_INDEX = "quant-agents_stocks-eod_latest"
+
+
+class FakeElasticsearch:
+    """Paginated searches over in-memory EOD documents, enough for PriceCache and MarketsOhlcvService."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.searches = []
+
+    @staticmethod
+    def _matches(doc, query_filter):
+        if "term" in query_filter:
+            return doc["key_ticker"] == query_filter["term"]["key_ticker"]["value"]
+        if "terms" in query_filter:
+            return doc["key_ticker"] in query_filter["terms"]["key_ticker"]
+        if "range" in query_filter:
+            bounds, date = query_filter["range"]["date_reference"], doc["date_reference"]
+            return (
+                date > bounds.get("gt", "") and date >= bounds.get("gte", "")
+                and date <= bounds.get("lte", "9999")
+            )
+        return True
+
+    async def search(self, index, body, **kwargs):
+        self.searches.append(body)
+        docs = [doc for doc in self.docs if all(self._matches(doc, f) for f in body["query"]["bool"]["filter"])]
+        sort_fields = [next(iter(sort)) for sort in body["sort"]]
+        descending = next(iter(body["sort"][0].values())) in ("desc", {"order": "desc"})
+        docs.sort(key=lambda doc: [doc[field] for field in sort_fields], reverse=descending)
+        if "search_after" in body:
+            docs = [doc for doc in docs if [doc[field] for field in sort_fields] > body["search_after"]]
+        docs = docs[:body["size"]]
+
+        if "docvalue_fields" in body:
+            fields = [field for field in body["docvalue_fields"] if isinstance(field, str)]
+            hits = [
+                {"fields": {"date_reference": [doc["date_reference"]], **{f: [doc[f]] for f in fields}}}
+                for doc in docs
+            ]
+        else:
+            hits = [{"_source": doc} for doc in docs]
+        for hit, doc in zip(hits, docs):
+            hit["sort"] = [doc[field] for field in sort_fields]
+        return {"hits": {"hits": hits}}
+
+
+def to_docs(key_ticker, df):
+    df = df.reset_index()
+    df["date_reference"] = df["date_reference"].dt.strftime("%Y-%m-%d")
+    return df.assign(key_ticker=key_ticker).to_dict(orient="records")
+
+
+@pytest.fixture
+def es(ohlcv):
+    yield FakeElasticsearch(to_docs("AAPL", ohlcv.iloc[:100]) + to_docs("MSFT", 2 * ohlcv.iloc[:100]))
+
+
+def test_refresh_is_incremental(es, ohlcv, tmp_path):
+    price_cache = PriceCache(es, str(tmp_path), page_size=30)
+
+    assert asyncio.run(price_cache.refresh(EOD_INDEX, ["AAPL", "MSFT"])) == {"AAPL": 100, "MSFT": 100}
+    assert price_cache.get_watermark(EOD_INDEX, "AAPL") == ohlcv.index[99].strftime("%Y-%m-%d")
+
+    es.docs += to_docs("AAPL", ohlcv.iloc[100:])
+    es.searches.clear()
+    assert asyncio.run(price_cache.refresh(EOD_INDEX, ["AAPL", "MSFT"])) == {"AAPL": 50, "MSFT": 0}
+    assert es.searches[0]["query"]["bool"]["filter"][1] == {"range": {"date_reference": {"gt": "2024-05-17"}}}
+
+    pd.testing.assert_frame_equal(
+        price_cache.load_frame(EOD_INDEX, "AAPL"), ohlcv, check_freq=False, check_index_type=False
+    )
+    panel = price_cache.load_panel(EOD_INDEX, ["AAPL", "MSFT"])
+    np.testing.assert_allclose(panel["val_close"][:100, 1], 2 * ohlcv["val_close"].iloc[:100])
+
+
+def test_appending_the_same_bars_keeps_one_copy(es, ohlcv, tmp_path):
+    price_cache = PriceCache(es, str(tmp_path))
+    bars = to_docs("AAPL", ohlcv.iloc[:3])
+    price_cache._write(EOD_INDEX, "AAPL", bars)
+    price_cache._write(EOD_INDEX, "AAPL", bars[1:])
+
+    assert price_cache.load_columns(EOD_INDEX, "AAPL")["date_reference"] == ["2024-01-01", "2024-01-02", "2024-01-03"]
+
+
+def test_load_columns_between_dates(es, ohlcv, tmp_path):
+    price_cache = PriceCache(es, str(tmp_path))
+    asyncio.run(price_cache.refresh(EOD_INDEX, ["AAPL"]))
+
+    columns = price_cache.load_columns(EOD_INDEX, "AAPL", "2024-01-02", "2024-01-04")
+    assert columns["date_reference"] == ["2024-01-02", "2024-01-03", "2024-01-04"]
+    np.testing.assert_array_equal(columns["val_close"], ohlcv["val_close"].iloc[1:4])
+    assert price_cache.load_columns(EOD_INDEX, "IBM")["date_reference"] == []
+
+
+def test_indicators_read_through_the_price_cache(es, tmp_path):
+    indicators = {"sma": {"short_window": 5, "long_window": 20}, "macd": {}}
+    ohlcv_service = MarketsOhlcvService(es)
+    price_cache = PriceCache(es, str(tmp_path))
+    cached = MarketsIndicatorsService(ohlcv_service, price_cache=price_cache)
+
+    expected = asyncio.run(MarketsIndicatorsService(ohlcv_service).get_indicators(EOD_INDEX, "AAPL", indicators))
+    result = asyncio.run(cached.get_indicators(EOD_INDEX, "AAPL", indicators, start_date="2024-01-10"))
+    assert result["date_reference"] == expected["date_reference"][7:]
+
+    es.searches.clear()
+    result = asyncio.run(cached.get_indicators(EOD_INDEX, "AAPL", indicators))
+    # compared as served by the endpoint, NaN warm-up values as null
+    assert orjson.dumps(result) == orjson.dumps(expected)
+    # the second request only looks for bars past the watermark
+    assert len(es.searches) == 1 and "docvalue_fields" not in es.searches[0]
@@ -0,0 +1,95 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.services.integrations import IntegrationService
+from app.services.vault_secrets_cache import VaultSecretsCache
+
+
+class FakeKv:
+    def __init__(self):
+        self.secrets = {}
+        self.reads = []
+
+    def read_secret_version(self, path, raise_on_deleted_version=False):
+        self.reads.append(path)
+        if path not in self.secrets:
+            raise KeyError(path)
+        return {"data": {"data": self.secrets[path]}}
+
+
+@pytest.fixture
+def kv():
+    kv = FakeKv()
+    kv.secrets["integration_1"] = {"api_key": "key-1"}
+    kv.secrets["integration_2"] = {"api_key": "key-2"}
+    yield kv
+
+
+@pytest.fixture
+def vault_client(kv):
+    yield SimpleNamespace(secrets=SimpleNamespace(kv=kv))
+
+
+def test_secrets_are_read_once_until_invalidated(vault_client, kv):
+    cache = VaultSecretsCache(vault_client)
+
+    assert cache.read_secret("integration_1") == {"api_key": "key-1"}
+    assert cache.read_secret("integration_1") == {"api_key": "key-1"}
+    assert kv.reads == ["integration_1"]
+
+    kv.secrets["integration_1"] = {"api_key": "rotated"}
+    cache.read_secret("integration_2")
+    cache.invalidate("integration_1")
+    assert cache.read_secret("integration_1") == {"api_key": "rotated"}
+    assert cache.read_secret("integration_2") == {"api_key": "key-2"}
+
+    cache.invalidate()
+    cache.read_secret("integration_2")
+    assert kv.reads == ["integration_1", "integration_2", "integration_1", "integration_2"]
+
+
+def test_ttl_and_size_bounds(vault_client, kv, monkeypatch):
+    uncached = VaultSecretsCache(vault_client, ttl=0)
+    uncached.read_secret("integration_1")
+    uncached.read_secret("integration_1")
+    assert kv.reads == ["integration_1", "integration_1"]
+
+    cache = VaultSecretsCache(vault_client, ttl=10, max_entries=1)
+    cache.read_secret("integration_1")
+    cache.read_secret("integration_2")
+    assert list(cache.entries) == ["integration_2"]
+
+    now = cache.entries["integration_2"][0]
+    monkeypatch.setattr("app.services.vault_secrets_cache.time.monotonic", lambda: now + 1)
+    cache.read_secret("integration_2")
+    assert kv.reads.count("integration_2") == 2
+
+
+def test_failed_reads_are_counted_and_not_cached(vault_client):
+    cache = VaultSecretsCache(vault_client)
+
+    with pytest.raises(KeyError):
+        cache.read_secret("integration_3")
+    metrics = cache.get_metrics()
+    assert (metrics["entries"], metrics["misses"], metrics["vault_reads"], metrics["vault_errors"]) == (0, 1, 1, 1)
+
+
+class FakeIntegrationRepository:
+    def __init__(self):
+        self.deleted = []
+
+    def delete_by_id(self, integration_id, schema):
+        self.deleted.append(integration_id)
+
+
+def test_deleting_an_integration_drops_its_credentials(vault_client, kv):
+    cache = VaultSecretsCache(vault_client)
+    integration_service = IntegrationService(FakeIntegrationRepository(), vault_secrets_cache=cache)
+    path = integration_service.get_credentials_path("1")
+    cache.read_secret(path)
+    cache.read_secret("integration_2")
+
+    integration_service.delete_integration_by_id("1", "tenant_a")
+
+    assert list(cache.entries) == ["integration_2"]